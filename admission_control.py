@@ -0,0 +1,274 @@
+import email.utils
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+class CotaEsgotada(requests.exceptions.RequestException):
+    """The API reported that the account quota is used up; waiting does not help."""
+
+
+class BaldeTokens:
+    """
+    Token bucket: 'taxa' units per second, up to 'capacidade' saved for bursts.
+
+    A request larger than the balance is admitted on credit and the following ones
+    wait for the debt to be repaid, so big requests are never starved.
+    """
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._saldo = capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, custo):
+        """Takes 'custo' units and returns how many seconds the caller must wait first."""
+        with self._lock:
+            agora = time.monotonic()
+            self._saldo = min(self.capacidade, self._saldo + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._saldo -= custo
+            return max(0.0, -self._saldo / self.taxa)
+
+    def ajustar(self, diferenca):
+        """Charges (positive) or refunds (negative) the difference once the real cost is known."""
+        with self._lock:
+            self._saldo = min(self.capacidade, self._saldo - diferenca)
+
+
+# Error codes used when the account quota (not the rate) is used up:
+# ElevenLabs answers 401 "quota_exceeded", OpenAI/Azure 429 "insufficient_quota"
+MARCADORES_COTA = ('quota_exceeded', 'insufficient_quota')
+
+
+class Permissao:
+    """One admitted request; registrar() reports its response to the controller."""
+
+    __slots__ = ('custo', 'inicio', 'status', 'latencia', 'espera_sugerida', 'cota_esgotada')
+
+    def __init__(self, custo):
+        self.custo = custo
+        self.inicio = time.monotonic()
+        self.status = None
+        self.latencia = None
+        self.espera_sugerida = None
+        self.cota_esgotada = False
+
+    @property
+    def limitada(self):
+        """True if the API throttled the request (it can be sent again after a pause)."""
+        return self.status in (429, 503) and not self.cota_esgotada
+
+    def registrar(self, response):
+        self.status = response.status_code
+        self.latencia = time.monotonic() - self.inicio
+        self.espera_sugerida = _ler_retry_after(response.headers)
+        if self.status in (401, 402, 403, 429):
+            # Error bodies are small, reading them does not hurt a streamed response
+            self.cota_esgotada = any(marcador in response.text for marcador in MARCADORES_COTA)
+
+
+def _ler_retry_after(headers):
+    """Seconds from 'retry-after-ms' (Azure) or 'Retry-After' (seconds or HTTP date)."""
+    valor = headers.get('retry-after-ms')
+    if valor:
+        try:
+            return float(valor) / 1000
+        except ValueError:
+            pass
+    valor = headers.get('Retry-After')
+    if not valor:
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        pass
+    try:
+        data = email.utils.parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, data.timestamp() - time.time())
+
+
+class ControleAdmissao:
+    """
+    Shared admission control for one API.
+
+    Every request waits for a concurrency slot and for its estimated cost (characters
+    for TTS, tokens for the LLM) in a token bucket sized from the account's per-minute
+    quota. The number of slots adapts AIMD-style: it grows by about one per round of
+    successful requests and is halved on a 429/503 or when the latency per unit of cost
+    (seconds per character or token, so a long phrase is not mistaken for a slow API)
+    climbs well above the best recently seen, at most once per 'intervalo_reducao'. A throttled answer
+    also pauses the whole API for its Retry-After. A quota error stops admissions, so
+    the remaining requests fail fast with CotaEsgotada.
+    """
+
+    def __init__(self, nome, custo_por_minuto, concorrencia_max, concorrencia_min=1, concorrencia_inicial=None,
+                 rajada_segundos=10, fator_latencia=2.5, intervalo_reducao=2.0, max_tentativas=6, metricas=None):
+        self.nome = nome
+        self.concorrencia_min = concorrencia_min
+        self.concorrencia_max = concorrencia_max
+        self.fator_latencia = fator_latencia
+        self.intervalo_reducao = intervalo_reducao
+        self.max_tentativas = max_tentativas
+        self.metricas = metricas
+        self.rajada_segundos = rajada_segundos
+        self.custo_por_minuto = custo_por_minuto
+        self.balde = self._criar_balde(custo_por_minuto)
+        self._limite = float(concorrencia_inicial or concorrencia_max)
+        self._em_uso = 0
+        self._pausado_ate = 0.0
+        self._ultima_reducao = 0.0
+        self._falhas_seguidas = 0
+        self._latencia_base = None  # Best smoothed latency per unit of cost seen, slowly forgotten
+        self._latencia_media = None  # Smoothed latency per unit of cost
+        self._esgotada = None
+        self._condicao = threading.Condition()
+
+    @property
+    def limite(self):
+        return max(self.concorrencia_min, int(self._limite))
+
+    def _criar_balde(self, custo_por_minuto):
+        # No quota configured (0/None): only the adaptive concurrency applies
+        if not custo_por_minuto:
+            return None
+        taxa = custo_por_minuto / 60.0
+        return BaldeTokens(taxa, taxa * self.rajada_segundos)
+
+    def configurar(self, concorrencia_max=None, custo_por_minuto=None):
+        """Changes the limits at run time (e.g. the batch CLI with more workers)."""
+        with self._condicao:
+            if concorrencia_max is not None:
+                self.concorrencia_max = concorrencia_max
+                self._limite = min(max(self._limite, concorrencia_max / 2), concorrencia_max)
+            # A new bucket starts full, so it is only replaced when the quota changes
+            if custo_por_minuto is not None and custo_por_minuto != self.custo_por_minuto:
+                self.custo_por_minuto = custo_por_minuto
+                self.balde = self._criar_balde(custo_por_minuto)
+            self._condicao.notify_all()
+
+    def _contar(self, nome, quantidade=1):
+        if self.metricas is not None:
+            self.metricas.contar(f"{self.nome}_{nome}", quantidade)
+
+    @contextmanager
+    def admitir(self, custo):
+        """
+        Waits until the request may be sent and holds its slot for the 'with' block.
+
+        Yields:
+            Permissao: Call registrar(response) inside the block so the outcome is counted.
+
+        Raises:
+            CotaEsgotada: If a previous request reported the quota as used up.
+        """
+        inicio = time.monotonic()
+        with self._condicao:
+            while True:
+                if self._esgotada:
+                    raise CotaEsgotada(self._esgotada)
+                pausa = self._pausado_ate - time.monotonic()
+                if pausa <= 0 and self._em_uso < self.limite:
+                    break
+                self._condicao.wait(pausa if pausa > 0 else None)
+            self._em_uso += 1
+        try:
+            if self.balde is not None:
+                espera = self.balde.reservar(custo)
+                if espera:
+                    time.sleep(espera)
+            if self.metricas is not None:
+                self.metricas.observar(f"{self.nome}_admissao_espera", time.monotonic() - inicio)
+            permissao = Permissao(custo)
+            yield permissao
+        finally:
+            with self._condicao:
+                self._em_uso -= 1
+                self._condicao.notify_all()
+        self._avaliar(permissao)
+
+    def _avaliar(self, permissao):
+        agora = time.monotonic()
+        with self._condicao:
+            if permissao.status is None:
+                return
+            if permissao.cota_esgotada:
+                self._esgotada = f"Cota da API {self.nome} esgotada (HTTP {permissao.status})"
+                self._contar('cota_esgotada')
+            elif permissao.limitada:
+                self._falhas_seguidas += 1
+                self._contar('limitadas')
+                espera = permissao.espera_sugerida
+                if espera is None:
+                    espera = min(30.0, 0.5 * 2 ** self._falhas_seguidas)
+                self._pausado_ate = max(self._pausado_ate, agora + espera)
+                self._reduzir(agora)
+            elif permissao.status < 400:
+                self._falhas_seguidas = 0
+                latencia = permissao.latencia / max(permissao.custo, 1)
+                self._latencia_media = latencia if self._latencia_media is None \
+                    else 0.8 * self._latencia_media + 0.2 * latencia
+                if self._latencia_base is None or self._latencia_media < self._latencia_base:
+                    self._latencia_base = self._latencia_media
+                else:
+                    self._latencia_base *= 1.001  # Let the baseline follow a slower service
+                if self._latencia_media > self.fator_latencia * self._latencia_base:
+                    self._contar('lentidao')
+                    self._reduzir(agora)
+                else:
+                    # Additive increase: about +1 slot per round of 'limite' successes
+                    self._limite = min(self.concorrencia_max, self._limite + 1.0 / max(self._limite, 1.0))
+            self._condicao.notify_all()
+
+    def _reduzir(self, agora):
+        # Requests already in flight when the limit was hit all fail together; count them once
+        if agora - self._ultima_reducao >= self.intervalo_reducao:
+            self._ultima_reducao = agora
+            self._limite = max(float(self.concorrencia_min), self._limite / 2)
+
+    def reabrir(self):
+        """Admits requests again after a quota error (e.g. on a new run, once the plan was renewed)."""
+        with self._condicao:
+            self._esgotada = None
+            self._condicao.notify_all()
+
+    def ajustar_custo(self, estimado, real):
+        """Corrects the bucket with the real cost reported by the API (e.g. token usage)."""
+        if self.balde is not None and real is not None:
+            self.balde.ajustar(real - estimado)
+
+    def executar(self, custo, enviar):
+        """
+        Sends a request through the controller, sending it again while it is throttled.
+
+        Args:
+            custo (float): Estimated cost of the request.
+            enviar (callable): Sends the request and returns the requests.Response.
+
+        Returns:
+            requests.Response: The last response (possibly still 429 after max_tentativas).
+        """
+        for tentativa in range(1, self.max_tentativas + 1):
+            with self.admitir(custo) as permissao:
+                response = enviar()
+                permissao.registrar(response)
+            if not permissao.limitada or tentativa == self.max_tentativas:
+                return response
+            self._contar('retentativas')
+            response.close()
+
+    def estado(self):
+        with self._condicao:
+            return {
+                'limite': self.limite,
+                'em_uso': self._em_uso,
+                'pausa': max(0.0, self._pausado_ate - time.monotonic()),
+                'latencia_media': self._latencia_media,
+                'esgotada': bool(self._esgotada),
+            }
@@ -0,0 +1,40 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+
+@contextmanager
+def arquivo_temporario(caminho):
+    """
+    Yields the path of a temporary file next to 'caminho' and moves it over 'caminho'
+    when the block ends, so readers see either the old file or the complete new one.
+    If the block raises, the temporary file is removed and 'caminho' is left as it was.
+
+    Use it when the file is written by someone else from a path (a copy, an encoder).
+    """
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+@contextmanager
+def escrita_atomica(caminho, modo='w', encoding=None):
+    """
+    Opens a temporary file for writing and replaces 'caminho' with it when the block ends
+    (see arquivo_temporario). Text modes default to UTF-8.
+    """
+    if encoding is None and 'b' not in modo:
+        encoding = 'utf-8'
+    with arquivo_temporario(caminho) as temporario:
+        with open(temporario, modo, encoding=encoding) as f:
+            yield f
+
+
+def gravar_atomico(caminho, dados):
+    """Writes 'dados' (str or bytes) to 'caminho' atomically."""
+    with escrita_atomica(caminho, 'wb' if isinstance(dados, bytes) else 'w') as f:
+        f.write(dados)
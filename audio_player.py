@@ -0,0 +1,137 @@
+import io
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
+import mp3_index
+
+
+class PlayerAudio:
+    """
+    Long-lived audio player that owns the pygame mixer.
+
+    A single background thread initializes the mixer once and executes play/stop/queue
+    commands sent from any thread, so clicks never race on the global mixer. Recently
+    used clips are kept in memory (LRU) so replaying or playing a preloaded clip does
+    not touch the disk. A whole slide is played gaplessly by joining its clips at MP3
+    frame boundaries into a single in-memory stream.
+    """
+
+    def __init__(self, max_preload=64, intervalo=0.05):
+        self.max_preload = max_preload
+        self.intervalo = intervalo  # How often the queue is checked while something is playing
+        self._comandos = queue.Queue()
+        self._cache = OrderedDict()  # path -> ((mtime_ns, size), bytes), least recently used first
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name='player-audio', daemon=True)
+        self._thread.start()
+
+    # Public commands (thread-safe)
+
+    def tocar(self, fonte):
+        """Stops whatever is playing and plays 'fonte' (a file path or an in-memory MP3)."""
+        self._comandos.put(('tocar', fonte))
+
+    def enfileirar(self, fonte):
+        """Plays 'fonte' after the current clip and anything already queued."""
+        self._comandos.put(('enfileirar', fonte))
+
+    def tocar_slide(self, caminhos):
+        """Plays the clips in order without gaps between them."""
+        self._comandos.put(('slide', list(caminhos)))
+
+    def parar(self):
+        self._comandos.put(('parar', None))
+
+    def encerrar(self):
+        self._comandos.put(('encerrar', None))
+
+    def precarregar(self, caminho):
+        """
+        Reads a clip into the in-memory LRU so the next play starts instantly. The file is
+        read on the player thread, so the caller (e.g. a selection event) never waits for it.
+        """
+        self._comandos.put(('precarregar', caminho))
+
+    # Internals
+
+    def _bytes(self, caminho):
+        st = os.stat(caminho)
+        versao = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entrada = self._cache.get(caminho)
+            if entrada is not None and entrada[0] == versao:
+                self._cache.move_to_end(caminho)
+                return entrada[1]
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+        with self._lock:
+            self._cache[caminho] = (versao, dados)
+            self._cache.move_to_end(caminho)
+            while len(self._cache) > self.max_preload:
+                self._cache.popitem(last=False)
+        return dados
+
+    def _abrir(self, fonte):
+        if isinstance(fonte, io.BytesIO):
+            fonte.seek(0)
+            return fonte
+        return io.BytesIO(self._bytes(fonte))
+
+    def _loop(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+        except Exception as e:
+            print(f"Erro ao inicializar o áudio: {e}")
+            return
+
+        musica = pygame.mixer.music
+        fila = deque()
+
+        def iniciar(fonte):
+            try:
+                musica.load(self._abrir(fonte), 'mp3')
+                musica.play()
+            except Exception as e:
+                # Registrar o erro no console para depuração
+                print(f"Erro ao reproduzir o áudio: {e}")
+
+        while True:
+            tocando = musica.get_busy()
+            try:
+                # Block while idle; poll at 'intervalo' only while something is playing or queued
+                comando, argumento = self._comandos.get(timeout=self.intervalo if (tocando or fila) else None)
+            except queue.Empty:
+                comando = None
+
+            if comando == 'encerrar':
+                musica.stop()
+                pygame.mixer.quit()
+                return
+            if comando == 'parar':
+                fila.clear()
+                musica.stop()
+            elif comando == 'tocar':
+                fila.clear()
+                iniciar(argumento)
+            elif comando == 'enfileirar':
+                fila.append(argumento)
+            elif comando == 'precarregar':
+                try:
+                    if os.path.exists(argumento):
+                        self._bytes(argumento)
+                except OSError as e:
+                    print(f"Erro ao pré-carregar o áudio: {e}")
+            elif comando == 'slide':
+                fila.clear()
+                try:
+                    buffer = io.BytesIO()
+                    mp3_index.escrever_concatenado(argumento, buffer)
+                    iniciar(buffer)
+                except (OSError, ValueError) as e:
+                    print(f"Erro ao juntar os áudios do slide: {e}")
+
+            if fila and not musica.get_busy():
+                iniciar(fila.popleft())
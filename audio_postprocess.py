@@ -0,0 +1,163 @@
+"""
+Post-processing of the synthesized clips: silence trim, loudness normalization and
+re-encoding to a smaller profile.
+
+The clips are decoded to 16-bit PCM with pydub (which needs ffmpeg), processed with
+vectorized NumPy operations and encoded again. Work runs on a process pool so it uses
+every core without holding the GIL of the synthesis threads. NumPy, pydub and ffmpeg
+are optional: without them disponivel() is False and the clips are kept as they are.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mp3_index
+from atomic_write import arquivo_temporario
+
+PERFIL_PADRAO = {
+    'bitrate': '64k',           # Output MP3 bitrate
+    'sample_rate': 22050,       # Output sample rate (Hz); speech needs little above 11 kHz
+    'canais': 1,                # 1 = mixed down to mono
+    'limiar_silencio_db': -45,  # Windows quieter than this (dBFS) count as silence
+    'janela_ms': 10,            # Analysis window for the silence detection
+    'margem_ms': 80,            # Silence kept before the first and after the last sound
+    'alvo_dbfs': -18.0,         # RMS loudness of the voiced part after normalization
+    'pico_max_dbfs': -1.0,      # The gain never pushes a peak above this
+}
+
+_ESCALA = 32768.0
+
+
+def disponivel():
+    """True if NumPy, pydub and ffmpeg are installed."""
+    try:
+        import numpy  # noqa: F401
+        from pydub.utils import which
+    except ImportError:
+        return False
+    return which('ffmpeg') is not None
+
+
+def aparar_e_normalizar(amostras, taxa, perfil=PERFIL_PADRAO):
+    """
+    Trims leading/trailing silence and normalizes the loudness of 16-bit PCM.
+
+    Args:
+        amostras (numpy.ndarray): int16 samples with shape (n,) or (n, canais).
+        taxa (int): Sample rate in Hz.
+        perfil (dict): See PERFIL_PADRAO.
+
+    Returns:
+        numpy.ndarray: The processed int16 samples, same number of channels.
+    """
+    import numpy as np
+
+    dados = amostras.astype(np.float32)
+    mono = dados if dados.ndim == 1 else dados.mean(axis=1)
+    janela = max(1, int(taxa * perfil['janela_ms'] / 1000))
+    n_janelas = -(-len(mono) // janela)
+    if n_janelas == 0:
+        return amostras
+
+    # RMS of each window in dBFS, computed on one (n_janelas, janela) view
+    blocos = np.zeros(n_janelas * janela, dtype=np.float32)
+    blocos[:len(mono)] = mono
+    blocos = blocos.reshape(n_janelas, janela)
+    rms = np.sqrt(np.mean(np.square(blocos), axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-9) / _ESCALA)
+    sonoras = np.flatnonzero(db > perfil['limiar_silencio_db'])
+    if len(sonoras) == 0:  # Only silence: nothing to keep or measure
+        return amostras
+
+    margem = int(taxa * perfil['margem_ms'] / 1000)
+    inicio = max(0, sonoras[0] * janela - margem)
+    fim = min(len(mono), (sonoras[-1] + 1) * janela + margem)
+    dados = dados[inicio:fim]
+
+    # Gain from the loudness of the voiced windows only, so pauses do not lower the level
+    energia = np.mean(np.square(rms[sonoras]))
+    atual_db = 10 * np.log10(max(energia, 1e-18) / _ESCALA ** 2)
+    ganho = 10 ** ((perfil['alvo_dbfs'] - atual_db) / 20)
+    pico = float(np.max(np.abs(dados)))
+    if pico > 0:
+        ganho = min(ganho, 10 ** (perfil['pico_max_dbfs'] / 20) * _ESCALA / pico)
+    return np.clip(np.rint(dados * ganho), -32768, 32767).astype(np.int16)
+
+
+def processar_clipe(entrada, saida=None, perfil=PERFIL_PADRAO):
+    """
+    Decodes, trims, normalizes and re-encodes one MP3; runs inside the process pool.
+
+    The result replaces 'saida' (default: the input) atomically, and its frame index
+    is rebuilt so the duration shown and the stitching offsets stay correct.
+
+    Returns:
+        dict: 'bytes_antes', 'bytes_depois', 'ms_antes', 'ms_depois' and 'segundos'.
+    """
+    import numpy as np
+    from pydub import AudioSegment
+
+    inicio = time.perf_counter()
+    saida = saida or entrada
+    bytes_antes = os.path.getsize(entrada)
+    audio = AudioSegment.from_file(entrada)
+    canais = audio.channels
+    amostras = np.array(audio.set_sample_width(2).get_array_of_samples(), dtype=np.int16)
+    if canais > 1:
+        amostras = amostras.reshape(-1, canais)
+        if perfil['canais'] == 1:
+            amostras = amostras.mean(axis=1).astype(np.int16)
+            canais = 1
+    processadas = aparar_e_normalizar(amostras, audio.frame_rate, perfil)
+
+    resultado = AudioSegment(processadas.tobytes(), sample_width=2, frame_rate=audio.frame_rate, channels=canais)
+    with arquivo_temporario(saida) as temporario:
+        resultado.export(
+            temporario, format='mp3', bitrate=perfil['bitrate'],
+            parameters=['-ar', str(perfil['sample_rate'])],
+        )
+    mp3_index.carregar_indice(saida)
+    return {
+        'bytes_antes': bytes_antes,
+        'bytes_depois': os.path.getsize(saida),
+        'ms_antes': len(audio),
+        'ms_depois': len(resultado),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+class PosProcessador:
+    """
+    Process pool shared by all syntheses. enviar() returns a Future right away, so the
+    threads that call it are never blocked by the encoding. The pool is created on the
+    first clip, with the 'spawn' start method: forking the GUI process (Tk, player and
+    HTTP threads) could copy a lock held by another thread and deadlock the child.
+    """
+
+    def __init__(self, max_workers=None, perfil=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.perfil = dict(PERFIL_PADRAO, **(perfil or {}))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def enviar(self, caminho):
+        """
+        Schedules the in-place processing of the clip at 'caminho'.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the dict of processar_clipe().
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor.submit(processar_clipe, caminho, None, self.perfil)
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
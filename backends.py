@@ -0,0 +1,643 @@
+"""
+Interchangeable backends for Storage, Firestore and the speech/LLM APIs.
+
+The pipeline only uses a small part of each service:
+
+  * Storage: bucket.blob(name), bucket.list_blobs(prefix, delimiter, max_results)
+    (iterable, with '.pages' and '.prefixes'), blob.upload_from_filename(),
+    blob.generate_signed_url() and the blob metadata (generation, size, md5_hash, crc32c).
+  * Firestore: db.collection().document().get()/set()/update(), db.transaction() and
+    a 'transactional' decorator.
+  * ElevenLabs and Azure OpenAI: plain HTTP endpoints, reached through the base URLs.
+
+The production backends are the Firebase Admin SDK objects and the real APIs. This
+module provides in-process stand-ins with the same surface, for development and load
+tests without credentials or quotas:
+
+  * BucketLocal: a bucket kept in a folder on disk.
+  * DocumentosLocais: a document store kept in SQLite (a file, or ':memory:').
+  * ServidorAPIFalso: an HTTP server that answers the ElevenLabs and Azure OpenAI
+    endpoints with synthetic MP3 frames and locally split phrases, with configurable
+    latency and error rate.
+
+Select them with TTV_BACKEND=local (see main.init_firebase) and point TTV_ELEVENLABS_URL
+and TTV_AZURE_ENDPOINT at the fake server.
+
+Examples:
+    python backends.py api --port 8765 --latencia 0.3 --taxa-erro 0.05
+    python backends.py semear --document-id 0QhyptyCMN88m8jRsGl4 --slides 5
+"""
+import argparse
+import base64
+import copy
+import hashlib
+import json
+import os
+import pathlib
+import random
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import google_crc32c
+except ImportError:  # The checksum is optional; md5_hash is always available
+    google_crc32c = None
+
+from atomic_write import gravar_atomico
+from sentence_splitter import dividir_em_frases_locais
+
+METADADOS_DIR = '.metadados'  # Blob metadata, kept out of the listings
+
+
+# Storage
+
+class BlobLocal:
+    """Blob of a BucketLocal. Metadata is filled after an upload, a reload or a listing."""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+        self.size = None
+        self.md5_hash = None
+        self.crc32c = None
+        self.content_type = None
+        self.updated = None
+
+    @property
+    def _caminho(self):
+        return self.bucket._caminho(self.name)
+
+    @property
+    def _caminho_metadados(self):
+        return self.bucket._caminho(f"{METADADOS_DIR}/{self.name}.json")
+
+    def _aplicar(self, metadados):
+        self.generation = metadados['generation']
+        self.size = metadados['size']
+        self.md5_hash = metadados['md5Hash']
+        self.crc32c = metadados.get('crc32c')
+        self.content_type = metadados.get('contentType')
+        self.updated = datetime.fromtimestamp(metadados['generation'] / 1e6, tz=timezone.utc)
+
+    def reload(self):
+        try:
+            with open(self._caminho_metadados, 'r', encoding='utf-8') as f:
+                self._aplicar(json.load(f))
+        except (OSError, ValueError) as e:
+            raise LookupError(f"Blob '{self.name}' não existe.") from e
+
+    def exists(self):
+        return os.path.exists(self._caminho)
+
+    def upload_from_filename(self, filename, content_type=None):
+        with open(filename, 'rb') as f:
+            self.upload_from_string(f.read(), content_type=content_type)
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        metadados = {
+            'generation': self.bucket._nova_geracao(),
+            'size': len(data),
+            'md5Hash': base64.b64encode(hashlib.md5(data).digest()).decode('ascii'),
+            'crc32c': None,
+            'contentType': content_type or 'application/octet-stream',
+        }
+        if google_crc32c is not None:
+            crc = google_crc32c.value(data)
+            metadados['crc32c'] = base64.b64encode(crc.to_bytes(4, 'big')).decode('ascii')
+        _gravar_atomico(self._caminho, data)
+        _gravar_atomico(self._caminho_metadados, json.dumps(metadados).encode('utf-8'))
+        self._aplicar(metadados)
+
+    def download_as_bytes(self):
+        with open(self._caminho, 'rb') as f:
+            return f.read()
+
+    def delete(self):
+        for caminho in (self._caminho, self._caminho_metadados):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def generate_signed_url(self, expiration, credentials=None, **kwargs):
+        """Returns a 'file://' URL; the expiry is only recorded in the query string."""
+        if isinstance(expiration, timedelta):
+            expira = time.time() + expiration.total_seconds()
+        elif isinstance(expiration, datetime):
+            expira = expiration.timestamp()
+        else:
+            expira = float(expiration)
+        consulta = urllib.parse.urlencode({'generation': self.generation or '', 'Expires': int(expira)})
+        return f"{pathlib.Path(self._caminho).as_uri()}?{consulta}"
+
+
+class _PaginaLocal(list):
+    pass
+
+
+class _ListagemLocal:
+    """Listing iterator: yields blobs page by page and collects '.prefixes' as pages are read."""
+
+    def __init__(self, nomes, bucket, prefix, delimiter, max_results, page_size):
+        self._nomes = nomes
+        self._bucket = bucket
+        self._prefix = prefix
+        self._delimiter = delimiter
+        self._max_results = max_results
+        self._page_size = page_size
+        self.prefixes = set()
+        self._iniciada = False
+
+    @property
+    def pages(self):
+        if self._iniciada:
+            raise ValueError("A listagem já foi iniciada.")
+        self._iniciada = True
+        return self._paginas()
+
+    def _paginas(self):
+        pagina = _PaginaLocal()
+        entregues = 0
+        for nome in self._nomes:
+            if self._max_results is not None and entregues >= self._max_results:
+                break
+            if self._delimiter:
+                pos = nome.find(self._delimiter, len(self._prefix))
+                if pos >= 0:
+                    self.prefixes.add(nome[:pos + len(self._delimiter)])
+                    continue
+            blob = BlobLocal(self._bucket, nome)
+            try:
+                blob.reload()
+            except LookupError:
+                continue  # Removed after the folder was scanned
+            pagina.append(blob)
+            entregues += 1
+            if len(pagina) >= self._page_size:
+                yield pagina
+                pagina = _PaginaLocal()
+        if pagina or not entregues:
+            yield pagina
+
+    def __iter__(self):
+        for pagina in self.pages:
+            yield from pagina
+
+
+class BucketLocal:
+    """Storage bucket kept in a folder; blob names map to relative paths."""
+
+    def __init__(self, diretorio, name='local'):
+        self.diretorio = os.path.abspath(diretorio)
+        self.name = name
+        self._lock = threading.Lock()
+        self._ultima_geracao = 0
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, nome):
+        caminho = os.path.normpath(os.path.join(self.diretorio, *nome.split('/')))
+        if not caminho.startswith(self.diretorio + os.sep):
+            raise ValueError(f"Nome de blob inválido: '{nome}'.")
+        return caminho
+
+    def _nova_geracao(self):
+        # Microseconds since the epoch, strictly increasing like Storage generations
+        with self._lock:
+            self._ultima_geracao = max(self._ultima_geracao + 1, time.time_ns() // 1000)
+            return self._ultima_geracao
+
+    def blob(self, blob_name, generation=None):
+        blob = BlobLocal(self, blob_name)
+        blob.generation = generation
+        return blob
+
+    def get_blob(self, blob_name):
+        blob = BlobLocal(self, blob_name)
+        try:
+            blob.reload()
+        except LookupError:
+            return None
+        return blob
+
+    def list_blobs(self, prefix=None, delimiter=None, max_results=None, page_size=1000, **kwargs):
+        prefix = prefix or ''
+        nomes = []
+        for raiz, pastas, arquivos in os.walk(self.diretorio):
+            if raiz == self.diretorio and METADADOS_DIR in pastas:
+                pastas.remove(METADADOS_DIR)
+            relativa = os.path.relpath(raiz, self.diretorio).replace(os.sep, '/')
+            for arquivo in arquivos:
+                if arquivo.endswith('.tmp'):
+                    continue
+                nome = arquivo if relativa == '.' else f"{relativa}/{arquivo}"
+                if nome.startswith(prefix):
+                    nomes.append(nome)
+        nomes.sort()
+        return _ListagemLocal(nomes, self, prefix, delimiter, max_results, page_size)
+
+
+def _gravar_atomico(caminho, dados):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    gravar_atomico(caminho, dados)
+
+
+# Firestore
+
+class SnapshotLocal:
+    def __init__(self, referencia, dados):
+        self.reference = referencia
+        self.id = referencia.id
+        self._dados = dados
+
+    @property
+    def exists(self):
+        return self._dados is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._dados) if self._dados is not None else None
+
+
+class DocumentoLocal:
+    def __init__(self, db, colecao, id):
+        self._db = db
+        self.colecao = colecao
+        self.id = id
+
+    @property
+    def path(self):
+        return f"{self.colecao}/{self.id}"
+
+    def get(self, transaction=None):
+        # Inside a transaction the read happens under the transaction's lock
+        return SnapshotLocal(self, self._db._ler(self))
+
+    def set(self, dados, merge=False):
+        with self._db._lock:
+            atuais = self._db._ler(self) if merge else None
+            self._db._gravar(self, _mesclar(atuais or {}, dados) if merge else dados)
+
+    def update(self, campos):
+        with self._db._lock:
+            atuais = self._db._ler(self)
+            if atuais is None:
+                raise LookupError(f"Documento '{self.path}' não existe.")
+            self._db._gravar(self, _aplicar_campos(atuais, campos))
+
+    def delete(self):
+        with self._db._lock:
+            self._db._conexao.execute(
+                'DELETE FROM documentos WHERE colecao = ? AND id = ?', (self.colecao, self.id)
+            )
+
+
+class ColecaoLocal:
+    def __init__(self, db, nome):
+        self._db = db
+        self.id = nome
+
+    def document(self, document_id=None):
+        return DocumentoLocal(self._db, self.id, document_id or uuid.uuid4().hex[:20])
+
+    def stream(self):
+        with self._db._lock:
+            linhas = self._db._conexao.execute(
+                'SELECT id, dados FROM documentos WHERE colecao = ? ORDER BY id', (self.id,)
+            ).fetchall()
+        return [SnapshotLocal(self.document(id), json.loads(dados)) for id, dados in linhas]
+
+
+class TransacaoLocal:
+    """Buffers writes until the transactional function returns, like a Firestore transaction."""
+
+    def __init__(self, db, max_attempts=5):
+        self._db = db
+        self.max_attempts = max_attempts
+        self._escritas = []
+
+    def update(self, referencia, campos):
+        self._escritas.append(('update', referencia, campos))
+
+    def set(self, referencia, dados, merge=False):
+        self._escritas.append(('merge' if merge else 'set', referencia, dados))
+
+
+def transactional(funcao):
+    """
+    Decorator matching firestore.transactional for DocumentosLocais.
+
+    The wrapped function receives the transaction; reads and buffered writes run under
+    an exclusive SQLite transaction, so concurrent writers (threads or processes) are
+    serialized. A locked database is retried up to the transaction's max_attempts.
+    """
+    def executar(transacao, *args, **kwargs):
+        db = transacao._db
+        for tentativa in range(1, transacao.max_attempts + 1):
+            transacao._escritas = []
+            with db._lock:
+                try:
+                    db._conexao.execute('BEGIN IMMEDIATE')
+                except sqlite3.OperationalError:
+                    if tentativa == transacao.max_attempts:
+                        raise
+                    time.sleep(0.05 * tentativa)
+                    continue
+                try:
+                    resultado = funcao(transacao, *args, **kwargs)
+                    for tipo, referencia, dados in transacao._escritas:
+                        atuais = db._ler(referencia)
+                        if tipo == 'update':
+                            if atuais is None:
+                                raise LookupError(f"Documento '{referencia.path}' não existe.")
+                            dados = _aplicar_campos(atuais, dados)
+                        elif tipo == 'merge':
+                            dados = _mesclar(atuais or {}, dados)
+                        db._gravar(referencia, dados)
+                    db._conexao.execute('COMMIT')
+                    return resultado
+                except Exception:
+                    db._conexao.execute('ROLLBACK')
+                    raise
+    return executar
+
+
+class DocumentosLocais:
+    """Document store with the Firestore client surface used by the app, kept in SQLite."""
+
+    transactional = staticmethod(transactional)
+
+    def __init__(self, caminho=':memory:'):
+        if caminho != ':memory:':
+            pasta = os.path.dirname(os.path.abspath(caminho))
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.RLock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS documentos ('
+            'colecao TEXT NOT NULL, id TEXT NOT NULL, dados TEXT NOT NULL, PRIMARY KEY (colecao, id))'
+        )
+
+    def collection(self, nome):
+        return ColecaoLocal(self, nome)
+
+    def transaction(self, max_attempts=5, **kwargs):
+        return TransacaoLocal(self, max_attempts)
+
+    def _ler(self, referencia):
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT dados FROM documentos WHERE colecao = ? AND id = ?', (referencia.colecao, referencia.id)
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def _gravar(self, referencia, dados):
+        with self._lock:
+            self._conexao.execute(
+                'INSERT OR REPLACE INTO documentos (colecao, id, dados) VALUES (?, ?, ?)',
+                (referencia.colecao, referencia.id, json.dumps(dados, ensure_ascii=False)),
+            )
+
+
+# Applies a Firestore update: top-level keys or dotted field paths replace their values
+def _aplicar_campos(dados, campos):
+    dados = copy.deepcopy(dados)
+    for caminho, valor in campos.items():
+        alvo = dados
+        partes = caminho.split('.')
+        for parte in partes[:-1]:
+            alvo = alvo.setdefault(parte, {})
+        alvo[partes[-1]] = copy.deepcopy(valor)
+    return dados
+
+
+def _mesclar(dados, novos):
+    dados = copy.deepcopy(dados)
+    for chave, valor in novos.items():
+        if isinstance(valor, dict) and isinstance(dados.get(chave), dict):
+            dados[chave] = _mesclar(dados[chave], valor)
+        else:
+            dados[chave] = copy.deepcopy(valor)
+    return dados
+
+
+_backends_locais = {}
+_backends_locais_lock = threading.Lock()
+
+
+def criar_backends_locais(diretorio):
+    """
+    Returns the (bucket, db) stand-ins kept under 'diretorio', shared per folder.
+
+    The bucket lives in '<diretorio>/storage' and the documents in '<diretorio>/firestore.sqlite3'.
+    """
+    diretorio = os.path.abspath(diretorio)
+    with _backends_locais_lock:
+        if diretorio not in _backends_locais:
+            _backends_locais[diretorio] = (
+                BucketLocal(os.path.join(diretorio, 'storage')),
+                DocumentosLocais(os.path.join(diretorio, 'firestore.sqlite3')),
+            )
+        return _backends_locais[diretorio]
+
+
+# Speech and LLM APIs
+
+# Silent MPEG-1 Layer III frame: 128 kbps, 48 kHz, mono -> 384 bytes and 24 ms per frame
+_FRAME_MP3 = b'\xff\xfb\x94\xc4' + bytes(380)
+_MS_POR_FRAME = 24
+
+_VOZES = [
+    {'voice_id': 'voz-falsa-1', 'name': 'Voz de teste 1', 'language': 'pt'},
+    {'voice_id': 'voz-falsa-2', 'name': 'Voz de teste 2', 'language': 'en'},
+]
+
+
+def audio_sintetico(texto, ms_por_caractere=60):
+    """Silent MP3 whose duration grows with the text length, like real speech."""
+    frames = max(1, len(texto) * ms_por_caractere // _MS_POR_FRAME)
+    return _FRAME_MP3 * frames
+
+
+class _ManipuladorAPIFalsa(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as the real APIs
+
+    def log_message(self, formato, *args):
+        if self.server.verbose:
+            super().log_message(formato, *args)
+
+    def _responder_json(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(tamanho) or b'{}')
+        except ValueError:
+            return {}
+
+    # Simulates the service: waits for the configured latency and fails at the configured rate
+    def _simular(self):
+        servidor = self.server
+        servidor.contar('requisicoes')
+        espera = servidor.latencia + random.uniform(-servidor.variacao, servidor.variacao)
+        if espera > 0:
+            time.sleep(espera)
+        if random.random() < servidor.taxa_erro:
+            servidor.contar('erros')
+            if random.random() < 0.5:
+                self._responder_json(429, {'detail': 'Too many requests'}, {'Retry-After': '1'})
+            else:
+                self._responder_json(500, {'detail': 'Internal error'})
+            return False
+        return True
+
+    def do_GET(self):
+        caminho = urllib.parse.urlsplit(self.path).path
+        if caminho != '/v1/voices':
+            self._responder_json(404, {'detail': 'Not found'})
+            return
+        if not self._simular():
+            return
+        etag = '"vozes-1"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._responder_json(200, {'voices': _VOZES}, {'ETag': etag})
+
+    def do_POST(self):
+        caminho = urllib.parse.urlsplit(self.path).path
+        corpo = self._ler_json()
+        if re.fullmatch(r'/v1/text-to-speech/[^/]+(/stream)?', caminho):
+            if not self._simular():
+                return
+            texto = corpo.get('text', '')
+            self.server.contar('caracteres', len(texto))
+            audio = audio_sintetico(texto, self.server.ms_por_caractere)
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/mpeg')
+            self.send_header('Content-Length', str(len(audio)))
+            self.end_headers()
+            # Sent in pieces, so streaming clients see the audio arrive over time
+            passo = len(_FRAME_MP3) * 16
+            for inicio in range(0, len(audio), passo):
+                self.wfile.write(audio[inicio:inicio + passo])
+                self.wfile.flush()
+            return
+        if re.fullmatch(r'/openai/deployments/[^/]+/chat/completions', caminho):
+            if not self._simular():
+                return
+            pedido = next((m['content'] for m in reversed(corpo.get('messages', [])) if m.get('role') == 'user'), '')
+            # The app's prompt ends with "...exatamente o que eu mandar: <texto>"
+            texto = pedido.split('mandar: ', 1)[-1]
+            minimo = re.search(r'no mínimo (\d+) palavras', pedido)
+            frases = dividir_em_frases_locais(texto, min_words=int(minimo.group(1)) if minimo else 8)
+            tokens_entrada = sum(len(m.get('content', '')) for m in corpo.get('messages', [])) // 4
+            tokens_saida = len(texto) // 4
+            self.server.contar('tokens', tokens_entrada + tokens_saida)
+            self._responder_json(200, {
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': '\n'.join(frases)}}],
+                'usage': {
+                    'prompt_tokens': tokens_entrada,
+                    'completion_tokens': tokens_saida,
+                    'total_tokens': tokens_entrada + tokens_saida,
+                },
+            })
+            return
+        self._responder_json(404, {'detail': 'Not found'})
+
+
+class ServidorAPIFalso(ThreadingHTTPServer):
+    """
+    Stand-in for the ElevenLabs and Azure OpenAI endpoints used by the app.
+
+    Args:
+        endereco (tuple[str, int]): Address to listen on; port 0 picks a free port.
+        latencia (float): Mean delay in seconds before each answer.
+        variacao (float): Maximum random deviation from 'latencia'.
+        taxa_erro (float): Fraction of requests answered with 429 (with Retry-After) or 500.
+        ms_por_caractere (int): Synthesized audio duration per character of text.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, endereco=('127.0.0.1', 0), latencia=0.0, variacao=0.0, taxa_erro=0.0,
+                 ms_por_caractere=60, verbose=False):
+        super().__init__(endereco, _ManipuladorAPIFalsa)
+        self.latencia = latencia
+        self.variacao = variacao
+        self.taxa_erro = taxa_erro
+        self.ms_por_caractere = ms_por_caractere
+        self.verbose = verbose
+        self.contadores = {'requisicoes': 0, 'erros': 0, 'caracteres': 0, 'tokens': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self.contadores[nome] += quantidade
+
+    def iniciar_em_segundo_plano(self):
+        """Serves on a daemon thread and returns the server (for tests and benchmarks)."""
+        threading.Thread(target=self.serve_forever, name='api-falsa', daemon=True).start()
+        return self
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backends locais para desenvolvimento e testes de carga.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    api = comandos.add_parser('api', help="Servidor falso das APIs da Eleven Labs e do Azure OpenAI.")
+    api.add_argument('--host', default='127.0.0.1')
+    api.add_argument('--port', type=int, default=8765)
+    api.add_argument('--latencia', type=float, default=0.2, help="Atraso médio de cada resposta, em segundos.")
+    api.add_argument('--variacao', type=float, default=0.1, help="Variação aleatória do atraso, em segundos.")
+    api.add_argument('--taxa-erro', type=float, default=0.0, help="Fração das requisições que falham (429 ou 500).")
+    api.add_argument('--ms-por-caractere', type=int, default=60, help="Duração do áudio gerado por caractere.")
+    api.add_argument('--verbose', action='store_true')
+
+    semear = comandos.add_parser('semear', help="Cria um documento de apresentação no Firestore local.")
+    semear.add_argument('--dir', default=os.environ.get('TTV_LOCAL_DIR', 'backend_local'))
+    semear.add_argument('--document-id', required=True)
+    semear.add_argument('--slides', type=int, default=3, help="Número de slides (ordens 1..N).")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.comando == 'api':
+        servidor = ServidorAPIFalso((args.host, args.port), args.latencia, args.variacao, args.taxa_erro,
+                                    args.ms_por_caractere, args.verbose)
+        print(f"API falsa em {servidor.url} (TTV_ELEVENLABS_URL e TTV_AZURE_ENDPOINT)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(json.dumps(servidor.contadores))
+    else:
+        _, db = criar_backends_locais(args.dir)
+        db.collection('presentations').document(args.document_id).set({
+            'slides': [{'order': ordem, 'audios': []} for ordem in range(1, args.slides + 1)]
+        })
+        print(f"Documento '{args.document_id}' criado com {args.slides} slides em '{args.dir}'.")
@@ -0,0 +1,284 @@
+"""
+Headless batch mode for the split -> synthesize -> publish pipeline.
+
+Runs many scripts in one process without the Tk interface and writes a JSON
+report with the outcome of each one. Progress is kept in the job journal, so
+running the same manifest again resumes each script where it stopped.
+
+The manifest is either:
+  * a JSONL file, one script per line:
+        {"arquivo": "aula1.txt", "base_name": "aula1", "document_id": "...", "slide_order": 1}
+    ("texto" can be used instead of "arquivo" and "voice_id" overrides --voice;
+    relative paths are resolved against the manifest folder), or
+  * a folder of '*.txt' scripts. Each script may have a '<name>.json' sidecar with
+    the same keys; otherwise --document-id/--slide-order are used and the base
+    name is the file name.
+
+Examples:
+    python batch_cli.py roteiros.jsonl --report relatorio.json
+    python batch_cli.py roteiros/ --slide-order 2 --jobs 2 --tts-workers 8
+    python batch_cli.py roteiros.jsonl --jobs 4 --tts-cpm 20000 --llm-tpm 10000
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from journal import Jornal
+
+
+# Function to read the scripts to be processed from a JSONL file or a folder
+def carregar_manifesto(caminho, document_id_padrao, slide_order_padrao):
+    """
+    Args:
+        caminho (str): JSONL manifest or folder of '.txt' scripts.
+        document_id_padrao (str): Document ID used when an entry does not set one.
+        slide_order_padrao (int or None): Slide order used when an entry does not set one.
+
+    Returns:
+        list[dict]: Entries with 'texto' or 'arquivo', 'base_name', 'document_id' and 'slide_order'.
+    """
+    itens = []
+    if os.path.isdir(caminho):
+        for nome in sorted(os.listdir(caminho)):
+            if not nome.endswith('.txt'):
+                continue
+            stem = nome[:-4]
+            # Relative to the folder; joined with it below like the JSONL entries
+            item = {'arquivo': nome, 'base_name': stem}
+            sidecar = os.path.join(caminho, f"{stem}.json")
+            if os.path.exists(sidecar):
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    item.update(json.load(f))
+            itens.append(item)
+        pasta_base = caminho
+    else:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for numero, linha in enumerate(f, 1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    itens.append(json.loads(linha))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Linha {numero} do manifesto inválida: {e}")
+        pasta_base = os.path.dirname(os.path.abspath(caminho))
+
+    for item in itens:
+        if 'arquivo' in item and not os.path.isabs(item['arquivo']):
+            item['arquivo'] = os.path.join(pasta_base, item['arquivo'])
+        if 'base_name' not in item:
+            if 'arquivo' not in item:
+                raise ValueError(f"Entrada sem 'base_name' nem 'arquivo': {item}")
+            item['base_name'] = os.path.splitext(os.path.basename(item['arquivo']))[0]
+        item.setdefault('document_id', document_id_padrao)
+        item.setdefault('slide_order', slide_order_padrao)
+    return itens
+
+
+# Function to run the whole pipeline for one script
+def processar_item(item, bucket, db, args):
+    """
+    Splits, synthesizes and (optionally) publishes one script.
+
+    Returns:
+        dict: Report entry for the script.
+    """
+    inicio = time.monotonic()
+    base_name = item['base_name']
+    relatorio = {
+        'base_name': base_name,
+        'document_id': item['document_id'],
+        'slide_order': item['slide_order'],
+        'frases': 0,
+        'sintetizadas': 0,
+        'falhas': [],
+        'enviadas': 0,
+        'ignoradas': 0,
+        'ja_publicadas': 0,
+        'bytes_enviados': 0,
+        'bytes_economizados': 0,
+        'firestore': False,
+        'erros': [],
+        'status': 'falha',
+    }
+    try:
+        if 'texto' in item:
+            texto = item['texto']
+        else:
+            with open(item['arquivo'], 'r', encoding='utf-8') as f:
+                texto = f.read()
+
+        frases = main.dividir_em_frases_coerentes(
+            texto.strip(), min_words=item.get('min_words', args.min_words), modo=args.split_mode
+        )
+        relatorio['frases'] = len(frases)
+        if not frases:
+            relatorio['erros'].append("Nenhuma frase gerada.")
+            return relatorio
+
+        geradas = []
+        voice_id = item.get('voice_id', args.voice)
+        for idx, audio_filepath in main.sintetizar_frases(frases, 'audios', base_name, args.tts_workers, voice_id=voice_id):
+            if audio_filepath:
+                geradas.append(idx)
+            else:
+                relatorio['falhas'].append(idx)
+        relatorio['sintetizadas'] = len(geradas)
+        relatorio['falhas'].sort()
+
+        if not args.no_publish:
+            if relatorio['slide_order'] is None:
+                raise ValueError("Nenhum slide_order definido para a publicação.")
+            slide_order = int(relatorio['slide_order'])
+            base_folder = f"audios/{base_name}"
+            pendentes = [(idx, f"{base_name}-frase-{idx}") for idx in sorted(geradas)]
+            if args.publish_mode == 'slide':
+                nome_slide = f"{base_name}-slide-{slide_order}"
+                existentes = main.listar_blobs_existentes(bucket, base_folder)
+                if not args.overwrite and f"{base_folder}/{nome_slide}.mp3" in existentes:
+                    raise ValueError(f"'{nome_slide}.mp3' já existe no Storage (use --overwrite).")
+                audio_slide = main.publicar_audio_do_slide(
+                    bucket, base_folder, nome_slide, pendentes, remotos=None if args.full_upload else existentes
+                )
+                relatorio['enviadas'] = len(pendentes)
+                relatorio['firestore'] = main.atualizar_firestore(
+                    db, item['document_id'], [], None, slide_order, audio_slide=audio_slide
+                )
+            else:
+                # A re-run resumes the journal session: phrases already on this slide are skipped
+                envios = main.obter_jornal().envios(base_name)
+                destino = Jornal.destino(item['document_id'], slide_order)
+                restantes = [(idx, nome) for idx, nome in pendentes if envios.get(idx, {}).get('publicado_em') != destino]
+                relatorio['ja_publicadas'] = len(pendentes) - len(restantes)
+                pendentes = restantes
+                existentes = main.listar_blobs_existentes(bucket, base_folder)
+                if not args.overwrite:
+                    restantes = [(idx, nome) for idx, nome in pendentes
+                                 if f"{base_folder}/{nome}.mp3" not in existentes or idx in envios]
+                    relatorio['ignoradas'] = len(pendentes) - len(restantes)
+                    pendentes = restantes
+                novos_audios, publicados, erros, sincronia = main.enviar_frases_ao_storage(
+                    bucket, base_folder, pendentes, args.upload_workers, base_name=base_name,
+                    remotos=existentes, delta=not args.full_upload
+                )
+                relatorio['bytes_enviados'] = sincronia['bytes_enviados']
+                relatorio['bytes_economizados'] = sincronia['bytes_economizados']
+                relatorio['enviadas'] = len(novos_audios)
+                relatorio['erros'].extend(erros)
+                relatorio['firestore'] = main.atualizar_firestore(db, item['document_id'], novos_audios, None, slide_order)
+                if relatorio['firestore']:
+                    main.obter_jornal().marcar_publicadas(base_name, publicados, item['document_id'], slide_order)
+
+        completo = not relatorio['falhas'] and not relatorio['erros']
+        if not args.no_publish:
+            completo = completo and relatorio['firestore']
+        relatorio['status'] = 'ok' if completo else 'parcial'
+    except Exception as e:
+        print(f"Erro ao processar '{base_name}': {e}")
+        relatorio['erros'].append(str(e))
+    finally:
+        relatorio['segundos'] = round(time.monotonic() - inicio, 3)
+    return relatorio
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera e publica áudios e legendas em lote, sem interface gráfica.")
+    parser.add_argument('manifesto', help="Arquivo JSONL ou pasta com roteiros '.txt'.")
+    parser.add_argument('--document-id', default=main.DOCUMENT_ID, help="Documento padrão na coleção 'presentations'.")
+    parser.add_argument('--slide-order', type=int, default=None, help="Slide padrão para os áudios.")
+    parser.add_argument('--voice', default=main.elevenlabs_voice_id, help="ID da voz padrão na Eleven Labs.")
+    parser.add_argument('--min-words', type=int, default=8, help="Mínimo de palavras por frase.")
+    parser.add_argument('--split-mode', choices=('llm', 'local'), default=None,
+                        help="Divisão das frases pelo LLM ou pelas regras locais (padrão: MODO_DIVISAO).")
+    parser.add_argument('--jobs', type=int, default=1, help="Roteiros processados ao mesmo tempo.")
+    parser.add_argument('--tts-workers', type=int, default=main.TTS_MAX_WORKERS, help="Sínteses simultâneas por roteiro.")
+    parser.add_argument('--tts-cpm', type=int, default=main.ELEVENLABS_CARACTERES_POR_MINUTO,
+                        help="Caracteres por minuto permitidos na Eleven Labs (0 = sem limite).")
+    parser.add_argument('--llm-tpm', type=int, default=main.AZURE_TOKENS_POR_MINUTO,
+                        help="Tokens por minuto do deployment Azure OpenAI (0 = sem limite).")
+    parser.add_argument('--upload-workers', type=int, default=main.UPLOAD_MAX_WORKERS, help="Envios simultâneos por roteiro.")
+    parser.add_argument('--publish-mode', choices=('frases', 'slide'), default=main.MODO_PUBLICACAO,
+                        help="Um arquivo por frase ou um único arquivo por slide.")
+    parser.add_argument('--overwrite', action='store_true', help="Sobrescreve arquivos que já existem no Storage.")
+    parser.add_argument('--full-upload', action='store_true',
+                        help="Envia todos os arquivos, mesmo os que já estão iguais no Storage.")
+    parser.add_argument('--postprocess', action='store_true',
+                        help="Corta silêncios, normaliza o volume e recodifica os áudios (requer pydub e ffmpeg).")
+    parser.add_argument('--no-publish', action='store_true', help="Apenas gera os áudios, sem enviar ao Firebase.")
+    parser.add_argument('--report', default=None, help="Caminho do relatório JSON (padrão: saída padrão).")
+    parser.add_argument('--metrics', default=None,
+                        help="Exporta as métricas por estágio ('.prom' para o formato Prometheus, JSON nos demais).")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    """
+    Processes the manifest and writes the report to --report or to stdout.
+
+    Progress and error lines go to stderr while the scripts run, so the report
+    printed on stdout is valid JSON.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        relatorio = _processar_manifesto(args)
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+    return relatorio
+
+
+def _processar_manifesto(args):
+    main.MODO_HEADLESS = True
+    main.POS_PROCESSAMENTO = main.POS_PROCESSAMENTO or args.postprocess
+    # Keep one open connection per concurrent synthesis across all scripts
+    main.elevenlabs_client.configurar_pool(max(1, args.jobs) * args.tts_workers)
+    # The admission controllers share the quota between all scripts and adapt the concurrency below this cap
+    main.controle_tts.configurar(concorrencia_max=max(1, args.jobs) * args.tts_workers, custo_por_minuto=args.tts_cpm)
+    main.controle_llm.configurar(custo_por_minuto=args.llm_tpm)
+    itens = carregar_manifesto(args.manifesto, args.document_id, args.slide_order)
+
+    # Check every voice once against the cached catalog before synthesizing anything
+    for voice_id in sorted({item.get('voice_id', args.voice) for item in itens}):
+        if main.validar_voz(voice_id) is False:
+            raise ValueError(f"A voz '{voice_id}' não existe na Eleven Labs.")
+
+    bucket = db = None
+    if not args.no_publish:
+        bucket, db = main.init_firebase()
+        if bucket is None or db is None:
+            raise RuntimeError("Não foi possível inicializar o Firebase.")
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        resultados = list(executor.map(lambda item: processar_item(item, bucket, db, args), itens))
+    main.encerrar_pos_processador()
+
+    relatorio = {
+        'roteiros': resultados,
+        'total': len(resultados),
+        'ok': sum(1 for r in resultados if r['status'] == 'ok'),
+        'frases': sum(r['frases'] for r in resultados),
+        'sintetizadas': sum(r['sintetizadas'] for r in resultados),
+        'enviadas': sum(r['enviadas'] for r in resultados),
+        'bytes_enviados': sum(r['bytes_enviados'] for r in resultados),
+        'bytes_economizados': sum(r['bytes_economizados'] for r in resultados),
+        'segundos': round(time.monotonic() - inicio, 3),
+        'cache': main.obter_tts_cache().estatisticas(),
+        'admissao': {'tts': main.controle_tts.estado(), 'llm': main.controle_llm.estado()},
+        'metricas': main.metricas.resumo(),
+    }
+    if args.metrics:
+        main.metricas.exportar(args.metrics)
+    return relatorio
+
+
+if __name__ == "__main__":
+    relatorio = run(parse_args())
+    sys.exit(0 if relatorio['ok'] == relatorio['total'] else 1)
@@ -0,0 +1,63 @@
+"""
+Startup-time benchmark for main.py.
+
+Imports the module in fresh interpreters and reports the import time, and checks that
+the heavy optional modules (Firebase SDK, pygame, ttkthemes, ...) are not loaded at
+import. Exits with status 1 when a limit is exceeded, so it can run in CI.
+
+Examples:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --max-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported when first needed
+MODULOS_PESADOS = ('firebase_admin', 'google.cloud.firestore', 'google.cloud.storage', 'pygame', 'PIL',
+                   'playsound', 'ttkthemes', 'numpy', 'pydub')
+
+_SONDA = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+decorrido = time.perf_counter() - inicio
+print(json.dumps({'ms': decorrido * 1000, 'carregados': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def medir_importacao(pasta):
+    saida = subprocess.run(
+        [sys.executable, '-c', _SONDA % (MODULOS_PESADOS,)],
+        cwd=pasta, capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação de main.py.")
+    parser.add_argument('--runs', type=int, default=5, help="Número de interpretadores medidos.")
+    parser.add_argument('--max-ms', type=float, default=None, help="Falha se a mediana passar deste tempo.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    medidas = [medir_importacao(pasta) for _ in range(max(1, args.runs))]
+    tempos = [m['ms'] for m in medidas]
+    carregados = sorted({nome for m in medidas for nome in m['carregados']})
+
+    mediana = statistics.median(tempos)
+    print(f"import main: mediana {mediana:.0f} ms, mín {min(tempos):.0f} ms, máx {max(tempos):.0f} ms ({len(tempos)} execuções)")
+    falhou = False
+    if carregados:
+        print(f"Módulos pesados carregados na importação: {', '.join(carregados)}")
+        falhou = True
+    if args.max_ms is not None and mediana > args.max_ms:
+        print(f"Mediana acima do limite de {args.max_ms:.0f} ms.")
+        falhou = True
+    sys.exit(1 if falhou else 0)
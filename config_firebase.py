@@ -2,11 +2,19 @@ import firebase_admin
 from firebase_admin import credentials, storage
 import os
 
+import backends
+
 # Caminho para o arquivo de chave do serviço
 SERVICE_ACCOUNT_KEY_PATH = 'serviceAccountKey.json'
 
+# "firebase" ou "local" (bucket numa pasta, ver backends.py)
+BACKEND = os.environ.get('TTV_BACKEND', 'firebase')
+LOCAL_BACKEND_DIR = os.environ.get('TTV_LOCAL_DIR', 'backend_local')
+
 # Inicializar o aplicativo Firebase
 def init_firebase():
+    if BACKEND == 'local':
+        return
     if not firebase_admin._apps:
         cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
         firebase_admin.initialize_app(cred, {
@@ -15,6 +23,8 @@ def init_firebase():
 
 # Obter referência ao bucket
 def get_bucket():
+    if BACKEND == 'local':
+        return backends.criar_backends_locais(LOCAL_BACKEND_DIR)[0]
     init_firebase()
     bucket = storage.bucket()
     return bucket
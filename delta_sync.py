@@ -0,0 +1,66 @@
+import base64
+import hashlib
+import os
+import threading
+
+try:
+    import google_crc32c
+except ImportError:  # Only needed for objects without an MD5 (e.g. composed objects)
+    google_crc32c = None
+
+_BLOCO = 1024 * 1024
+
+# path -> ((size, mtime_ns), (size, md5, crc32c)); a file is hashed again only when it changes
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def digest_local(caminho):
+    """
+    Hashes a local file in the format Storage reports for its objects.
+
+    Returns:
+        tuple[int, str, str or None]: Size, base64 MD5 and base64 CRC32C (None when
+        google_crc32c is not installed).
+    """
+    st = os.stat(caminho)
+    versao = (st.st_size, st.st_mtime_ns)
+    with _digests_lock:
+        entrada = _digests.get(caminho)
+        if entrada is not None and entrada[0] == versao:
+            return entrada[1]
+
+    md5 = hashlib.md5()
+    crc = google_crc32c.Checksum() if google_crc32c is not None else None
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(_BLOCO), b''):
+            md5.update(bloco)
+            if crc is not None:
+                crc.update(bloco)
+    digest = (
+        st.st_size,
+        base64.b64encode(md5.digest()).decode('ascii'),
+        base64.b64encode(crc.digest()).decode('ascii') if crc is not None else None,
+    )
+    with _digests_lock:
+        _digests[caminho] = (versao, digest)
+    return digest
+
+
+def arquivo_inalterado(caminho, blob):
+    """
+    True if the listed 'blob' already holds exactly the content of the local file.
+
+    Sizes are compared first; then the MD5, or the CRC32C when the object has no MD5.
+    Without any comparable checksum the file is treated as changed.
+    """
+    if blob is None or not os.path.exists(caminho):
+        return False
+    tamanho, md5, crc32c = digest_local(caminho)
+    if blob.size is not None and int(blob.size) != tamanho:
+        return False
+    if blob.md5_hash:
+        return blob.md5_hash == md5
+    if blob.crc32c and crc32c:
+        return blob.crc32c == crc32c
+    return False
@@ -0,0 +1,51 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ClienteHTTP:
+    """
+    Shared keep-alive client for one API host.
+
+    All calls reuse the same requests.Session, so TCP/TLS connections are kept
+    open between requests. Authentication headers and the default timeout are
+    configured once here instead of in every function that calls the API.
+    """
+
+    def __init__(self, base_url, headers=None, timeout=60, pool_maxsize=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.configurar_pool(pool_maxsize)
+
+    def configurar_pool(self, pool_maxsize):
+        """Sets how many connections are kept open; should match the number of concurrent callers."""
+        self.pool_maxsize = max(1, pool_maxsize)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, path, **kwargs):
+        """
+        Sends a request to 'path' (relative to base_url, or an absolute URL).
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path such as '/v1/voices'.
+            **kwargs: Passed on to requests.Session.request; 'timeout' defaults to the client's.
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url}{path}"
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        self.session.close()
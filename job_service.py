@@ -0,0 +1,498 @@
+"""
+Local job queue service for the split -> synthesize -> publish pipeline.
+
+Jobs (one script for one slide of one presentation) are kept in a SQLite queue and
+run by worker processes, each one through batch_cli.processar_item. Several
+presentations and slides are processed at once; a worker always takes the pending
+job with the highest priority and, among equal priorities, the one whose document
+has the fewest running jobs and waited longest, so one large presentation cannot
+starve the others. Two jobs with the same base name never run at the same time,
+since they share the journal session and the Storage folder.
+
+HTTP API (JSON):
+    POST   /trabalhos          {"texto" | "arquivo", "base_name", "document_id", "slide_order",
+                                "prioridade": 0, "opcoes": {"publish_mode": "slide", ...}}
+                               or {"trabalhos": [...]} to submit many at once
+    GET    /trabalhos          ?estado=pendente&document_id=...&limite=100
+    GET    /trabalhos/<id>     state, attempts and the batch report of the job
+    DELETE /trabalhos/<id>     cancels a pending job
+    GET    /resumo             jobs per state and live workers
+
+Examples:
+    python job_service.py --workers 4 --port 8780
+    curl -X POST localhost:8780/trabalhos -d '{"arquivo": "aula1.txt", "document_id": "...", "slide_order": 1}'
+    curl localhost:8780/trabalhos/1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Job states
+PENDENTE, EXECUTANDO, CONCLUIDO, PARCIAL, FALHA, CANCELADO = (
+    'pendente', 'executando', 'concluido', 'parcial', 'falha', 'cancelado'
+)
+
+# batch_cli options a job may override in "opcoes"
+OPCOES_TRABALHO = (
+    'min_words', 'split_mode', 'tts_workers', 'upload_workers', 'publish_mode',
+    'overwrite', 'full_upload', 'no_publish', 'voice', 'postprocess',
+)
+
+
+class FilaTrabalhos:
+    """
+    Persistent job queue shared by the HTTP server and the worker processes.
+
+    Each process opens its own connection; claims run in BEGIN IMMEDIATE
+    transactions, so a job is given to exactly one worker. A failed job waits
+    'espera_retentativa' seconds, doubled at each attempt (at most 'espera_maxima'),
+    before it can be claimed again.
+    """
+
+    def __init__(self, caminho, max_tentativas=3, espera_retentativa=30.0, espera_maxima=3600.0):
+        self.caminho = caminho
+        self.max_tentativas = max_tentativas
+        self.espera_retentativa = espera_retentativa
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.executescript(
+            'CREATE TABLE IF NOT EXISTS trabalhos ('
+            '  id INTEGER PRIMARY KEY AUTOINCREMENT, document_id TEXT NOT NULL, slide_order INTEGER,'
+            '  base_name TEXT NOT NULL, item TEXT NOT NULL, prioridade INTEGER NOT NULL DEFAULT 0,'
+            '  estado TEXT NOT NULL, tentativas INTEGER NOT NULL DEFAULT 0, trabalhador TEXT,'
+            '  criado REAL NOT NULL, iniciado REAL, terminado REAL, relatorio TEXT, erro TEXT,'
+            '  disponivel_em REAL NOT NULL DEFAULT 0);'
+            'CREATE INDEX IF NOT EXISTS trabalhos_estado ON trabalhos (estado, prioridade);'
+            'CREATE INDEX IF NOT EXISTS trabalhos_documento ON trabalhos (document_id, estado);'
+        )
+        # Queues created before the retry backoff
+        colunas = {linha['name'] for linha in self._conexao.execute('PRAGMA table_info(trabalhos)')}
+        if 'disponivel_em' not in colunas:
+            self._conexao.execute('ALTER TABLE trabalhos ADD COLUMN disponivel_em REAL NOT NULL DEFAULT 0')
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    @staticmethod
+    def _para_dict(linha):
+        trabalho = dict(linha)
+        trabalho['item'] = json.loads(trabalho['item'])
+        trabalho['relatorio'] = json.loads(trabalho['relatorio']) if trabalho['relatorio'] else None
+        return trabalho
+
+    def enviar(self, item, prioridade=0):
+        """
+        Queues one job.
+
+        Args:
+            item (dict): Entry in the batch_cli manifest format ('texto' or 'arquivo',
+                'base_name', 'document_id', 'slide_order', optional 'opcoes').
+            prioridade (int): Higher runs first.
+
+        Returns:
+            int: The job ID.
+        """
+        with self._lock:
+            cursor = self._conexao.execute(
+                'INSERT INTO trabalhos (document_id, slide_order, base_name, item, prioridade, estado, criado)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (item['document_id'], item.get('slide_order'), item['base_name'],
+                 json.dumps(item, ensure_ascii=False), int(prioridade), PENDENTE, time.time()),
+            )
+            return cursor.lastrowid
+
+    def reservar(self, trabalhador):
+        """
+        Claims the next job for 'trabalhador' (highest priority, then the document with the
+        fewest running jobs that started a job longest ago, then the oldest job). Jobs
+        waiting for a retry are skipped until their 'disponivel_em'.
+
+        Returns:
+            dict or None: The claimed job, or None if nothing can run now.
+        """
+        with self._lock:
+            self._conexao.execute('BEGIN IMMEDIATE')
+            try:
+                linha = self._conexao.execute(
+                    'SELECT t.* FROM trabalhos t WHERE t.estado = ? AND t.disponivel_em <= ?'
+                    ' AND NOT EXISTS (SELECT 1 FROM trabalhos r WHERE r.estado = ? AND r.base_name = t.base_name)'
+                    ' ORDER BY t.prioridade DESC,'
+                    ' (SELECT COUNT(*) FROM trabalhos r WHERE r.estado = ? AND r.document_id = t.document_id),'
+                    ' COALESCE((SELECT MAX(r.iniciado) FROM trabalhos r WHERE r.document_id = t.document_id), 0),'
+                    ' t.id LIMIT 1',
+                    (PENDENTE, time.time(), EXECUTANDO, EXECUTANDO),
+                ).fetchone()
+                if linha is not None:
+                    self._conexao.execute(
+                        'UPDATE trabalhos SET estado = ?, trabalhador = ?, iniciado = ?, tentativas = tentativas + 1'
+                        ' WHERE id = ?',
+                        (EXECUTANDO, trabalhador, time.time(), linha['id']),
+                    )
+                self._conexao.execute('COMMIT')
+            except Exception:
+                self._conexao.execute('ROLLBACK')
+                raise
+        if linha is None:
+            return None
+        trabalho = self._para_dict(linha)
+        trabalho['tentativas'] += 1
+        return trabalho
+
+    def concluir(self, id_trabalho, relatorio):
+        """
+        Stores the batch report. A failed job goes back to the queue until max_tentativas,
+        claimable again after the exponential backoff.
+        """
+        status = relatorio.get('status')
+        estado = CONCLUIDO if status == 'ok' else PARCIAL if status == 'parcial' else FALHA
+        erro = '; '.join(relatorio.get('erros') or []) or None
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                'UPDATE trabalhos SET estado = CASE WHEN ? = ? AND tentativas < ? THEN ? ELSE ? END,'
+                ' disponivel_em = ? + MIN(?, ? * (1 << MAX(tentativas - 1, 0))),'
+                ' terminado = ?, relatorio = ?, erro = ?, trabalhador = NULL WHERE id = ?',
+                (estado, FALHA, self.max_tentativas, PENDENTE, estado, agora, self.espera_maxima,
+                 self.espera_retentativa, agora, json.dumps(relatorio, ensure_ascii=False), erro, id_trabalho),
+            )
+
+    def liberar(self, trabalhador=None):
+        """Returns to the queue the running jobs of a dead worker (or of every worker)."""
+        with self._lock:
+            if trabalhador is None:
+                cursor = self._conexao.execute(
+                    'UPDATE trabalhos SET estado = ?, trabalhador = NULL WHERE estado = ?', (PENDENTE, EXECUTANDO)
+                )
+            else:
+                cursor = self._conexao.execute(
+                    'UPDATE trabalhos SET estado = ?, trabalhador = NULL WHERE estado = ? AND trabalhador = ?',
+                    (PENDENTE, EXECUTANDO, trabalhador),
+                )
+            return cursor.rowcount
+
+    def cancelar(self, id_trabalho):
+        """Cancels a pending job. Returns False if it does not exist or already started."""
+        with self._lock:
+            cursor = self._conexao.execute(
+                'UPDATE trabalhos SET estado = ?, terminado = ? WHERE id = ? AND estado = ?',
+                (CANCELADO, time.time(), id_trabalho, PENDENTE),
+            )
+            return cursor.rowcount > 0
+
+    def obter(self, id_trabalho):
+        linhas = self._executar('SELECT * FROM trabalhos WHERE id = ?', (id_trabalho,))
+        return self._para_dict(linhas[0]) if linhas else None
+
+    def listar(self, estado=None, document_id=None, limite=100):
+        condicoes, parametros = [], []
+        if estado:
+            condicoes.append('estado = ?')
+            parametros.append(estado)
+        if document_id:
+            condicoes.append('document_id = ?')
+            parametros.append(document_id)
+        where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ''
+        linhas = self._executar(
+            f'SELECT id, document_id, slide_order, base_name, prioridade, estado, tentativas, trabalhador,'
+            f' criado, iniciado, terminado, disponivel_em, erro FROM trabalhos{where} ORDER BY id DESC LIMIT ?',
+            (*parametros, int(limite)),
+        )
+        return [dict(linha) for linha in linhas]
+
+    def resumo(self):
+        """Returns {'estados': {state: count}, 'documentos': {document_id: {state: count}}}."""
+        resumo = {'estados': {}, 'documentos': {}}
+        for linha in self._executar(
+            'SELECT document_id, estado, COUNT(*) AS n FROM trabalhos GROUP BY document_id, estado'
+        ):
+            resumo['estados'][linha['estado']] = resumo['estados'].get(linha['estado'], 0) + linha['n']
+            resumo['documentos'].setdefault(linha['document_id'], {})[linha['estado']] = linha['n']
+        return resumo
+
+
+# Function run by each worker process
+def executar_trabalhador(caminho_fila, nome, parar, intervalo=1.0, cota_tts=None, cota_llm=None, n_trabalhadores=1):
+    """
+    Claims and runs jobs until 'parar' is set; the current job is always finished.
+
+    Args:
+        caminho_fila (str): Path of the queue database.
+        nome (str): Worker name stored with the jobs it claims.
+        parar (multiprocessing.Event): Stop signal from the service.
+        intervalo (float): Seconds between polls while the queue is empty.
+        cota_tts (int or None): ElevenLabs characters per minute of the plan (None: main's value).
+        cota_llm (int or None): Azure OpenAI tokens per minute (None: main's value).
+        n_trabalhadores (int): Number of workers sharing the quotas.
+    """
+    # Ctrl+C reaches the whole process group; the service decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import batch_cli
+    import main
+
+    main.MODO_HEADLESS = True
+    # Each worker process has its own admission controllers, so each one gets an equal part of the quota
+    if cota_tts is None:
+        cota_tts = main.ELEVENLABS_CARACTERES_POR_MINUTO
+    if cota_llm is None:
+        cota_llm = main.AZURE_TOKENS_POR_MINUTO
+    main.controle_tts.configurar(custo_por_minuto=cota_tts / n_trabalhadores)
+    main.controle_llm.configurar(custo_por_minuto=cota_llm / n_trabalhadores)
+    fila = FilaTrabalhos(caminho_fila)
+    padrao = batch_cli.parse_args(['-'])
+    clientes = None
+    try:
+        while not parar.is_set():
+            trabalho = fila.reservar(nome)
+            if trabalho is None:
+                parar.wait(intervalo)
+                continue
+            item = trabalho['item']
+            args = argparse.Namespace(**vars(padrao))
+            for chave, valor in (item.get('opcoes') or {}).items():
+                if chave in OPCOES_TRABALHO:
+                    setattr(args, chave, valor)
+            # The option applies to this job only; the pool is closed when a job turns it off
+            pos_processamento = bool(args.postprocess)
+            if pos_processamento != main.POS_PROCESSAMENTO:
+                main.encerrar_pos_processador()
+                main.POS_PROCESSAMENTO = pos_processamento
+            # Concurrent syntheses of this job: connections kept open and admission cap
+            if main.elevenlabs_client.pool_maxsize != args.tts_workers:
+                main.elevenlabs_client.configurar_pool(args.tts_workers)
+            main.controle_tts.configurar(concorrencia_max=args.tts_workers)
+
+            if not args.no_publish and clientes is None:
+                bucket, db = main.init_firebase(avisar=False)
+                if bucket is not None and db is not None:
+                    clientes = (bucket, db)
+            if not args.no_publish and clientes is None:
+                relatorio = {'status': 'falha', 'erros': ["Não foi possível inicializar o Firebase."]}
+            else:
+                bucket, db = clientes or (None, None)
+                print(f"[{nome}] Trabalho {trabalho['id']}: '{item['base_name']}' (tentativa {trabalho['tentativas']})")
+                try:
+                    relatorio = batch_cli.processar_item(item, bucket, db, args)
+                except Exception as e:
+                    # A job that breaks the worker would be requeued and break the next one too
+                    relatorio = {'status': 'falha', 'erros': [f"Erro inesperado: {e}"]}
+            fila.concluir(trabalho['id'], relatorio)
+            main.exportar_metricas()
+    finally:
+        main.encerrar_pos_processador()
+
+
+class _ManipuladorFila(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args):
+        if self.server.verbose:
+            super().log_message(formato, *args)
+
+    def _responder_json(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(tamanho) or b'{}')
+
+    def _id_trabalho(self, caminho):
+        partes = caminho.strip('/').split('/')
+        if len(partes) == 2 and partes[0] == 'trabalhos' and partes[1].isdigit():
+            return int(partes[1])
+        return None
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        fila = self.server.fila
+        id_trabalho = self._id_trabalho(url.path)
+        if url.path == '/resumo':
+            resumo = fila.resumo()
+            resumo['trabalhadores'] = self.server.trabalhadores_vivos()
+            self._responder_json(200, resumo)
+        elif url.path.rstrip('/') == '/trabalhos':
+            consulta = urllib.parse.parse_qs(url.query)
+            try:
+                limite = int(consulta.get('limite', [100])[0])
+            except ValueError:
+                self._responder_json(400, {'erro': "O parâmetro 'limite' deve ser um número inteiro."})
+                return
+            self._responder_json(200, {'trabalhos': fila.listar(
+                estado=consulta.get('estado', [None])[0],
+                document_id=consulta.get('document_id', [None])[0],
+                limite=limite,
+            )})
+        elif id_trabalho is not None:
+            trabalho = fila.obter(id_trabalho)
+            if trabalho is None:
+                self._responder_json(404, {'erro': f"Trabalho {id_trabalho} não encontrado."})
+            else:
+                self._responder_json(200, trabalho)
+        else:
+            self._responder_json(404, {'erro': 'Caminho desconhecido.'})
+
+    def do_POST(self):
+        if urllib.parse.urlsplit(self.path).path.rstrip('/') != '/trabalhos':
+            self._responder_json(404, {'erro': 'Caminho desconhecido.'})
+            return
+        try:
+            corpo = self._ler_json()
+            itens = corpo['trabalhos'] if isinstance(corpo, dict) and 'trabalhos' in corpo else [corpo]
+            validados = [validar_item(item) for item in itens]
+        except (ValueError, TypeError, KeyError) as e:
+            self._responder_json(400, {'erro': str(e)})
+            return
+        ids = [self.server.fila.enviar(item, prioridade) for item, prioridade in validados]
+        self._responder_json(201, {'ids': ids})
+
+    def do_DELETE(self):
+        id_trabalho = self._id_trabalho(urllib.parse.urlsplit(self.path).path)
+        if id_trabalho is None:
+            self._responder_json(404, {'erro': 'Caminho desconhecido.'})
+        elif self.server.fila.cancelar(id_trabalho):
+            self._responder_json(200, {'id': id_trabalho, 'estado': CANCELADO})
+        else:
+            self._responder_json(409, {'erro': f"O trabalho {id_trabalho} não está pendente."})
+
+
+# Function to check a submitted job and fill in its defaults
+def validar_item(item):
+    """
+    Returns:
+        tuple[dict, int]: The job item and its priority.
+
+    Raises:
+        ValueError: If required fields are missing or invalid.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Cada trabalho deve ser um objeto JSON.")
+    item = dict(item)
+    prioridade = int(item.pop('prioridade', 0))
+    if not item.get('texto') and not item.get('arquivo'):
+        raise ValueError("Informe 'texto' ou 'arquivo'.")
+    if 'arquivo' in item:
+        item['arquivo'] = os.path.abspath(item['arquivo'])
+        if not os.path.exists(item['arquivo']):
+            raise ValueError(f"Arquivo não encontrado: {item['arquivo']}")
+    if not item.get('document_id'):
+        raise ValueError("Informe 'document_id'.")
+    if not item.get('base_name'):
+        if 'arquivo' not in item:
+            raise ValueError("Informe 'base_name'.")
+        item['base_name'] = os.path.splitext(os.path.basename(item['arquivo']))[0]
+    opcoes = item.get('opcoes') or {}
+    desconhecidas = set(opcoes) - set(OPCOES_TRABALHO)
+    if desconhecidas:
+        raise ValueError(f"Opções desconhecidas: {', '.join(sorted(desconhecidas))}")
+    if item.get('slide_order') is None and not opcoes.get('no_publish'):
+        raise ValueError("Informe 'slide_order' (ou use a opção 'no_publish').")
+    item.setdefault('slide_order', None)
+    return item, prioridade
+
+
+class ServidorFila(ThreadingHTTPServer):
+    """HTTP front end of the queue; also supervises the worker processes."""
+
+    daemon_threads = True
+
+    def __init__(self, endereco, caminho_fila, trabalhadores=2, intervalo=1.0, verbose=False,
+                 cota_tts=None, cota_llm=None):
+        super().__init__(endereco, _ManipuladorFila)
+        self.caminho_fila = caminho_fila
+        self.fila = FilaTrabalhos(caminho_fila)
+        self.n_trabalhadores = trabalhadores
+        self.intervalo = intervalo
+        self.cota_tts = cota_tts
+        self.cota_llm = cota_llm
+        self.verbose = verbose
+        # Workers are spawned, not forked: the service already runs the HTTP server threads, and a
+        # fork taken while one of them holds a lock can leave the child deadlocked on it
+        self._contexto = multiprocessing.get_context('spawn')
+        self._parar = self._contexto.Event()
+        self._processos = {}  # name -> Process
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def trabalhadores_vivos(self):
+        return sorted(nome for nome, processo in self._processos.items() if processo.is_alive())
+
+    def _iniciar_trabalhador(self, nome):
+        processo = self._contexto.Process(
+            target=executar_trabalhador, name=nome,
+            args=(self.caminho_fila, nome, self._parar, self.intervalo, self.cota_tts, self.cota_llm, self.n_trabalhadores),
+        )
+        processo.start()
+        self._processos[nome] = processo
+
+    def supervisionar(self):
+        """Starts the workers and restarts any that dies, returning its job to the queue."""
+        # Jobs left running by a previous run of the service start over
+        liberados = self.fila.liberar()
+        if liberados:
+            print(f"{liberados} trabalho(s) interrompido(s) voltaram para a fila.")
+        for i in range(1, self.n_trabalhadores + 1):
+            self._iniciar_trabalhador(f"trabalhador-{i}")
+        while not self._parar.wait(1.0):
+            for nome, processo in list(self._processos.items()):
+                if not processo.is_alive():
+                    print(f"{nome} terminou inesperadamente (código {processo.exitcode}); reiniciando.")
+                    self.fila.liberar(nome)
+                    self._iniciar_trabalhador(nome)
+
+    def encerrar(self):
+        """Stops accepting requests and waits for the workers to finish their current jobs."""
+        self._parar.set()
+        self.shutdown()
+        for processo in self._processos.values():
+            processo.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de fila de trabalhos de geração de áudios.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--db', default='fila.sqlite3', help="Banco SQLite da fila.")
+    parser.add_argument('--workers', type=int, default=2, help="Processos que executam os trabalhos.")
+    parser.add_argument('--intervalo', type=float, default=1.0, help="Espera entre consultas com a fila vazia.")
+    parser.add_argument('--tts-cpm', type=int, default=None,
+                        help="Caracteres por minuto do plano Eleven Labs, divididos entre os processos "
+                             "(padrão: ELEVENLABS_CARACTERES_POR_MINUTO).")
+    parser.add_argument('--llm-tpm', type=int, default=None,
+                        help="Tokens por minuto do deployment Azure OpenAI, divididos entre os processos "
+                             "(padrão: AZURE_TOKENS_POR_MINUTO).")
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    servidor = ServidorFila(
+        (args.host, args.port), args.db, args.workers, args.intervalo, args.verbose, args.tts_cpm, args.llm_tpm
+    )
+    threading.Thread(target=servidor.serve_forever, name='fila-http', daemon=True).start()
+    print(f"Fila de trabalhos em {servidor.url} com {args.workers} processo(s).")
+    try:
+        servidor.supervisionar()
+    except KeyboardInterrupt:
+        print("Encerrando; os trabalhos em andamento serão concluídos.")
+    finally:
+        servidor.encerrar()
@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Per-phrase states recorded as the pipeline moves forward
+AUDIO_PENDENTE, AUDIO_GERADO, AUDIO_FALHA = 'pendente', 'gerado', 'falha'
+UPLOAD_PENDENTE, UPLOAD_ENVIADO = 'pendente', 'enviado'
+
+
+class Jornal:
+    """
+    Crash-safe journal of the work done for each base name (session).
+
+    For every phrase it records the text, the synthesis key (hash of the text, voice
+    and settings), the audio path, the upload state with the uploaded blob generation,
+    and where the entry was published in Firestore. Each change is committed
+    immediately, so a session interrupted by a crash or a closed window resumes
+    without synthesizing, uploading or publishing the same phrase twice. Changing a
+    phrase's text or voice changes its key, which resets the phrase. The MD5 of the
+    uploaded audio is kept too, so a local file that changed afterwards is sent again.
+    The session stores the voice it was synthesized with, so a resumed session computes
+    the same keys whatever voice is selected when it is reopened, and the position of each
+    phrase in the list, so it comes back in the user's order without deleted phrases.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.row_factory = sqlite3.Row
+        # WAL keeps readers and the writer apart; NORMAL still survives an application crash
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.executescript(
+            'CREATE TABLE IF NOT EXISTS sessoes ('
+            '  base_name TEXT PRIMARY KEY, criada REAL NOT NULL, atualizada REAL NOT NULL, voice_id TEXT);'
+            'CREATE TABLE IF NOT EXISTS frases ('
+            '  base_name TEXT NOT NULL, idx INTEGER NOT NULL, frase TEXT NOT NULL, chave TEXT NOT NULL,'
+            '  audio_path TEXT, audio_estado TEXT NOT NULL, upload_estado TEXT NOT NULL,'
+            '  geracao INTEGER, publicado_em TEXT, atualizada REAL NOT NULL, audio_md5 TEXT,'
+            '  posicao INTEGER, apagada INTEGER NOT NULL DEFAULT 0,'
+            '  PRIMARY KEY (base_name, idx));'
+        )
+        # Journals created before the upload digest was recorded
+        colunas = {linha['name'] for linha in self._conexao.execute('PRAGMA table_info(frases)')}
+        if 'audio_md5' not in colunas:
+            self._conexao.execute('ALTER TABLE frases ADD COLUMN audio_md5 TEXT')
+        if 'posicao' not in colunas:
+            self._conexao.execute('ALTER TABLE frases ADD COLUMN posicao INTEGER')
+            self._conexao.execute('ALTER TABLE frases ADD COLUMN apagada INTEGER NOT NULL DEFAULT 0')
+        # ... and before the session voice was
+        colunas = {linha['name'] for linha in self._conexao.execute('PRAGMA table_info(sessoes)')}
+        if 'voice_id' not in colunas:
+            self._conexao.execute('ALTER TABLE sessoes ADD COLUMN voice_id TEXT')
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def abrir_sessao(self, base_name, frases, chaves, voice_id=None):
+        """
+        Starts or updates the session with the current phrases. Phrases whose key did
+        not change keep their progress; the others (and removed trailing phrases) are reset.
+        The list order becomes the file number order.
+
+        Args:
+            base_name (str): Base name of the files.
+            frases (list[str]): Phrases in order (numbered from 1).
+            chaves (list[str]): Synthesis key of each phrase.
+            voice_id (str or None): Voice the phrases are synthesized with.
+        """
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute('BEGIN IMMEDIATE')
+            try:
+                self._conexao.execute(
+                    'INSERT INTO sessoes (base_name, criada, atualizada, voice_id) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(base_name) DO UPDATE SET atualizada = excluded.atualizada, voice_id = excluded.voice_id',
+                    (base_name, agora, agora, voice_id),
+                )
+                atuais = {
+                    linha['idx']: linha['chave'] for linha in self._conexao.execute(
+                        'SELECT idx, chave FROM frases WHERE base_name = ?', (base_name,)
+                    )
+                }
+                for idx, (frase, chave) in enumerate(zip(frases, chaves), 1):
+                    if atuais.get(idx) != chave:
+                        self._conexao.execute(
+                            'INSERT OR REPLACE INTO frases (base_name, idx, frase, chave, audio_path, audio_estado,'
+                            ' upload_estado, geracao, publicado_em, atualizada)'
+                            ' VALUES (?, ?, ?, ?, NULL, ?, ?, NULL, NULL, ?)',
+                            (base_name, idx, frase, chave, AUDIO_PENDENTE, UPLOAD_PENDENTE, agora),
+                        )
+                self._conexao.execute('DELETE FROM frases WHERE base_name = ? AND idx > ?', (base_name, len(frases)))
+                self._conexao.execute('UPDATE frases SET posicao = idx, apagada = 0 WHERE base_name = ?', (base_name,))
+                self._conexao.execute('COMMIT')
+            except Exception:
+                self._conexao.execute('ROLLBACK')
+                raise
+
+    def frases(self, base_name):
+        """
+        Returns:
+            list[tuple[int, str]]: File number and text of the phrases of the session in the
+            order of the list (deleted phrases left out), or an empty list if there is no session.
+        """
+        return [(linha['idx'], linha['frase']) for linha in self._executar(
+            'SELECT idx, frase FROM frases WHERE base_name = ? AND apagada = 0'
+            ' ORDER BY COALESCE(posicao, idx), idx', (base_name,)
+        )]
+
+    def salvar_ordem(self, base_name, numeros):
+        """
+        Records the order of the list after moves and deletions.
+
+        Args:
+            base_name (str): Base name of the files.
+            numeros (list[int]): File numbers of the phrases in the order shown; phrases of
+                the session that are not listed were deleted.
+        """
+        with self._lock:
+            self._conexao.execute('BEGIN IMMEDIATE')
+            try:
+                self._conexao.execute('UPDATE frases SET apagada = 1 WHERE base_name = ?', (base_name,))
+                self._conexao.executemany(
+                    'UPDATE frases SET posicao = ?, apagada = 0 WHERE base_name = ? AND idx = ?',
+                    [(posicao, base_name, idx) for posicao, idx in enumerate(numeros, 1)],
+                )
+                self._conexao.execute('COMMIT')
+            except Exception:
+                self._conexao.execute('ROLLBACK')
+                raise
+
+    def voz(self, base_name):
+        """Voice the session was last synthesized with, or None if unknown."""
+        linhas = self._executar('SELECT voice_id FROM sessoes WHERE base_name = ?', (base_name,))
+        return linhas[0]['voice_id'] if linhas else None
+
+    def sessao_pendente(self, base_name):
+        """True if the session exists and some phrase still in the list is not yet published."""
+        linhas = self._executar(
+            'SELECT COUNT(*) AS total, SUM(publicado_em IS NULL) AS pendentes FROM frases'
+            ' WHERE base_name = ? AND apagada = 0',
+            (base_name,),
+        )
+        return bool(linhas[0]['total']) and bool(linhas[0]['pendentes'])
+
+    def marcar_audio(self, base_name, idx, chave, audio_path, frase):
+        """
+        Records the synthesis result (audio_path None on failure); a new audio must be
+        uploaded and published again. The phrase takes the given key and text, so a
+        re-generation after an edit or a voice change replaces the recorded progress,
+        and a phrase added after the session was opened gets its row.
+        """
+        self._executar(
+            'INSERT INTO frases (base_name, idx, frase, chave, audio_path, audio_estado, upload_estado,'
+            ' geracao, audio_md5, publicado_em, atualizada) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, ?)'
+            ' ON CONFLICT(base_name, idx) DO UPDATE SET frase = excluded.frase, chave = excluded.chave,'
+            ' audio_path = excluded.audio_path, audio_estado = excluded.audio_estado,'
+            ' upload_estado = excluded.upload_estado, geracao = NULL, audio_md5 = NULL, publicado_em = NULL,'
+            ' apagada = 0, atualizada = excluded.atualizada',
+            (base_name, idx, frase, chave, audio_path, AUDIO_GERADO if audio_path else AUDIO_FALHA,
+             UPLOAD_PENDENTE, time.time()),
+        )
+
+    def audios_prontos(self, base_name, chaves):
+        """
+        Args:
+            base_name (str): Base name of the files.
+            chaves (dict[int, str]): Phrase number -> current synthesis key.
+
+        Returns:
+            dict[int, str]: Phrase number -> audio path, for phrases already synthesized with
+            the given key whose audio and subtitle files are still on disk.
+        """
+        prontos = {}
+        for linha in self._executar(
+            'SELECT idx, chave, audio_path FROM frases WHERE base_name = ? AND audio_estado = ?',
+            (base_name, AUDIO_GERADO),
+        ):
+            idx, caminho = linha['idx'], linha['audio_path']
+            if linha['chave'] == chaves.get(idx) and caminho \
+                    and os.path.exists(caminho) and os.path.exists(f"{os.path.splitext(caminho)[0]}.txt"):
+                prontos[idx] = caminho
+        return prontos
+
+    def marcar_enviado(self, base_name, idx, geracao, audio_md5):
+        """
+        Records that the current audio of the phrase is in Storage as blob generation
+        'geracao'; 'audio_md5' is the digest of the local file that was uploaded.
+        """
+        self._executar(
+            'UPDATE frases SET upload_estado = ?, geracao = ?, audio_md5 = ?, atualizada = ?'
+            ' WHERE base_name = ? AND idx = ?',
+            (UPLOAD_ENVIADO, geracao, audio_md5, time.time(), base_name, idx),
+        )
+
+    def envios(self, base_name):
+        """
+        Returns:
+            dict[int, dict]: Phrase number -> {'geracao', 'audio_md5', 'publicado_em'} for
+            phrases whose current audio was already uploaded.
+        """
+        return {
+            linha['idx']: {'geracao': linha['geracao'], 'audio_md5': linha['audio_md5'], 'publicado_em': linha['publicado_em']}
+            for linha in self._executar(
+                'SELECT idx, geracao, audio_md5, publicado_em FROM frases'
+                ' WHERE base_name = ? AND upload_estado = ?',
+                (base_name, UPLOAD_ENVIADO),
+            )
+        }
+
+    def marcar_publicadas(self, base_name, indices, document_id, slide_order):
+        """Records that the uploaded phrases in 'indices' were added to the slide in Firestore."""
+        destino = self.destino(document_id, slide_order)
+        agora = time.time()
+        with self._lock:
+            self._conexao.executemany(
+                'UPDATE frases SET publicado_em = ?, atualizada = ? WHERE base_name = ? AND idx = ? AND upload_estado = ?',
+                [(destino, agora, base_name, idx, UPLOAD_ENVIADO) for idx in indices],
+            )
+
+    def apagar_sessao(self, base_name):
+        with self._lock:
+            self._conexao.execute('DELETE FROM frases WHERE base_name = ?', (base_name,))
+            self._conexao.execute('DELETE FROM sessoes WHERE base_name = ?', (base_name,))
+
+    @staticmethod
+    def destino(document_id, slide_order):
+        """Value of 'publicado_em' for a slide, to compare with envios()."""
+        return f"{document_id}/{slide_order}"
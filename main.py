@@ -3,70 +3,316 @@ import requests
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from tkinter import ttk
-from ttkthemes import ThemedTk  # type: ignore
-from PIL import Image, ImageTk  # For handling icons (optional)
 import re
 import threading  # To prevent UI blocking during uploads
-import firebase_admin
-from firebase_admin import credentials, storage
-from firebase_admin import firestore
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait  # Parallel audio synthesis
 import uuid  # For generating UUIDs
 from datetime import timedelta
 import urllib.parse  # For encoding URLs
-from playsound import playsound  # To play audio
-import pygame
+import io
+import hashlib
+import json
+from tts_cache import TTSCache
+from atomic_write import escrita_atomica
+from http_client import ClienteHTTP
+import mp3_index
+import audio_postprocess
+import delta_sync
+from audio_player import PlayerAudio
+from signed_urls import CacheURLsAssinadas
+from voice_catalog import CatalogoVozes
+from ui_bus import BarramentoUI
+from phrase_model import ListaFrases, STATUS_FALHA, STATUS_SUCESSO
+from phrase_view import VistaFrases
+from metrics import Metricas, EstimativaETA
+from admission_control import ControleAdmissao
+from journal import Jornal
+from sentence_splitter import dividir_em_blocos, dividir_em_frases_locais, juntar_frases_curtas
 
 # Azure OpenAI API configuration
 api_key = "x"  # Utilize variáveis de ambiente
-endpoint = "x"  # Atualize com o seu endpoint Azure OpenAI
+endpoint = os.environ.get("TTV_AZURE_ENDPOINT", "x")  # Atualize com o seu endpoint Azure OpenAI
 api_version = "2023-05-15"
 deployment_name = "gpt-4o-mini"  # Seu nome de deployment
 
+# How the text is split into phrases: "llm" (Azure OpenAI) or "local" (rules, no network)
+MODO_DIVISAO = "llm"
+DIVISAO_FALLBACK_LOCAL = True  # Fall back to the local split when the API fails
+LEGENDA_MAX_CHARS = 120  # Maximum subtitle length in the local split
+LLM_BLOCO_MAX_CHARS = 4000  # Long texts are sent to the LLM in blocks of this size
+LLM_MAX_WORKERS = 4  # Blocks split concurrently
+LLM_CACHE_DIR = 'llm_cache'  # LLM answers memoized by block hash
+
 # Configurações do Eleven Labs API
+ELEVENLABS_BASE_URL = os.environ.get("TTV_ELEVENLABS_URL", "https://api.elevenlabs.io")
 elevenlabs_api_key = "x"  # Utilize variáveis de ambiente
 elevenlabs_voice_id = "x"  # Substitua pelo ID da voz correta
+elevenlabs_model_id = "eleven_multilingual_v2"
+elevenlabs_voice_settings = {
+    "stability": 1,
+    "similarity_boost": 0.6,
+}
+TTS_MAX_WORKERS = 4  # Maximum number of simultaneous Eleven Labs syntheses
+ELEVENLABS_STREAMING = True  # Use the /stream endpoint and write the audio to disk as it arrives
+STREAM_CHUNK_SIZE = 16 * 1024  # Size of the chunks written during the download
+
+# Shared HTTP clients: keep-alive connections per host, auth and timeout configured once
+azure_client = ClienteHTTP(endpoint, headers={"api-key": api_key}, timeout=60, pool_maxsize=LLM_MAX_WORKERS)
+elevenlabs_client = ClienteHTTP(
+    ELEVENLABS_BASE_URL,
+    headers={"xi-api-key": elevenlabs_api_key},
+    timeout=60,
+    pool_maxsize=TTS_MAX_WORKERS,  # One connection per synthesis worker
+)
+
+# Voice catalog saved to disk; revalidated with an ETag once older than the TTL
+VOICE_CATALOG_PATH = 'vozes.json'
+VOICE_CATALOG_TTL = 24 * 3600  # Seconds the list is used without asking the API
+catalogo_vozes = CatalogoVozes(VOICE_CATALOG_PATH, elevenlabs_client, ttl=VOICE_CATALOG_TTL)
+
+# Local cache of already synthesized audio
+TTS_CACHE_DIR = 'tts_cache'
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+_tts_cache = None  # Created on first use (see obter_tts_cache)
+_tts_cache_lock = threading.Lock()
+
+# Audio post-processing (requires NumPy, pydub and ffmpeg): trims silence, normalizes the volume
+# and re-encodes to the profile below, in separate processes
+POS_PROCESSAMENTO = False
+POS_PROCESSAMENTO_WORKERS = None  # None = one process per core
+POS_PROCESSAMENTO_PERFIL = {'bitrate': '64k', 'sample_rate': 22050, 'canais': 1}  # See audio_postprocess.PERFIL_PADRAO
+_pos_processador = None
+_pos_processador_lock = threading.Lock()
+
+# Journal of each session's progress, so interrupted work resumes where it stopped
+JOURNAL_PATH = 'jornal.sqlite3'
+_jornal = None  # Opened on first use (see obter_jornal), so importing main creates no files
+_jornal_lock = threading.Lock()
+
+# Per-stage timings, bytes transferred and retries, exported after each run
+metricas = Metricas()
+METRICAS_JSON_PATH = 'metricas.json'
+METRICAS_PROM_PATH = 'metricas.prom'  # Prometheus text format
+
+# Admission control: each request waits its turn according to the plan's per-minute quota,
+# and the concurrency adapts (down on 429 or slowness, back up on successes)
+ELEVENLABS_CARACTERES_POR_MINUTO = 50_000  # 0 = no character limit
+AZURE_TOKENS_POR_MINUTO = 30_000  # Deployment TPM; 0 = no token limit
+ADMISSAO_MAX_TENTATIVAS = 6  # Attempts for a request refused with 429 before giving up
+controle_tts = ControleAdmissao(
+    'tts', ELEVENLABS_CARACTERES_POR_MINUTO, concorrencia_max=TTS_MAX_WORKERS,
+    max_tentativas=ADMISSAO_MAX_TENTATIVAS, metricas=metricas,
+)
+controle_llm = ControleAdmissao(
+    'llm', AZURE_TOKENS_POR_MINUTO, concorrencia_max=LLM_MAX_WORKERS,
+    max_tentativas=ADMISSAO_MAX_TENTATIVAS, metricas=metricas,
+)
+
+# "firebase" (production) or "local" (Storage in a folder and Firestore in SQLite, see backends.py)
+BACKEND = os.environ.get("TTV_BACKEND", "firebase")
+LOCAL_BACKEND_DIR = os.environ.get("TTV_LOCAL_DIR", "backend_local")
 
 # Firebase Storage configuration
 SERVICE_ACCOUNT_KEY_PATH = 'serviceAccountKey.json'  # Path to your service account key file
 FIREBASE_STORAGE_BUCKET = 'iapresentador.appspot.com'  # Replace with your bucket
+UPLOAD_MAX_WORKERS = 8  # Number of simultaneous uploads to Firebase Storage
+UPLOAD_DELTA = True  # Only send files whose size/MD5 differ from the copy already in Storage
+NOMES_BASE_TTL = 60  # Seconds the index of existing base names is reused before listing again
+SIGNED_URL_EXPIRACAO = timedelta(days=7)  # Validity of the signed URLs stored in Firestore
+SIGNED_URL_MARGEM = timedelta(days=1)  # Cached URLs closer than this to expiry are signed again
+SIGNED_URL_CACHE_PATH = 'signed_urls.json'
+signed_url_cache = CacheURLsAssinadas(SIGNED_URL_CACHE_PATH, margem=SIGNED_URL_MARGEM)
+FIRESTORE_MAX_TENTATIVAS = 5  # Attempts for a Firestore transaction before giving up on conflicts
+DOCUMENT_ID = "0QhyptyCMN88m8jRsGl4"  # Default document in the 'presentations' collection
+# "frases": one file and one Firestore entry per phrase; "slide": a single stitched file per slide
+MODO_PUBLICACAO = "frases"
+
+# When True (batch mode), errors are only printed instead of shown in dialog boxes
+MODO_HEADLESS = False
+
+# UI update bus of the open phrases window; worker threads post to it instead of touching Tk
+_barramento_ui = None
+
+# Persistent audio player shared by all windows (created on first use)
+_player_audio = None
+
+def obter_player_audio():
+    global _player_audio
+    if _player_audio is None:
+        _player_audio = PlayerAudio()
+    return _player_audio
+
+# Function to report an error to the user
+def mostrar_erro(mensagem, parent=None):
+    print(mensagem)
+    if MODO_HEADLESS:
+        return
+    barramento = _barramento_ui
+    if barramento is not None and barramento.ativo and not barramento.na_thread_principal():
+        barramento.mensagem('erro', "Erro", mensagem, parent=parent)
+    else:
+        messagebox.showerror("Erro", mensagem, parent=parent)
+
+# Function to write the collected metrics to disk
+def exportar_metricas():
+    metricas.exportar(METRICAS_JSON_PATH)
+    metricas.exportar(METRICAS_PROM_PATH)
+
+# Function to run a background task and export the metrics when it ends
+def executar_com_metricas(funcao):
+    try:
+        funcao()
+    finally:
+        exportar_metricas()
+
+# Storage bucket and Firestore client, created once (possibly by the warm-up thread)
+_clientes_firebase = None
+_clientes_firebase_lock = threading.Lock()
 
 # Initialize Firebase Admin SDK
-def init_firebase():
-    if not firebase_admin._apps:
+def init_firebase(avisar=True):
+    global _clientes_firebase
+    with _clientes_firebase_lock:
+        if _clientes_firebase is not None:
+            return _clientes_firebase
+        if BACKEND == "local":
+            import backends
+            _clientes_firebase = backends.criar_backends_locais(LOCAL_BACKEND_DIR)
+            return _clientes_firebase
+
+        # The Firebase SDK takes a while to import, so it is only loaded when first needed
+        import firebase_admin
+        from firebase_admin import credentials, firestore, storage
+        if not firebase_admin._apps:
+            try:
+                cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
+                firebase_admin.initialize_app(cred, {
+                    'storageBucket': FIREBASE_STORAGE_BUCKET
+                })
+            except Exception as e:
+                if avisar:
+                    mostrar_erro(f"Erro ao inicializar o Firebase: {e}")
+                else:
+                    print(f"Erro ao inicializar o Firebase: {e}")
+                return None, None
+        if signed_url_cache.credenciais is None:
+            # Sign every URL with the already loaded service-account credentials
+            signed_url_cache.credenciais = firebase_admin.get_app().credential.get_credential()
+        _clientes_firebase = (storage.bucket(), firestore.client())
+        return _clientes_firebase
+
+# Function to read the slide orders of a presentation document
+def ler_ordens_dos_slides(db, document_id):
+    """
+    Returns:
+        list[int]: Sorted orders of the document's slides.
+
+    Raises:
+        LookupError: If the document does not exist.
+    """
+    doc = db.collection('presentations').document(document_id).get()
+    if not doc.exists:
+        raise LookupError(f"Documento com ID {document_id} não existe.")
+    slides = doc.to_dict().get('slides', [])
+    return sorted([slide.get('order') for slide in slides if 'order' in slide])
+
+# Background warm-up: document ID -> Future of its slide orders
+_aquecimentos = {}
+_aquecimentos_lock = threading.Lock()
+
+# Function to start Firebase and read the presentation while the user is still typing
+def aquecer_firebase(document_id=DOCUMENT_ID):
+    """
+    Initializes the Firebase clients, fills the base-name index and reads the slide
+    orders of 'document_id' on a daemon thread. obter_ordens_dos_slides consumes the
+    result (waiting for it if it is still running); errors are reported there.
+    """
+    with _aquecimentos_lock:
+        if document_id in _aquecimentos:
+            return
+        futuro = _aquecimentos[document_id] = Future()
+
+    def aquecer():
         try:
-            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
-            firebase_admin.initialize_app(cred, {
-                'storageBucket': FIREBASE_STORAGE_BUCKET
-            })
+            bucket, db = init_firebase(avisar=False)
+            if bucket is None or db is None:
+                raise RuntimeError("Firebase não inicializado.")
+            listar_nomes_base(bucket)
+            futuro.set_result(ler_ordens_dos_slides(db, document_id))
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao inicializar o Firebase: {e}")
-            return None, None
-    bucket = storage.bucket()
-    db = firestore.client()
-    return bucket, db
-
-# Function to list available voices
-def obter_vozes_disponiveis():
-    url = "https://api.elevenlabs.io/v1/voices"
-    headers = {
-        "Accept": "application/json",
-        "xi-api-key": elevenlabs_api_key,
-    }
+            futuro.set_exception(e)
+
+    threading.Thread(target=aquecer, name='aquecimento-firebase', daemon=True).start()
+
+# Function to get the slide orders, using the warm-up result when there is one
+def obter_ordens_dos_slides(db, document_id):
+    with _aquecimentos_lock:
+        # Each warm-up is used once, so a later window reads the document again
+        futuro = _aquecimentos.pop(document_id, None)
+    if futuro is not None:
+        try:
+            return futuro.result()
+        except Exception as e:
+            print(f"Aquecimento do Firebase falhou, lendo novamente: {e}")
+    return ler_ordens_dos_slides(db, document_id)
+
+# Function to list available voices (served from the catalog cache)
+def obter_vozes_disponiveis(forcar=False, imprimir=False):
+    """
+    Returns:
+        list[dict]: Available voices, or an empty list if the catalog could not be loaded.
+    """
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        vozes = catalogo_vozes.vozes(forcar=forcar)
     except requests.exceptions.RequestException as e:
-        print(f"Erro ao obter vozes: {e}")
-        messagebox.showerror("Erro", f"Erro ao obter vozes: {e}")
-        return
+        mostrar_erro(f"Erro ao obter vozes: {e}")
+        return []
 
-    voices = response.json()
-    for voice in voices['voices']:
-        language = voice.get('language', 'Unknown')
-        print(f"Name: {voice['name']}, ID: {voice['voice_id']}, Language: {language}")
+    if imprimir:
+        for voice in vozes:
+            language = voice.get('language', 'Unknown')
+            print(f"Name: {voice['name']}, ID: {voice['voice_id']}, Language: {language}")
+    return vozes
 
-# Function to split text into coherent sentences
-def dividir_em_frases_coerentes(texto, min_words=8):
+# Function to check a voice ID against the catalog
+def validar_voz(voice_id):
+    """
+    Returns:
+        bool or None: Whether the voice exists, or None when the catalog is unavailable.
+    """
+    try:
+        return catalogo_vozes.validar(voice_id)
+    except requests.exceptions.RequestException as e:
+        print(f"Não foi possível validar a voz '{voice_id}': {e}")
+        return None
+
+# Function to load the voice catalog in the background while the user types
+def aquecer_catalogo_vozes():
+    def aquecer():
+        try:
+            catalogo_vozes.vozes()
+        except Exception as e:
+            print(f"Erro ao carregar o catálogo de vozes: {e}")
+
+    threading.Thread(target=aquecer, name='aquecimento-vozes', daemon=True).start()
+
+# Function to split one block of text with the Azure OpenAI API
+def dividir_bloco_com_llm(bloco, min_words):
+    """
+    Asks the LLM to split one block into subtitle lines. Results are memoized on disk
+    by a hash of the whole request, so unchanged blocks are never sent twice.
+
+    Args:
+        bloco (str): Block of text (see dividir_em_blocos).
+        min_words (int): Minimum number of words requested per phrase.
+
+    Returns:
+        list[str]: Non-empty phrases, before the minimum word count adjustment.
+
+    Raises:
+        requests.exceptions.RequestException, ValueError, KeyError, IndexError: If the API call fails.
+    """
     system_prompt = (
         "Você é um assistente que divide textos em falas coerentes que serão legendadas. "
         "Garanta que cada fala esteja em uma linha separada, com sentido completo e natural, evitando falas com muitas palavras para facilitar a leitura da legenda com base no contexto da nossa apresentação."
@@ -76,15 +322,10 @@ def dividir_em_frases_coerentes(texto, min_words=8):
     prompt = (
         f"Divida o seguinte texto em falas, cada uma representando uma ideia completa. "
         f"As falas devem estar em uma linha separada cada, conter no mínimo {min_words} palavras, "
-        f"e o texto deve copiar exatamente o que eu mandar: {texto}"
+        f"e o texto deve copiar exatamente o que eu mandar: {bloco}"
     )
 
-    url = f"{endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version={api_version}"
-
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": api_key,
-    }
+    path = f"/openai/deployments/{deployment_name}/chat/completions"
 
     data = {
         "messages": [
@@ -94,50 +335,73 @@ def dividir_em_frases_coerentes(texto, min_words=8):
         "temperature": 0.5,
     }
 
+    # Look up the memoized answer for this exact request
+    chave = hashlib.sha256(json.dumps([deployment_name, data], sort_keys=True).encode('utf-8')).hexdigest()
+    memo_path = os.path.join(LLM_CACHE_DIR, f"{chave}.json")
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+        with open(memo_path, "r", encoding="utf-8") as f:
+            frases = json.load(f)
+        metricas.contar('llm_memo_hits')
+        return frases
+    except (OSError, ValueError):
+        pass
+
+    # Rough token estimate (about 4 characters each): the prompt plus the block copied back
+    tokens_estimados = (len(system_prompt) + len(prompt) + len(bloco)) // 4
+    with metricas.medir('llm_requisicao'):
+        response = controle_llm.executar(
+            tokens_estimados,
+            lambda: azure_client.post(path, params={"api-version": api_version}, json=data),
+        )
         response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao acessar a API OpenAI: {e}")
-        messagebox.showerror("Erro", f"Erro ao acessar a API OpenAI: {e}")
-        return []
-
+    metricas.contar('llm_bytes_recebidos', len(response.content))
     response_data = response.json()
+    controle_llm.ajustar_custo(tokens_estimados, response_data.get('usage', {}).get('total_tokens'))
     content = response_data['choices'][0]['message']['content']
 
-    # Split sentences based on line breaks
-    frases = content.strip().split('\n')
+    # Split sentences based on line breaks, keeping only non-empty phrases without extra spaces
+    frases = [frase.strip() for frase in content.strip().split('\n') if frase.strip()]
 
-    # Return only non-empty phrases without extra spaces
-    frases = [frase.strip() for frase in frases if frase.strip()]
+    try:
+        os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+        with escrita_atomica(memo_path) as f:
+            json.dump(frases, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Erro ao gravar o cache do LLM: {e}")
+    return frases
 
-    # Validate and adjust phrases that don't meet the minimum word count
-    frases_validadas = []
-    for frase in frases:
-        word_count = len(frase.split())
-        if word_count >= min_words:
-            frases_validadas.append(frase)
-        else:
-            # Append to the last phrase if possible
-            if frases_validadas:
-                frases_validadas[-1] += ' ' + frase
-            else:
-                frases_validadas.append(frase)
-
-    # Ensure again the minimum word count after adjustments
-    frases_final = []
-    for frase in frases_validadas:
-        word_count = len(frase.split())
-        if word_count >= min_words:
-            frases_final.append(frase)
-        else:
-            # If there are still shorter phrases, append to the previous or keep them
-            if frases_final:
-                frases_final[-1] += ' ' + frase
+# Function to split text into coherent sentences
+@metricas.cronometrar('divisao')
+def dividir_em_frases_coerentes(texto, min_words=8, modo=None):
+    modo = modo or MODO_DIVISAO
+    if modo == "local":
+        return dividir_em_frases_locais(texto, min_words=min_words, max_chars=LEGENDA_MAX_CHARS)
+
+    # Long texts are cut at paragraph boundaries and the blocks are split concurrently
+    blocos = dividir_em_blocos(texto, LLM_BLOCO_MAX_CHARS)
+    controle_llm.reabrir()  # Try the API again even if its quota ran out in an earlier run
+
+    def dividir_bloco(bloco):
+        try:
+            return dividir_bloco_com_llm(bloco, min_words), None
+        except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+            return None, e
+
+    frases = []
+    with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as executor:
+        # map() keeps the blocks in their original order
+        for bloco, (frases_bloco, erro) in zip(blocos, executor.map(dividir_bloco, blocos)):
+            if erro is None:
+                frases.extend(frases_bloco)
+            elif DIVISAO_FALLBACK_LOCAL:
+                print(f"Erro ao acessar a API OpenAI: {erro}. Usando a divisão local para este trecho.")
+                frases.extend(dividir_em_frases_locais(bloco, min_words=min_words, max_chars=LEGENDA_MAX_CHARS))
             else:
-                frases_final.append(frase)
+                mostrar_erro(f"Erro ao acessar a API OpenAI: {erro}")
+                return []
 
-    return frases_final
+    # Merge phrases that don't meet the minimum word count into their neighbours
+    return juntar_frases_curtas(frases, min_words)
 
 # Custom Dialog to Edit Phrases with a Larger Text Box
 class EditarFraseDialog(tk.Toplevel):
@@ -178,9 +442,11 @@ class EditarFraseDialog(tk.Toplevel):
         self.destroy()
 
 # Function to generate Signed URL
-def gerar_signed_url(blob, expiration=timedelta(hours=1)):
+def gerar_signed_url(blob, expiration=SIGNED_URL_EXPIRACAO):
     """
-    Generates a signed URL for a blob in Firebase Storage.
+    Generates a signed URL for a blob in Firebase Storage, reusing a cached one for the
+    same blob generation while it is still far from expiring. The cache is not written
+    here; the caller saves it once at the end of its batch (signed_url_cache.salvar()).
 
     Args:
         blob (google.cloud.storage.blob.Blob): The blob to generate the URL for.
@@ -190,38 +456,100 @@ def gerar_signed_url(blob, expiration=timedelta(hours=1)):
         str: A signed URL.
     """
     try:
-        url = blob.generate_signed_url(expiration=expiration)
-        return url
+        return signed_url_cache.obter(blob, expiration)
     except Exception as e:
         print(f"Erro ao gerar signed URL: {e}")
         return None
 
-# Function to generate audio and subtitle using Eleven Labs API
-def gerar_audio_e_legenda(frase, folder_path, base_name, idx):
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{elevenlabs_voice_id}"
-    headers = {
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-        "xi-api-key": elevenlabs_api_key,
-    }
-    data = {
-        "text": frase,
-        "voice_settings": {
-            "stability": 1,
-            "similarity_boost": 0.6,
-        },
-        "model_id": "eleven_multilingual_v2",
-    }
+# Function to write an HTTP response body to disk as it arrives
+def salvar_resposta_em_disco(response, destino, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams the response body into '<destino>.part' and renames it to 'destino' once complete,
+    so a reader never sees a truncated final file.
+
+    Args:
+        response (requests.Response): Response opened with stream=True (or already buffered).
+        destino (str): Final path of the file.
+        chunk_size (int): Size of each chunk read from the connection.
+    """
+    parcial = f"{destino}.part"
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=60)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao gerar áudio: {e}")
-        if response is not None:
-            print(f"Conteúdo da resposta: {response.text}")
-        messagebox.showerror("Erro", f"Erro ao gerar áudio: {e}")
+        with open(parcial, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    f.flush()  # Make the received audio visible to "Ouvir Áudio" right away
+        os.replace(parcial, destino)
+    except Exception:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+
+# Function to get the local cache of synthesized audios, created on first use
+def obter_tts_cache():
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+        return _tts_cache
+
+# Function to get the session journal, opened on first use
+def obter_jornal():
+    global _jornal
+    with _jornal_lock:
+        if _jornal is None:
+            _jornal = Jornal(JOURNAL_PATH)
+        return _jornal
+
+# Function to get the shared post-processing pool, or None when the stage is off or unavailable
+def obter_pos_processador():
+    global _pos_processador, POS_PROCESSAMENTO
+    if not POS_PROCESSAMENTO:
         return None
+    with _pos_processador_lock:
+        if _pos_processador is None:
+            if not audio_postprocess.disponivel():
+                print("Pós-processamento desativado: NumPy, pydub ou ffmpeg não estão instalados.")
+                POS_PROCESSAMENTO = False
+                return None
+            _pos_processador = audio_postprocess.PosProcessador(POS_PROCESSAMENTO_WORKERS, POS_PROCESSAMENTO_PERFIL)
+        return _pos_processador
+
+# Function to stop the post-processing pool, waiting for the clips in progress
+def encerrar_pos_processador():
+    global _pos_processador
+    with _pos_processador_lock:
+        pos_processador, _pos_processador = _pos_processador, None
+    if pos_processador is not None:
+        pos_processador.encerrar()
+
+# Function to record the result of a post-processed clip; the original clip is kept on failure
+def registrar_pos_processamento(futuro, audio_filepath):
+    try:
+        resultado = futuro.result()
+    except Exception as e:
+        metricas.contar('pos_processamento_erros')
+        print(f"Erro ao pós-processar '{audio_filepath}': {e}")
+        return
+    metricas.observar('pos_processamento', resultado['segundos'])
+    metricas.contar('pos_bytes_economizados', resultado['bytes_antes'] - resultado['bytes_depois'])
+    metricas.contar('pos_ms_cortados', resultado['ms_antes'] - resultado['ms_depois'])
+
+# Function to post-process one clip and wait for it (used outside the batch synthesis)
+def pos_processar_audio(audio_filepath):
+    pos_processador = obter_pos_processador()
+    if pos_processador is not None and audio_filepath:
+        registrar_pos_processamento(pos_processador.enviar(audio_filepath), audio_filepath)
+    return audio_filepath
+
+# Function to compute the synthesis key of a phrase (text, voice and settings)
+def chave_tts(frase, voice_id=None):
+    return TTSCache.chave(frase, voice_id or elevenlabs_voice_id, elevenlabs_model_id, elevenlabs_voice_settings)
 
+# Function to generate audio and subtitle using Eleven Labs API
+@metricas.cronometrar('tts_frase')
+def gerar_audio_e_legenda(frase, folder_path, base_name, idx, voice_id=None):
+    voice_id = voice_id or elevenlabs_voice_id
     # Create the folder if it doesn't exist
     os.makedirs(folder_path, exist_ok=True)
 
@@ -229,14 +557,65 @@ def gerar_audio_e_legenda(frase, folder_path, base_name, idx):
     audio_filename = f"{base_filename}.mp3"
     audio_filepath = os.path.join(folder_path, audio_filename)
 
-    # Save the audio file
+    # Serve the audio from the local cache when the same request was already synthesized
+    cache_key = chave_tts(frase, voice_id)
+    tts_cache = obter_tts_cache()
+    if not tts_cache.obter(cache_key, audio_filepath):
+        # The /stream endpoint sends the audio in chunks as it is synthesized
+        stream_suffix = "/stream" if ELEVENLABS_STREAMING else ""
+        path = f"/v1/text-to-speech/{voice_id}{stream_suffix}"
+        data = {
+            "text": frase,
+            "voice_settings": elevenlabs_voice_settings,
+            "model_id": elevenlabs_model_id,
+        }
+        for tentativa in range(1, controle_tts.max_tentativas + 1):
+            response = None
+            # The slot is held until the streamed audio is on disk, the API counts it as busy until then
+            try:
+                with controle_tts.admitir(len(frase)) as permissao:
+                    try:
+                        # Time to the response headers; the body is timed as the download below
+                        with metricas.medir('tts_requisicao'):
+                            response = elevenlabs_client.post(path, json=data, headers={"Accept": "audio/mpeg"}, stream=ELEVENLABS_STREAMING)
+                        permissao.registrar(response)
+                        if permissao.limitada and tentativa < controle_tts.max_tentativas:
+                            # Throttled: sent again once the controller lets it through
+                            metricas.contar('tts_retentativas')
+                            response.close()
+                            continue
+                        response.raise_for_status()
+                    except requests.exceptions.RequestException as e:
+                        if response is not None:
+                            metricas.contar(f"tts_http_{response.status_code}")
+                            print(f"Conteúdo da resposta: {response.text}")
+                        mostrar_erro(f"Erro ao gerar áudio: {e}")
+                        return None
+
+                    # Save the audio file
+                    try:
+                        with metricas.medir('tts_download'):
+                            salvar_resposta_em_disco(response, audio_filepath)
+                        metricas.contar('tts_bytes_recebidos', os.path.getsize(audio_filepath))
+                        metricas.contar('tts_caracteres', len(frase))
+                    except Exception as e:
+                        mostrar_erro(f"Erro ao salvar áudio: {e}")
+                        return None
+                    finally:
+                        response.close()
+            except requests.exceptions.RequestException as e:  # CotaEsgotada, raised before sending
+                mostrar_erro(f"Erro ao gerar áudio: {e}")
+                return None
+            break
+
+        tts_cache.guardar(cache_key, audio_filepath)
+
+    # Index the MP3 frames so duration and seek offsets are known without decoding
     try:
-        with open(audio_filepath, "wb") as f:
-            f.write(response.content)
+        with metricas.medir('indexacao_mp3'):
+            mp3_index.carregar_indice(audio_filepath)
     except Exception as e:
-        print(f"Erro ao salvar áudio: {e}")
-        messagebox.showerror("Erro", f"Erro ao salvar áudio: {e}")
-        return None
+        print(f"Erro ao indexar o áudio: {e}")
 
     # Save the corresponding subtitle file
     legenda_filename = f"{base_filename}.txt"
@@ -245,58 +624,493 @@ def gerar_audio_e_legenda(frase, folder_path, base_name, idx):
         with open(legenda_filepath, "w", encoding="utf-8") as f:
             f.write(frase)
     except Exception as e:
-        print(f"Erro ao salvar legenda: {e}")
-        messagebox.showerror("Erro", f"Erro ao salvar legenda: {e}")
+        mostrar_erro(f"Erro ao salvar legenda: {e}")
         return None
 
     return audio_filepath
 
-# Function to update Firestore
-def atualizar_firestore(db, document_id, audio_url, legenda, parent_window, slide_order):
+# Function to synthesize many phrases concurrently
+def sintetizar_frases(frases, folder_path, base_name, max_workers=TTS_MAX_WORKERS, voice_id=None):
     """
-    Updates the specific document in Firestore by adding the audio URL and subtitle to an existing slide.
+    Generates the audio and subtitle of every phrase on a bounded thread pool.
+
+    File numbers follow the order of 'frases' (starting at 1), no matter in which
+    order the workers finish. Progress is recorded in the journal: phrases already
+    synthesized in this session with the same text and voice are reported right away
+    without being generated again. When POS_PROCESSAMENTO is on, each new clip goes to
+    the post-processing pool and is reported once processed; the synthesis threads move
+    on to the next phrase meanwhile. Every request goes through controle_tts, so long
+    lists run at the rate the plan allows instead of failing part-way with 429s.
 
     Args:
-        db (firestore.Client): Firestore client.
-        document_id (str): Document ID in the 'presentations' collection.
-        audio_url (str): Audio URL in Firebase Storage.
-        legenda (str): Subtitle corresponding to the audio.
-        parent_window (tk.Tk or tk.Toplevel): Parent window to display dialog boxes.
-        slide_order (int): Order of the slide to add the audio and subtitle to.
+        frases (list[str]): Phrases in presentation order.
+        folder_path (str): Local folder for the generated files.
+        base_name (str): Base name of the files.
+        max_workers (int): Maximum number of simultaneous syntheses.
+        voice_id (str or None): Eleven Labs voice (default: elevenlabs_voice_id).
+
+    Yields:
+        tuple[int, str or None]: Phrase number and audio path (None on failure), as each one finishes.
+    """
+    chaves = [chave_tts(frase, voice_id) for frase in frases]
+    jornal = obter_jornal()
+    jornal.abrir_sessao(base_name, frases, chaves, voice_id or elevenlabs_voice_id)
+    prontos = jornal.audios_prontos(base_name, dict(enumerate(chaves, 1)))
+    # A quota error from an earlier run is tried again once (the plan may have been renewed)
+    controle_tts.reabrir()
+
+    with metricas.medir('sintese'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(gerar_audio_e_legenda, frase, folder_path, base_name, idx, voice_id): idx
+            for idx, frase in enumerate(frases, 1)
+            if idx not in prontos
+        }
+        for idx in sorted(prontos):
+            metricas.contar('sintese_retomadas')
+            yield idx, prontos[idx]
+        pos_processador = obter_pos_processador()
+        processando = {}  # post-processing future -> (idx, audio path)
+        while futures or processando:
+            concluidos, _ = wait(list(futures) + list(processando), return_when=FIRST_COMPLETED)
+            for future in concluidos:
+                if future in processando:
+                    idx, audio_filepath = processando.pop(future)
+                    registrar_pos_processamento(future, audio_filepath)
+                else:
+                    idx = futures.pop(future)
+                    try:
+                        audio_filepath = future.result()
+                    except Exception as e:
+                        print(f"Erro inesperado ao gerar áudio: {e}")
+                        audio_filepath = None
+                    if audio_filepath and pos_processador is not None:
+                        processando[pos_processador.enviar(audio_filepath)] = (idx, audio_filepath)
+                        continue
+                jornal.marcar_audio(base_name, idx, chaves[idx - 1], audio_filepath, frases[idx - 1])
+                yield idx, audio_filepath
+
+# Function to list the files that already exist under a Storage folder
+def listar_blobs_existentes(bucket, base_folder):
+    """
+    Lists every blob under 'base_folder' with a single paginated request sequence,
+    replacing one existence check per file. The listed blobs carry their size, MD5 and
+    CRC32C, which the delta sync compares with the local files.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        base_folder (str): Folder path without the trailing slash.
+
+    Returns:
+        dict[str, google.cloud.storage.blob.Blob]: Existing blobs by full name.
+    """
+    with metricas.medir('listagem'):
+        return {blob.name: blob for blob in bucket.list_blobs(prefix=f"{base_folder}/")}
+
+# In-memory index of the base names (folders) that exist under 'audios/'
+_indice_nomes_base = {'nomes': set(), 'expira': 0.0}
+_indice_nomes_base_lock = threading.Lock()
+
+# Function to list the existing base names with a single delimiter listing
+def listar_nomes_base(bucket, forcar=False):
+    """
+    Returns the folder names directly under 'audios/' in Firebase Storage.
+
+    A single listing with delimiter '/' returns only the folder prefixes (not every
+    file), and the result is cached for NOMES_BASE_TTL seconds.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        forcar (bool): Ignore the cached index and list again.
+
+    Returns:
+        set[str]: Existing base names.
+    """
+    with _indice_nomes_base_lock:
+        if not forcar and time.monotonic() < _indice_nomes_base['expira']:
+            return set(_indice_nomes_base['nomes'])
+
+    with metricas.medir('listagem_nomes_base'):
+        iterator = bucket.list_blobs(prefix='audios/', delimiter='/')
+        # The prefixes are collected as the pages are consumed
+        for _ in iterator.pages:
+            pass
+    nomes = {prefixo[len('audios/'):].rstrip('/') for prefixo in iterator.prefixes}
+
+    with _indice_nomes_base_lock:
+        _indice_nomes_base['nomes'] = nomes
+        _indice_nomes_base['expira'] = time.monotonic() + NOMES_BASE_TTL
+        return set(_indice_nomes_base['nomes'])
+
+# Function to add a base name to the index once it is in use
+def registrar_nome_base(base_name):
+    with _indice_nomes_base_lock:
+        _indice_nomes_base['nomes'].add(base_name)
+
+# Function to get the next available base name
+def obter_nome_base_disponivel(bucket, base_name):
+    nomes = listar_nomes_base(bucket)
+    if base_name not in nomes:
+        return base_name
+
+    # If it exists, find the next available name
+    match = re.match(r"^(.*?)-(\d+)$", base_name)
+    if match:
+        prefix_part, number = match.groups()
+        index = int(number) + 1
+    else:
+        prefix_part = base_name
+        index = 1
+
+    while f"{prefix_part}-{index}" in nomes:
+        index += 1
+    return f"{prefix_part}-{index}"
+
+# Function to upload one file unless Storage already holds the same content
+def sincronizar_arquivo(bucket, local_path, remote_path, content_type, remotos=None):
+    """
+    Uploads 'local_path' to 'remote_path'. When the listing 'remotos' has the object with
+    the same size and checksum, nothing is transferred and the listed blob is reused.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        local_path (str): Local file.
+        remote_path (str): Full blob name.
+        content_type (str): MIME type of the file.
+        remotos (dict or None): Blob name -> listed blob (see listar_blobs_existentes);
+            None always uploads.
+
+    Returns:
+        tuple[google.cloud.storage.blob.Blob, bool, int]: The blob, whether it was
+        transferred, and the file size in bytes.
+
+    Raises:
+        RuntimeError: If the upload fails.
     """
+    tamanho = os.path.getsize(local_path)
+    remoto = remotos.get(remote_path) if remotos is not None else None
+    if remoto is not None and delta_sync.arquivo_inalterado(local_path, remoto):
+        metricas.contar('upload_bytes_economizados', tamanho)
+        print(f"Arquivo '{remote_path}' inalterado no Storage.")
+        return remoto, False, tamanho
+
+    blob = bucket.blob(remote_path)
     try:
-        # Reference to the document
-        doc_ref = db.collection('presentations').document(document_id)
-
-        # Retrieve the document
-        doc = doc_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            slides = data.get('slides', [])
-
-            # Find the slide with the specified order
-            slide_found = False
-            for slide in slides:
-                if slide.get('order') == slide_order:
-                    audios = slide.get('audios', [])
-                    audios.append({
-                        'audioUrl': audio_url,
-                        'legenda': legenda
-                    })
-                    slide['audios'] = audios
-                    slide_found = True
-                    break
-
-            if not slide_found:
-                messagebox.showerror("Erro", f"Slide com ordem {slide_order} não encontrado.", parent=parent_window)
-                return
+        with metricas.medir('upload_arquivo'):
+            blob.upload_from_filename(local_path, content_type=content_type)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao enviar '{remote_path}': {e}")
+    metricas.contar('upload_bytes_enviados', tamanho)
+    print(f"Arquivo '{remote_path}' enviado com sucesso.")
+    return blob, True, tamanho
+
+# Function to upload the audio and subtitle of one phrase to Firebase Storage
+@metricas.cronometrar('upload_frase')
+def enviar_frase_ao_storage(bucket, base_folder, filename_base, local_folder='audios', remotos=None):
+    """
+    Uploads '<filename_base>.mp3' and '<filename_base>.txt', skipping the ones that are
+    unchanged in 'remotos'. URLs are signed afterwards, in batch, by enviar_frases_ao_storage.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        base_folder (str): Remote folder for the files.
+        filename_base (str): File name without extension, e.g. 'aula-frase-3'.
+        local_folder (str): Local folder where the files were generated.
+        remotos (dict or None): Listing of the remote folder used for the delta sync.
+
+    Returns:
+        tuple[google.cloud.storage.blob.Blob, str, list[tuple[bool, int]]]: The audio blob,
+        its subtitle, and (transferred, size) for each of the two files.
+
+    Raises:
+        RuntimeError: If any step fails; the message describes the failure.
+    """
+    audio_filename = f"{filename_base}.mp3"
+    legenda_filename = f"{filename_base}.txt"
 
-            # Update the document in Firestore
-            doc_ref.update({'slides': slides})
+    # Local paths
+    audio_local_path = os.path.join(local_folder, audio_filename)
+    legenda_local_path = os.path.join(local_folder, legenda_filename)
+
+    # Upload the audio and subtitle files
+    blob_audio, audio_enviado, audio_tamanho = sincronizar_arquivo(
+        bucket, audio_local_path, f"{base_folder}/{audio_filename}", 'audio/mpeg', remotos
+    )
+    _, legenda_enviada, legenda_tamanho = sincronizar_arquivo(
+        bucket, legenda_local_path, f"{base_folder}/{legenda_filename}", 'text/plain', remotos
+    )
+
+    # Get the subtitle from the locally saved file
+    try:
+        with open(legenda_local_path, "r", encoding="utf-8") as f:
+            legenda = f.read().strip()
+    except Exception as e:
+        raise RuntimeError(f"Erro ao ler a legenda: {e}")
+
+    return blob_audio, legenda, [(audio_enviado, audio_tamanho), (legenda_enviada, legenda_tamanho)]
+
+# Function to upload many phrases concurrently
+def enviar_frases_ao_storage(bucket, base_folder, pendentes, max_workers=UPLOAD_MAX_WORKERS, progresso=None,
+                             base_name=None, remotos=None, delta=None):
+    """
+    Uploads the given phrases on a bounded thread pool, then signs all audio URLs in one batch.
+
+    In delta mode a single listing of the remote folder gives the size and checksums of
+    what is already in Storage, and only new or changed '.mp3'/'.txt' files are sent.
+    With 'base_name', uploads are recorded in the journal, and phrases whose current
+    audio the journal already has in Storage are only signed again, not re-uploaded.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        base_folder (str): Remote folder for the files.
+        pendentes (list[tuple[int, str]]): File numbers (journal entries) and file names
+            without extension, in the order the entries should have in Firestore.
+        max_workers (int): Maximum number of simultaneous uploads.
+        progresso (callable or None): Called with (finished, total) after each phrase.
+        base_name (str or None): Journal session of the phrases.
+        remotos (dict or None): Listing of 'base_folder' already made by the caller.
+        delta (bool or None): Skip unchanged files; None uses UPLOAD_DELTA.
+
+    Returns:
+        tuple[list[dict], list[int], list[str], dict]: Firestore entries in the order of 'pendentes',
+        the file numbers of those entries (phrases whose upload or signing failed are left out),
+        error messages, and the transfer summary ('arquivos_enviados', 'arquivos_inalterados',
+        'bytes_enviados', 'bytes_economizados').
+    """
+    ordem = [idx for idx, _ in pendentes]
+    enviados = {}
+    erros = []
+    sincronia = {'arquivos_enviados': 0, 'arquivos_inalterados': 0, 'bytes_enviados': 0, 'bytes_economizados': 0}
+
+    def contabilizar(transferencias):
+        for transferido, tamanho in transferencias:
+            if transferido:
+                sincronia['arquivos_enviados'] += 1
+                sincronia['bytes_enviados'] += tamanho
+            else:
+                sincronia['arquivos_inalterados'] += 1
+                sincronia['bytes_economizados'] += tamanho
+
+    # Reuse the uploads recorded by an interrupted run
+    if base_name is not None:
+        envios = obter_jornal().envios(base_name)
+        restantes = []
+        for idx, nome in pendentes:
+            envio = envios.get(idx)
+            if envio is None or envio['geracao'] is None:
+                restantes.append((idx, nome))
+                continue
+            try:
+                with open(os.path.join('audios', f"{nome}.txt"), "r", encoding="utf-8") as f:
+                    legenda = f.read().strip()
+                tamanhos = [os.path.getsize(os.path.join('audios', f"{nome}{ext}")) for ext in ('.mp3', '.txt')]
+                md5_local = delta_sync.digest_local(os.path.join('audios', f"{nome}.mp3"))[1]
+            except OSError:
+                restantes.append((idx, nome))
+                continue
+            # The local audio changed since that upload (e.g. re-generated): send it again
+            if md5_local != envio['audio_md5']:
+                restantes.append((idx, nome))
+                continue
+            enviados[idx] = (bucket.blob(f"{base_folder}/{nome}.mp3", generation=envio['geracao']), legenda)
+            contabilizar((False, tamanho) for tamanho in tamanhos)
+            metricas.contar('upload_retomados')
+        pendentes = restantes
+
+    if delta is None:
+        delta = UPLOAD_DELTA
+    if not delta:
+        remotos = None
+    elif remotos is None and pendentes:
+        remotos = listar_blobs_existentes(bucket, base_folder)
+
+    total = len(enviados) + len(pendentes)
+    nomes = dict(pendentes)
+    with metricas.medir('envio'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(enviar_frase_ao_storage, bucket, base_folder, nome, 'audios', remotos): idx
+            for idx, nome in pendentes
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                blob_audio, legenda, transferencias = future.result()
+                enviados[idx] = (blob_audio, legenda)
+                contabilizar(transferencias)
+                if base_name is not None:
+                    md5_local = delta_sync.digest_local(os.path.join('audios', f"{nomes[idx]}.mp3"))[1]
+                    obter_jornal().marcar_enviado(base_name, idx, blob_audio.generation, md5_local)
+            except Exception as e:
+                print(e)
+                erros.append(str(e))
+            if progresso:
+                progresso(len(enviados) + len(erros), total)
+
+    # Generate Signed URLs for the audios
+    with metricas.medir('assinatura'):
+        urls = signed_url_cache.assinar_em_lote(
+            [blob for blob, _ in enviados.values()], SIGNED_URL_EXPIRACAO, max_workers=max_workers
+        )
+    novos_audios = []
+    publicados = []
+    for idx in ordem:
+        if idx not in enviados:  # Failed upload
+            continue
+        blob_audio, legenda = enviados[idx]
+        audio_url = urls.get(blob_audio.name)
+        if not audio_url:
+            erros.append(f"Erro ao gerar URL para '{blob_audio.name}'.")
+            continue
+        novos_audios.append({
+            'audioUrl': audio_url,
+            'legenda': legenda
+        })
+        publicados.append(idx)
+    return novos_audios, publicados, erros, sincronia
+
+# Function to check whether both files of a phrase are already in Storage with the same content
+def frase_inalterada(remotos, base_folder, nome, local_folder='audios'):
+    return all(
+        delta_sync.arquivo_inalterado(os.path.join(local_folder, f"{nome}{ext}"), remotos.get(f"{base_folder}/{nome}{ext}"))
+        for ext in ('.mp3', '.txt')
+    )
+
+# Function to describe the outcome of a delta upload for the user
+def formatar_sincronia(sincronia):
+    return (
+        f"{sincronia['arquivos_enviados']} arquivo(s) enviado(s) ({sincronia['bytes_enviados'] / 1e6:.1f} MB), "
+        f"{sincronia['arquivos_inalterados']} inalterado(s) ({sincronia['bytes_economizados'] / 1e6:.1f} MB economizados)."
+    )
+
+# Function to publish all phrases of a slide as one stitched audio file
+def publicar_audio_do_slide(bucket, base_folder, nome_slide, pendentes, local_folder='audios', remotos=None):
+    """
+    Concatenates the phrase clips at MP3 frame boundaries (no decoding or re-encoding),
+    uploads the result and builds the offset table of the subtitles. The upload is
+    skipped when 'remotos' shows Storage already has the same stitched file.
+
+    Args:
+        bucket (google.cloud.storage.bucket.Bucket): Firebase Storage bucket.
+        base_folder (str): Remote folder for the file.
+        nome_slide (str): File name of the stitched audio, without extension.
+        pendentes (list[tuple[int, str]]): Phrase numbers and file names without extension, in order.
+        local_folder (str): Local folder where the phrases were generated.
+        remotos (dict or None): Listing of 'base_folder' for the delta sync; None always uploads.
+
+    Returns:
+        dict: Slide entry with 'audioUrl' and 'segmentos' ({'start_ms', 'end_ms', 'legenda'}).
+
+    Raises:
+        RuntimeError: If any step fails; the message describes the failure.
+    """
+    if not pendentes:
+        raise RuntimeError("Não há áudios para publicar.")
+
+    audio_local_path = os.path.join(local_folder, f"{nome_slide}.mp3")
+    try:
+        with metricas.medir('concatenacao'):
+            segmentos = mp3_index.concatenar_mp3(
+                [os.path.join(local_folder, f"{nome}.mp3") for _, nome in pendentes], audio_local_path
+            )
+        legendas = []
+        for _, nome in pendentes:
+            with open(os.path.join(local_folder, f"{nome}.txt"), "r", encoding="utf-8") as f:
+                legendas.append(f.read().strip())
+    except Exception as e:
+        raise RuntimeError(f"Erro ao juntar os áudios do slide: {e}")
+
+    audio_remote_path = f"{base_folder}/{nome_slide}.mp3"
+    blob_audio, _, _ = sincronizar_arquivo(bucket, audio_local_path, audio_remote_path, 'audio/mpeg', remotos)
+
+    with metricas.medir('assinatura'):
+        audio_url = gerar_signed_url(blob_audio, expiration=SIGNED_URL_EXPIRACAO)
+        signed_url_cache.salvar()
+    if not audio_url:
+        raise RuntimeError(f"Erro ao gerar URL para '{audio_remote_path}'.")
+
+    return {
+        'audioUrl': audio_url,
+        'segmentos': [
+            {'start_ms': inicio, 'end_ms': fim, 'legenda': legenda}
+            for (inicio, fim), legenda in zip(segmentos, legendas)
+        ],
+    }
+
+# Function to format the duration of a generated clip for display
+def formatar_duracao(audio_filepath):
+    try:
+        return f"{mp3_index.duracao_ms(audio_filepath) / 1000:.1f} s"
+    except Exception as e:
+        print(f"Erro ao ler a duração do áudio: {e}")
+        return ''
+
+# Function to update Firestore
+def atualizar_firestore(db, document_id, audios, parent_window, slide_order, audio_slide=None):
+    """
+    Appends all audio entries of an upload run to an existing slide in a single transaction.
+    In the single-file publish mode, the stitched audio is stored in the slide's 'audioSlide' field.
+
+    The document is read once per attempt, whatever the number of entries, and the
+    transaction is retried automatically if another writer changes it concurrently.
+
+    Args:
+        db (firestore.Client or backends.DocumentosLocais): Firestore client.
+        document_id (str): Document ID in the 'presentations' collection.
+        audios (list[dict]): Entries with 'audioUrl' and 'legenda', in playback order.
+        parent_window (tk.Tk or tk.Toplevel or None): Parent window to display dialog boxes.
+        slide_order (int): Order of the slide to add the audios and subtitles to.
+        audio_slide (dict or None): Stitched slide audio, as returned by publicar_audio_do_slide.
+
+    Returns:
+        bool: True if the document was updated.
+    """
+    if not audios and audio_slide is None:
+        return True
+
+    # Reference to the document
+    doc_ref = db.collection('presentations').document(document_id)
+
+    # The local document store brings its own decorator
+    transactional = getattr(db, 'transactional', None)
+    if transactional is None:
+        from firebase_admin import firestore
+        transactional = firestore.transactional
+
+    tentativas = [0]
+
+    @transactional
+    def anexar_audios(transaction):
+        tentativas[0] += 1
+        doc = doc_ref.get(transaction=transaction)
+        if not doc.exists:
+            raise LookupError(f"Documento com ID {document_id} não existe.")
+        slides = doc.to_dict().get('slides', [])
+
+        # Find the slide with the specified order
+        for slide in slides:
+            if slide.get('order') == slide_order:
+                if audios:
+                    slide['audios'] = slide.get('audios', []) + list(audios)
+                if audio_slide is not None:
+                    slide['audioSlide'] = audio_slide
+                break
         else:
-            messagebox.showerror("Erro", f"Documento com ID {document_id} não existe.", parent=parent_window)
+            raise LookupError(f"Slide com ordem {slide_order} não encontrado.")
+
+        transaction.update(doc_ref, {'slides': slides})
+
+    try:
+        with metricas.medir('firestore'):
+            anexar_audios(db.transaction(max_attempts=FIRESTORE_MAX_TENTATIVAS))
+    except LookupError as e:
+        mostrar_erro(str(e), parent=parent_window)
+        return False
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao atualizar o Firestore: {e}", parent=parent_window)
+        mostrar_erro(f"Erro ao atualizar o Firestore: {e}", parent=parent_window)
+        return False
+    finally:
+        # Each extra run of the function is a retry after a conflicting write
+        metricas.contar('firestore_retentativas', max(tentativas[0] - 1, 0))
+    return True
 
 # Function to process the entered text
 def iniciar_processamento(texto, base_name):
@@ -304,7 +1118,8 @@ def iniciar_processamento(texto, base_name):
     exibir_frases(frases, base_name)
 
 # Function to display list of phrases in a tkinter window
-def exibir_frases(frases, base_name):
+def exibir_frases(frases, base_name, retomar=False):
+    global _barramento_ui
     lista_window = tk.Toplevel()
     lista_window.title("Frases Geradas")
     lista_window.geometry("1200x800")  # Increased for better visualization
@@ -327,81 +1142,52 @@ def exibir_frases(frases, base_name):
         lista_window.destroy()
         return
 
-    # Retrieve Firestore document to get existing slide orders
-    document_id = "0QhyptyCMN88m8jRsGl4"  # Ensure this ID is correct
+    # Retrieve Firestore document to get existing slide orders (usually already read by the warm-up)
+    document_id = DOCUMENT_ID
     try:
-        doc_ref = db.collection('presentations').document(document_id)
-        doc = doc_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            slides = data.get('slides', [])
-            slide_orders = sorted([slide.get('order') for slide in slides if 'order' in slide])
-        else:
-            messagebox.showerror("Erro", f"Documento com ID {document_id} não existe.", parent=lista_window)
-            lista_window.destroy()
-            return
+        slide_orders = obter_ordens_dos_slides(db, document_id)
+    except LookupError as e:
+        messagebox.showerror("Erro", str(e), parent=lista_window)
+        lista_window.destroy()
+        return
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao recuperar slides do Firestore: {e}", parent=lista_window)
         lista_window.destroy()
         return
 
-    # Function to get the next available base name
-    def get_available_base_name_internal(bucket, base_name):
-        prefix = f"audios/{base_name}/"
-        blobs = list(bucket.list_blobs(prefix=prefix, max_results=1))
-        if not blobs:
-            return base_name
-
-        # If it exists, find the next available name
-        match = re.match(r"^(.*?)-(\d+)$", base_name)
-        if match:
-            prefix_part, number = match.groups()
-            index = int(number) + 1
-        else:
-            prefix_part = base_name
-            index = 1
-
-        while True:
-            new_base_name = f"{prefix_part}-{index}"
-            new_prefix = f"audios/{new_base_name}/"
-            blobs = list(bucket.list_blobs(prefix=new_prefix, max_results=1))
-            if not blobs:
-                return new_base_name
-            index += 1
-
-    # Check and adjust the base name if necessary
-    available_base_name = get_available_base_name_internal(bucket, base_name)
+    # Check and adjust the base name if necessary; a resumed session keeps its own folder
+    available_base_name = base_name if retomar else obter_nome_base_disponivel(bucket, base_name)
+    registrar_nome_base(available_base_name)  # Reserve it for other windows during the TTL
     if available_base_name != base_name:
         messagebox.showinfo("Informação", f"A pasta '{base_name}' já existe no Firebase Storage.\nUsando '{available_base_name}' em seu lugar.", parent=lista_window)
         base_name = available_base_name  # Update base_name to the available one
 
-    # Create Treeview with columns 'Número', 'Frase', 'Palavras', 'Status'
-    tree = ttk.Treeview(lista_window, columns=('Número', 'Frase', 'Palavras', 'Status'), show='headings', selectmode='browse')
-    tree.heading('Número', text='Nº')
-    tree.heading('Frase', text='Frase')
-    tree.heading('Palavras', text='Palavras')
-    tree.heading('Status', text='Status')
+    # The phrases live in a model; the Treeview only renders the visible rows
+    # ('Número', 'Frase', 'Palavras', 'Status', 'Duração')
+    modelo = ListaFrases(frases)
+    vista = VistaFrases(lista_window, modelo)
+    vista.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
-    tree.column('Número', width=50, anchor='center')
-    tree.column('Frase', width=700, anchor='w')
-    tree.column('Palavras', width=80, anchor='center')
-    tree.column('Status', width=150, anchor='center')
+    # Add optional progress bar
+    progress = ttk.Progressbar(lista_window, orient='horizontal', mode='determinate', length=800)
+    progress.pack(pady=10)
 
-    # Alternate row colors
-    tree.tag_configure('oddrow', background='#f0f0f0')
-    tree.tag_configure('evenrow', background='#d9d9d9')
+    # Estimated time left of the current generation or upload
+    label_eta = tk.Label(lista_window, text='', font=('Helvetica', 10))
+    label_eta.pack()
 
-    # Insert phrases into the Treeview with sequential numbering and word count
-    for idx, frase in enumerate(frases, 1):
-        word_count = len(frase.split())
-        tag = 'oddrow' if idx % 2 else 'evenrow'
-        tree.insert('', tk.END, values=(idx, frase, word_count, 'Pendente'), tags=(tag,))
+    # Worker threads update the window only through this bus, drained by the Tk main loop
+    ui = BarramentoUI(lista_window)
+    _barramento_ui = ui
 
-    tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    def aplicar_progresso(valor, maximo, texto):
+        progress['maximum'] = maximo
+        progress['value'] = valor
+        label_eta.config(text=texto)
 
-    # Add optional progress bar
-    progress = ttk.Progressbar(lista_window, orient='horizontal', mode='determinate', length=800)
-    progress.pack(pady=10)
+    # Function to update the progress bar and ETA from any thread (one redraw per tick)
+    def mostrar_progresso(valor, maximo, texto):
+        ui.coalescer('progresso', aplicar_progresso, valor, maximo, texto)
 
     # Add a menu bar
     menu_bar = tk.Menu(lista_window)
@@ -412,6 +1198,12 @@ def exibir_frases(frases, base_name):
     menu_bar.add_cascade(label="Arquivo", menu=arquivo_menu)
     arquivo_menu.add_command(label="Sair", command=lista_window.destroy)
 
+    # Edit Menu
+    editar_menu = tk.Menu(menu_bar, tearoff=0)
+    menu_bar.add_cascade(label="Editar", menu=editar_menu)
+    editar_menu.add_command(label="Desfazer", accelerator="Ctrl+Z", command=lambda: desfazer())
+    editar_menu.add_command(label="Refazer", accelerator="Ctrl+Y", command=lambda: refazer())
+
     # Help Menu
     ajuda_menu = tk.Menu(menu_bar, tearoff=0)
     menu_bar.add_cascade(label="Ajuda", menu=ajuda_menu)
@@ -435,246 +1227,339 @@ def exibir_frases(frases, base_name):
         combobox_slide.current(0)  # Select the first slide by default
     combobox_slide.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.X, expand=True)
 
+    # Publish mode: one file per phrase or one stitched file per slide
+    publicar_por_slide = tk.BooleanVar(value=(MODO_PUBLICACAO == "slide"))
+    check_por_slide = tk.Checkbutton(frame_slide, text="Um único áudio por slide", variable=publicar_por_slide, font=('Helvetica', 11))
+    check_por_slide.pack(side=tk.LEFT, padx=5, pady=5)
+
+    # Voice picker, filled from the catalog cache (usually loaded while the text was typed)
+    frame_voz = tk.Frame(lista_window)
+    frame_voz.pack(pady=5, padx=20, fill=tk.X)
+
+    label_voz = tk.Label(frame_voz, text="Voz:", font=('Helvetica', 12))
+    label_voz.pack(side=tk.LEFT, padx=5, pady=5)
+
+    selected_voice = tk.StringVar()
+    combobox_voz = ttk.Combobox(frame_voz, textvariable=selected_voice, width=60)
+    combobox_voz.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.X, expand=True)
+    ids_por_rotulo = {}
+
+    def preencher_vozes(vozes):
+        ids_por_rotulo.clear()
+        ids_por_rotulo.update({CatalogoVozes.rotulo(voz): voz['voice_id'] for voz in vozes})
+        atual = voz_selecionada() if selected_voice.get() else elevenlabs_voice_id
+        combobox_voz['values'] = list(ids_por_rotulo)
+        # Without a catalog the ID can be typed in
+        combobox_voz.config(state='readonly' if ids_por_rotulo else 'normal')
+        rotulo_atual = next((r for r, v in ids_por_rotulo.items() if v == atual), None)
+        selected_voice.set(rotulo_atual or atual)
+
+    def voz_selecionada():
+        texto = selected_voice.get().strip()
+        return ids_por_rotulo.get(texto, texto) or elevenlabs_voice_id
+
+    def carregar_vozes(forcar=False):
+        def task():
+            vozes = obter_vozes_disponiveis(forcar=forcar)
+            if vozes:
+                ui.chamar(preencher_vozes, vozes)
+        threading.Thread(target=task, daemon=True).start()
+
+    def atualizar_vozes():
+        carregar_vozes(forcar=True)
+
+    botao_atualizar_vozes = tk.Button(frame_voz, text="Atualizar Vozes", command=atualizar_vozes, font=('Helvetica', 10))
+    botao_atualizar_vozes.pack(side=tk.LEFT, padx=5, pady=5)
+
+    # A resumed session starts with the voice it was synthesized with
+    voz_sessao = obter_jornal().voz(base_name) if retomar else None
+    if voz_sessao:
+        selected_voice.set(voz_sessao)
+
+    # Show the cached list right away; a stale or missing catalog (e.g. the warm-up failed)
+    # is fetched in the background, so the window never waits for the API
+    preencher_vozes(catalogo_vozes.em_cache())
+    carregar_vozes()
+
+    # Function to get the selected position, warning the user when there is none
+    def posicao_selecionada(mensagem):
+        pos = vista.selecionada
+        if pos is None or pos >= len(modelo):
+            messagebox.showwarning("Aviso", mensagem, parent=lista_window)
+            return None
+        return pos
+
     # Function to add a new phrase
     def adicionar_frase():
         nova_frase = simpledialog.askstring("Adicionar Frase", "Digite a nova frase:", parent=lista_window)
         if nova_frase:
             nova_frase = nova_frase.strip()
             if nova_frase:
-                num_frases = len(tree.get_children())
-                word_count = len(nova_frase.split())
-                tag = 'oddrow' if (num_frases + 1) % 2 else 'evenrow'
-                tree.insert('', tk.END, values=(num_frases + 1, nova_frase, word_count, 'Pendente'), tags=(tag,))
+                modelo.adicionar(nova_frase)
+                vista.selecionar(len(modelo) - 1)
             else:
                 messagebox.showwarning("Aviso", "A frase não pode estar vazia.", parent=lista_window)
 
     # Function to edit the selected phrase
     def editar_frase():
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Aviso", "Por favor, selecione uma frase para editar.", parent=lista_window)
+        pos = posicao_selecionada("Por favor, selecione uma frase para editar.")
+        if pos is None:
             return
-        item_id = selected_item[0]
-        frase_atual = tree.item(item_id, 'values')[1]
-        dialog = EditarFraseDialog(lista_window, frase_atual)
+        dialog = EditarFraseDialog(lista_window, modelo[pos].texto)
         lista_window.wait_window(dialog)
         if dialog.frase_editada:
-            word_count = len(dialog.frase_editada.split())
-            tree.set(item_id, 'Frase', dialog.frase_editada)
-            tree.set(item_id, 'Palavras', word_count)
+            modelo.editar(pos, dialog.frase_editada)
 
     # Function to delete the selected phrase
     def apagar_frase():
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Aviso", "Por favor, selecione uma frase para apagar.", parent=lista_window)
+        pos = posicao_selecionada("Por favor, selecione uma frase para apagar.")
+        if pos is None:
             return
         confirm = messagebox.askyesno("Confirmar", "Tem certeza que deseja apagar a frase selecionada?", parent=lista_window)
         if confirm:
-            tree.delete(selected_item)
-            # Update phrase numbers and tags
-            for idx, item in enumerate(tree.get_children(), 1):
-                word_count = tree.item(item, 'values')[2]
-                tree.set(item, 'Número', idx)
-                tag = 'oddrow' if idx % 2 else 'evenrow'
-                tree.item(item, tags=(tag,))
+            # Numbers and row colors follow the position, so nothing is renumbered
+            modelo.apagar(pos)
 
     # Function to move the selected phrase up
     def mover_para_cima():
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Aviso", "Por favor, selecione uma frase para mover para cima.", parent=lista_window)
+        pos = posicao_selecionada("Por favor, selecione uma frase para mover para cima.")
+        if pos is None:
             return
-        item_id = selected_item[0]
-        index = tree.index(item_id)
-        if index == 0:
+        if pos == 0:
             messagebox.showinfo("Informação", "A frase selecionada já está no topo.", parent=lista_window)
             return
-        acima_item = tree.get_children()[index - 1]
-        # Swap phrase values
-        valores_acima = tree.item(acima_item, 'values')
-        valores_atual = tree.item(item_id, 'values')
-        tree.item(acima_item, values=valores_atual)
-        tree.item(item_id, values=valores_acima)
-        # Update tags for alternating colors and numbers
-        for idx, item in enumerate(tree.get_children(), 1):
-            tree.set(item, 'Número', idx)
-            tag = 'oddrow' if idx % 2 else 'evenrow'
-            tree.item(item, tags=(tag,))
+        modelo.mover(pos, pos - 1)
         # Select the item that was moved up
-        tree.selection_set(acima_item)
-        tree.focus(acima_item)
+        vista.selecionar(pos - 1)
 
     # Function to move the selected phrase down
     def mover_para_baixo():
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Aviso", "Por favor, selecione uma frase para mover para baixo.", parent=lista_window)
+        pos = posicao_selecionada("Por favor, selecione uma frase para mover para baixo.")
+        if pos is None:
             return
-        item_id = selected_item[0]
-        index = tree.index(item_id)
-        if index == len(tree.get_children()) - 1:
+        if pos == len(modelo) - 1:
             messagebox.showinfo("Informação", "A frase selecionada já está na base.", parent=lista_window)
             return
-        abaixo_item = tree.get_children()[index + 1]
-        # Swap phrase values
-        valores_abaixo = tree.item(abaixo_item, 'values')
-        valores_atual = tree.item(item_id, 'values')
-        tree.item(abaixo_item, values=valores_atual)
-        tree.item(item_id, values=valores_abaixo)
-        # Update tags for alternating colors and numbers
-        for idx, item in enumerate(tree.get_children(), 1):
-            tree.set(item, 'Número', idx)
-            tag = 'oddrow' if idx % 2 else 'evenrow'
-            tree.item(item, tags=(tag,))
+        modelo.mover(pos, pos + 1)
         # Select the item that was moved down
-        tree.selection_set(abaixo_item)
-        tree.focus(abaixo_item)
+        vista.selecionar(pos + 1)
+
+    # Functions to undo and redo the last edits of the list
+    def desfazer(event=None):
+        pos = modelo.desfazer()
+        if pos is not None:
+            vista.selecionar(pos)
+
+    def refazer(event=None):
+        pos = modelo.refazer()
+        if pos is not None:
+            vista.selecionar(pos)
+
+    lista_window.bind('<Control-z>', desfazer)
+    lista_window.bind('<Control-y>', refazer)
+    lista_window.bind('<Control-Z>', refazer)  # Ctrl+Shift+Z
+
+    def aplicar_status(frase, audio_filepath, duracao):
+        if audio_filepath:
+            frase.status = STATUS_SUCESSO
+            frase.duracao = duracao
+        else:
+            frase.status = STATUS_FALHA
+            frase.duracao = ''
+        frase.audio = audio_filepath
+        # One redraw of the visible rows per tick, however many phrases finished
+        ui.coalescer('vista', vista.renderizar)
+
+    # Function to mark the status of a phrase after (re)generating its audio; safe from any thread
+    def marcar_status(frase, audio_filepath):
+        # The duration comes from the MP3 index, so it is read here and not in the main loop
+        duracao = formatar_duracao(audio_filepath) if audio_filepath else ''
+        ui.coalescer(('status', id(frase)), aplicar_status, frase, audio_filepath, duracao)
+
+    # Function to pick the file number of a phrase that has none yet (e.g. added after the generation)
+    def proximo_numero():
+        return max((frase.numero or 0 for frase in modelo), default=0) + 1
+
+    # Function to journal the order of the list, so a resumed session keeps moves and deletions.
+    # Only once the window has a journal session, so an edit before the first generation does not
+    # touch an older session with the same base name
+    no_jornal = [retomar]
+
+    def salvar_ordem():
+        if no_jornal[0]:
+            obter_jornal().salvar_ordem(base_name, [frase.numero for frase in modelo if frase.numero is not None])
+
+    modelo.observar(salvar_ordem)
 
     # Function to generate audio and subtitle
     def gerar_audios_e_legendas():
+        itens = list(modelo)
+        total = len(itens)
+        if total == 0:
+            messagebox.showwarning("Aviso", "Não há frases para processar.", parent=lista_window)
+            return
+        # Read the phrases up front so file numbering follows the current order,
+        # no matter in which order the workers finish or how the list is edited meanwhile
+        frases_atuais = [frase.texto for frase in itens]
+        for idx, frase in enumerate(itens, 1):
+            frase.numero = idx
+        voice_id = voz_selecionada()
+
         def task():
-            total = len(tree.get_children())
-            if total == 0:
-                messagebox.showwarning("Aviso", "Não há frases para processar.", parent=lista_window)
+            # The catalog is cached, so checking the voice usually needs no request
+            if validar_voz(voice_id) is False:
+                ui.mensagem('erro', "Erro", f"A voz '{voice_id}' não existe na Eleven Labs.", parent=lista_window)
                 return
-            progress['maximum'] = total
-            progress['value'] = 0
-            for idx, item in enumerate(tree.get_children(), 1):
-                frase = tree.item(item, 'values')[1]
-                word_count = tree.item(item, 'values')[2]
-                # Generate audio and subtitle, save in 'audios' folder
-                audio_filepath = gerar_audio_e_legenda(frase, 'audios', base_name, idx)
-                if audio_filepath:
-                    status = 'Sucesso'
-                    # Change status color to green
-                    tree.tag_configure('sucesso', foreground='green')
-                    values = list(tree.item(item, 'values'))
-                    values[3] = status  # Update 'Status'
-                    tree.item(item, values=values, tags=('sucesso',))
-                else:
-                    status = 'Falha'
-                    # Change status color to red
-                    tree.tag_configure('falha', foreground='red')
-                    values = list(tree.item(item, 'values'))
-                    values[3] = status  # Update 'Status'
-                    tree.item(item, values=values, tags=('falha',))
-                # Update progress bar
-                progress['value'] = idx
-                # Lightly update the interface
-                lista_window.update_idletasks()
-            messagebox.showinfo("Conclusão", "Áudios e legendas gerados com sucesso.", parent=lista_window)
+            eta = EstimativaETA(total)
+            mostrar_progresso(0, total, eta.texto())
+            # Report each phrase as soon as its audio arrives
+            for idx, audio_filepath in sintetizar_frases(frases_atuais, 'audios', base_name, voice_id=voice_id):
+                marcar_status(itens[idx - 1], audio_filepath)
+                eta.concluir()
+                mostrar_progresso(eta.concluidos, total, eta.texto())
+            stats = obter_tts_cache().estatisticas()
+            print(f"Cache de áudio: {stats['hits']} acertos, {stats['misses']} falhas, {stats['entries']} entradas.")
+            ui.mensagem(
+                'info', "Conclusão",
+                f"Áudios e legendas gerados com sucesso.\n"
+                f"Cache: {stats['hits']} acertos, {stats['misses']} falhas.",
+                parent=lista_window
+            )
+            # The session now follows the file numbers; record edits made during the generation
+            no_jornal[0] = True
+            ui.chamar(salvar_ordem)
             # Enable the button to send to Firebase after completion
-            botao_enviar.config(state='normal')
+            ui.chamar(botao_enviar.config, state='normal')
 
-        threading.Thread(target=task).start()
+        threading.Thread(target=executar_com_metricas, args=(task,)).start()
 
     # Function to send files to Firebase Storage with Firestore update
     def enviar_ao_firebase():
+        # Get the selected slide order
+        try:
+            slide_order = int(selected_slide.get())
+        except ValueError:
+            messagebox.showerror("Erro", "Selecione uma ordem de slide válida.", parent=lista_window)
+            return
+
+        # Only send files with success status, in the current order of the list and with the
+        # files each phrase owns (read here, since the worker does not touch the list)
+        pendentes_sucesso = [
+            (frase.numero, os.path.splitext(os.path.basename(frase.audio))[0])
+            for frase in modelo if frase.status == STATUS_SUCESSO and frase.audio
+        ]
+        por_slide = publicar_por_slide.get()
+
+        # Disable the button during upload
+        botao_enviar.config(state='disabled')
+
         def task():
-            # Disable the button during upload
-            botao_enviar.config(state='disabled')
             base_folder = f"audios/{base_name}"
+            pendentes = pendentes_sucesso
 
             # Specific document ID in the 'presentations' collection
-            document_id = "0QhyptyCMN88m8jRsGl4"  # Ensure this ID is correct
+            document_id = DOCUMENT_ID
 
-            # Get the selected slide order
+            # Check which audios already exist with a single listing of the folder
             try:
-                slide_order = int(selected_slide.get())
-            except ValueError:
-                messagebox.showerror("Erro", "Selecione uma ordem de slide válida.", parent=lista_window)
-                botao_enviar.config(state='normal')
+                existentes = listar_blobs_existentes(bucket, base_folder)
+            except Exception as e:
+                print(f"Erro ao verificar existência dos áudios: {e}")
+                ui.mensagem('erro', "Erro", f"Erro ao verificar existência dos áudios: {e}", parent=lista_window)
                 return
 
-            for idx, item in enumerate(tree.get_children(), 1):
-                values = tree.item(item, 'values')
-                status = values[3]
-                if status != 'Sucesso':
-                    continue  # Only send files with success status
-                filename_base = f"{base_name}-frase-{idx}"
-                audio_filename = f"{filename_base}.mp3"
-                legenda_filename = f"{filename_base}.txt"
-
-                # Local paths
-                audio_local_path = os.path.join('audios', audio_filename)
-                legenda_local_path = os.path.join('audios', legenda_filename)
-
-                # Firebase Storage paths
-                audio_remote_path = f"{base_folder}/{audio_filename}"
-                legenda_remote_path = f"{base_folder}/{legenda_filename}"
-
-                # Blob references
-                blob_audio = bucket.blob(audio_remote_path)
-                blob_legenda = bucket.blob(legenda_remote_path)
-
-                # Check if the audio already exists
-                try:
-                    if blob_audio.exists():
-                        overwrite_audio = messagebox.askyesno(
-                            "Confirmação de Sobrescrita",
-                            f"O arquivo '{audio_filename}' já existe no Firebase Storage.\nDeseja sobrescrevê-lo?",
-                            parent=lista_window
-                        )
-                        if not overwrite_audio:
-                            print(f"Arquivo '{audio_remote_path}' não foi sobrescrito.")
-                            continue  # Skip uploading this file
-                except Exception as e:
-                    print(f"Erro ao verificar existência do áudio: {e}")
-                    messagebox.showerror("Erro", f"Erro ao verificar existência do áudio: {e}", parent=lista_window)
-                    continue
-
-                # Upload the audio file
-                try:
-                    blob_audio.upload_from_filename(audio_local_path, content_type='audio/mpeg')
-                    print(f"Arquivo '{audio_remote_path}' enviado com sucesso.")
-                except Exception as e:
-                    print(f"Erro ao enviar '{audio_remote_path}': {e}")
-                    messagebox.showerror("Erro", f"Erro ao enviar '{audio_remote_path}': {e}", parent=lista_window)
-                    continue
-
-                # Generate Signed URL for the audio
-                audio_url = gerar_signed_url(blob_audio, expiration=timedelta(days=7))  # Adjust time as needed
-                if not audio_url:
-                    messagebox.showerror("Erro", f"Erro ao gerar URL para '{audio_remote_path}'.", parent=lista_window)
-                    continue
-
-                # Upload the subtitle file
+            # Single-file mode: stitch the slide's clips and store one URL plus the offset table
+            if por_slide:
+                nome_slide = f"{base_name}-slide-{slide_order}"
+                if f"{base_folder}/{nome_slide}.mp3" in existentes:
+                    overwrite = ui.perguntar(
+                        messagebox.askyesno,
+                        "Confirmação de Sobrescrita",
+                        f"O arquivo '{nome_slide}.mp3' já existe no Firebase Storage.\nDeseja sobrescrevê-lo?",
+                        parent=lista_window
+                    )
+                    if not overwrite:
+                        return
                 try:
-                    blob_legenda.upload_from_filename(legenda_local_path, content_type='text/plain')
-                    print(f"Arquivo '{legenda_remote_path}' enviado com sucesso.")
-                except Exception as e:
-                    print(f"Erro ao enviar '{legenda_remote_path}': {e}")
-                    messagebox.showerror("Erro", f"Erro ao enviar '{legenda_remote_path}': {e}", parent=lista_window)
-                    continue
-
-                # Generate Signed URL for the subtitle (if necessary)
-                legenda_url = gerar_signed_url(blob_legenda, expiration=timedelta(days=7))
-                if not legenda_url:
-                    messagebox.showerror("Erro", f"Erro ao gerar URL para '{legenda_remote_path}'.", parent=lista_window)
-                    continue
-
-                # Get the subtitle from the locally saved file
-                try:
-                    with open(legenda_local_path, "r", encoding="utf-8") as f:
-                        legenda = f.read().strip()
-                except Exception as e:
-                    print(f"Erro ao ler a legenda: {e}")
-                    messagebox.showerror("Erro", f"Erro ao ler a legenda: {e}", parent=lista_window)
-                    continue
-
-                # Update Firestore with the audio URL and subtitle
-                try:
-                    atualizar_firestore(db, document_id, audio_url, legenda, lista_window, slide_order)
-                except Exception as e:
-                    print(f"Erro ao atualizar o Firestore: {e}")
-                    messagebox.showerror("Erro", f"Erro ao atualizar o Firestore: {e}", parent=lista_window)
-                    continue
+                    audio_slide = publicar_audio_do_slide(
+                        bucket, base_folder, nome_slide, pendentes, remotos=existentes if UPLOAD_DELTA else None
+                    )
+                except RuntimeError as e:
+                    print(e)
+                    ui.mensagem('erro', "Erro", str(e), parent=lista_window)
+                    return
+                if atualizar_firestore(db, document_id, [], lista_window, slide_order, audio_slide=audio_slide):
+                    ui.mensagem('info', "Conclusão", "Áudio do slide enviado ao Firebase Storage e Firestore atualizado com sucesso.", parent=lista_window)
+                return
 
-            messagebox.showinfo("Conclusão", "Arquivos enviados ao Firebase Storage e Firestore atualizados com sucesso.", parent=lista_window)
-            botao_enviar.config(state='normal')  # Re-enable the button after completion
+            # Phrases already added to this slide by an earlier run are not sent again
+            envios = obter_jornal().envios(base_name)
+            destino = Jornal.destino(document_id, slide_order)
+            pendentes = [(idx, nome) for idx, nome in pendentes if envios.get(idx, {}).get('publicado_em') != destino]
+            if not pendentes:
+                ui.mensagem('info', "Informação", "Todas as frases já foram publicadas neste slide.", parent=lista_window)
+                return
 
-        threading.Thread(target=task).start()
+            # Ask once about every file that would be overwritten. Files uploaded by this session
+            # and, in delta mode, files identical to the local ones are not conflicts
+            conflitos = [
+                nome for idx, nome in pendentes
+                if f"{base_folder}/{nome}.mp3" in existentes and idx not in envios
+                and not (UPLOAD_DELTA and frase_inalterada(existentes, base_folder, nome))
+            ]
+            if conflitos:
+                lista = "\n".join(f"{nome}.mp3" for nome in conflitos[:15])
+                if len(conflitos) > 15:
+                    lista += f"\n... e mais {len(conflitos) - 15}"
+                overwrite = ui.perguntar(
+                    messagebox.askyesno,
+                    "Confirmação de Sobrescrita",
+                    f"{len(conflitos)} arquivo(s) já existem no Firebase Storage:\n{lista}\n\nDeseja sobrescrevê-los?",
+                    parent=lista_window
+                )
+                if not overwrite:
+                    print(f"{len(conflitos)} arquivo(s) não foram sobrescritos.")
+                    ignorados = set(conflitos)
+                    pendentes = [(idx, nome) for idx, nome in pendentes if nome not in ignorados]
+
+            # Upload in parallel; Firestore entries keep the phrase order
+            total = max(len(pendentes), 1)
+            eta = EstimativaETA(len(pendentes))
+            mostrar_progresso(0, total, eta.texto())
+
+            def atualizar_progresso(concluidos, _total):
+                eta.concluidos = concluidos
+                mostrar_progresso(concluidos, total, eta.texto())
+
+            novos_audios, publicados, erros, sincronia = enviar_frases_ao_storage(
+                bucket, base_folder, pendentes, progresso=atualizar_progresso, base_name=base_name, remotos=existentes
+            )
+            print(formatar_sincronia(sincronia))
+            mostrar_progresso(len(pendentes), total, formatar_sincronia(sincronia))
+
+            if erros:
+                resumo = "\n".join(erros[:10])
+                if len(erros) > 10:
+                    resumo += f"\n... e mais {len(erros) - 10}"
+                ui.mensagem('erro', "Erro", f"{len(erros)} envio(s) falharam:\n{resumo}", parent=lista_window)
+
+            # Update Firestore with all audio URLs and subtitles in one transaction
+            # Only the phrases written to Firestore are marked, so a failed one is sent again next time
+            if atualizar_firestore(db, document_id, novos_audios, lista_window, slide_order):
+                obter_jornal().marcar_publicadas(base_name, publicados, document_id, slide_order)
+                ui.mensagem(
+                    'info', "Conclusão",
+                    f"Arquivos enviados ao Firebase Storage e Firestore atualizados com sucesso.\n{formatar_sincronia(sincronia)}",
+                    parent=lista_window
+                )
+
+        def executar():
+            try:
+                executar_com_metricas(task)
+            finally:
+                ui.chamar(botao_enviar.config, state='normal')  # Re-enable the button after completion
+
+        threading.Thread(target=executar).start()
 
     # Function to return to the input window
     def voltar():
@@ -683,78 +1568,95 @@ def exibir_frases(frases, base_name):
 
     # Function to play the audio of the selected phrase
     def play_audio():
-        selected_item = tree.selection()
-        if not selected_item:
+        pos = posicao_selecionada("Por favor, selecione uma frase para ouvir o áudio.")
+        if pos is None:
+            return
+        frase = modelo[pos]
+        # The phrase keeps its own audio when moved; until it exists, look for the one being downloaded
+        audio_filepath = frase.audio
+        if not audio_filepath and frase.numero is not None:
+            audio_filepath = os.path.join('audios', f"{base_name}-frase-{frase.numero}.mp3")
+        if not audio_filepath:
             messagebox.showwarning(
-                "Aviso", "Por favor, selecione uma frase para ouvir o áudio.", parent=lista_window)
+                "Aviso", "Áudio ainda não foi gerado para esta frase.", parent=lista_window)
             return
-        item_id = selected_item[0]
-        idx = int(tree.item(item_id, 'values')[0])  # Número da frase
-        status = tree.item(item_id, 'values')[3]
-        if status != 'Sucesso':
+        audio_filename = os.path.basename(audio_filepath)
+        parcial_filepath = f"{audio_filepath}.part"
+        # While the audio is still being downloaded, play what has arrived so far
+        em_andamento = not os.path.exists(audio_filepath) and os.path.exists(parcial_filepath)
+        if frase.status != STATUS_SUCESSO and not em_andamento:
             messagebox.showwarning(
                 "Aviso", "Áudio ainda não foi gerado para esta frase.", parent=lista_window)
             return
-        audio_filename = f"{base_name}-frase-{idx}.mp3"
-        audio_filepath = os.path.join('audios', audio_filename)
-        if not os.path.exists(audio_filepath):
+        if em_andamento:
+            try:
+                with open(parcial_filepath, 'rb') as f:
+                    fonte = io.BytesIO(f.read())
+            except OSError:
+                # The download finished between the checks above
+                fonte = os.path.abspath(audio_filepath)
+        elif os.path.exists(audio_filepath):
+            # Obter o caminho absoluto do arquivo de áudio
+            fonte = os.path.abspath(audio_filepath)
+        else:
             messagebox.showerror(
                 "Erro", f"O arquivo de áudio '{audio_filename}' não foi encontrado.", parent=lista_window)
             return
-        # Obter o caminho absoluto do arquivo de áudio
-        audio_filepath = os.path.abspath(audio_filepath)
-
-        # Reproduzir o áudio em uma thread separada
-        def play():
-            try:
-                # Inicializar o mixer do Pygame
-                pygame.mixer.init()
-                # Carregar o arquivo de áudio
-                pygame.mixer.music.load(audio_filepath)
-                # Iniciar a reprodução
-                pygame.mixer.music.play()
-                # Loop para manter a reprodução ativa
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                # Finalizar o mixer após a reprodução
-                pygame.mixer.quit()
-            except Exception as e:
-                # Registrar o erro no console para depuração
-                print(f"Erro ao reproduzir o áudio: {e}")
 
-        threading.Thread(target=play).start()
+        # Play the audio in the persistent player
+        obter_player_audio().tocar(fonte)
+
+    # Function to play every generated phrase of the list in order, without gaps
+    def play_slide():
+        caminhos = [
+            os.path.abspath(frase.audio) for frase in modelo
+            if frase.status == STATUS_SUCESSO and frase.audio and os.path.exists(frase.audio)
+        ]
+        if not caminhos:
+            messagebox.showwarning("Aviso", "Nenhum áudio foi gerado ainda.", parent=lista_window)
+            return
+        obter_player_audio().tocar_slide(caminhos)
 
+    # Function to stop the playback
+    def stop_audio():
+        obter_player_audio().parar()
 
+    # Preload the clip of the selected phrase so "Ouvir Áudio" starts instantly; the player
+    # thread reads the file, so moving through the list does not stutter on large clips
+    def precarregar_selecao(pos):
+        audio_filepath = modelo[pos].audio
+        if audio_filepath:
+            obter_player_audio().precarregar(os.path.abspath(audio_filepath))
 
+    vista.ao_selecionar(precarregar_selecao)
 
     # Function to re-generate the audio of the selected phrase
     def re_generate_audio():
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Aviso", "Por favor, selecione uma frase para re-gerar o áudio.", parent=lista_window)
+        pos = posicao_selecionada("Por favor, selecione uma frase para re-gerar o áudio.")
+        if pos is None:
             return
-        item_id = selected_item[0]
-        idx = int(tree.item(item_id, 'values')[0])  # Number
-        frase = tree.item(item_id, 'values')[1]
+        registro = modelo[pos]
+        # The phrase keeps its files when moved, so they are rewritten under its own number
+        if registro.numero is None:
+            registro.numero = proximo_numero()
+        numero = registro.numero
+        posicao = pos + 1  # Number shown in the list
+        frase = registro.texto
+        voice_id = voz_selecionada()
         # Re-generate audio for this phrase
         def task():
-            audio_filepath = gerar_audio_e_legenda(frase, 'audios', base_name, idx)
+            if validar_voz(voice_id) is False:
+                ui.mensagem('erro', "Erro", f"A voz '{voice_id}' não existe na Eleven Labs.", parent=lista_window)
+                return
+            audio_filepath = pos_processar_audio(gerar_audio_e_legenda(frase, 'audios', base_name, numero, voice_id))
+            obter_jornal().marcar_audio(base_name, numero, chave_tts(frase, voice_id), audio_filepath, frase)
+            no_jornal[0] = True
+            ui.chamar(salvar_ordem)  # Place a phrase added after the generation in the list order
+            marcar_status(registro, audio_filepath)
             if audio_filepath:
-                status = 'Sucesso'
-                # Change status color to green
-                tree.tag_configure('sucesso', foreground='green')
-                values = list(tree.item(item_id, 'values'))
-                values[3] = status  # Update 'Status'
-                tree.item(item_id, values=values, tags=('sucesso',))
-                messagebox.showinfo("Concluído", f"Áudio re-gerado para a frase {idx}.", parent=lista_window)
+                ui.mensagem('info', "Concluído", f"Áudio re-gerado para a frase {posicao}.", parent=lista_window)
             else:
-                status = 'Falha'
-                # Change status color to red
-                tree.tag_configure('falha', foreground='red')
-                values = list(tree.item(item_id, 'values'))
-                values[3] = status  # Update 'Status'
-                tree.item(item_id, values=values, tags=('falha',))
-                messagebox.showerror("Erro", f"Falha ao re-gerar o áudio para a frase {idx}.", parent=lista_window)
+                ui.mensagem('erro', "Erro", f"Falha ao re-gerar o áudio para a frase {posicao}.", parent=lista_window)
         threading.Thread(target=task).start()
 
     # Action buttons
@@ -788,10 +1690,35 @@ def exibir_frases(frases, base_name):
     botao_regenerate = tk.Button(frame_botoes, text="Re-gerar Áudio", width=15, command=re_generate_audio, bg='#FF5722', fg='white', font=('Helvetica', 10, 'bold'), relief='raised')
     botao_regenerate.grid(row=0, column=9, padx=10, pady=5)
 
+    botao_play_slide = tk.Button(frame_botoes, text="Ouvir Todas", width=15, command=play_slide, bg='#8BC34A', fg='white', font=('Helvetica', 10, 'bold'), relief='raised')
+    botao_play_slide.grid(row=1, column=8, padx=10, pady=5)
+
+    botao_parar = tk.Button(frame_botoes, text="Parar", width=15, command=stop_audio, bg='#9E9E9E', fg='white', font=('Helvetica', 10, 'bold'), relief='raised')
+    botao_parar.grid(row=1, column=9, padx=10, pady=5)
+
+    # Restore the file numbers of the resumed session (listed in the journaled order) and the
+    # rows whose audio was already generated
+    if retomar:
+        numeros = [numero for numero, _ in obter_jornal().frases(base_name)]
+        for frase, numero in zip(modelo, numeros):
+            frase.numero = numero
+        # Keys are computed with the session's voice, not the one selected now
+        voz = voz_sessao or voz_selecionada()
+        prontos = obter_jornal().audios_prontos(base_name, {frase.numero: chave_tts(frase.texto, voz) for frase in modelo})
+        for frase in modelo:
+            if frase.numero in prontos:
+                marcar_status(frase, prontos[frase.numero])
+        if prontos:
+            botao_enviar.config(state='normal')
+
     lista_window.mainloop()
 
 # Main function to open a larger text input window
 def abrir_janela_entrada():
+    # Connect to Firebase, read the presentation and load the voices while the user types the text
+    aquecer_firebase()
+    aquecer_catalogo_vozes()
+
     janela = tk.Toplevel()
     janela.title("Entrada de Texto")
     janela.geometry("1280x720")  # Set window size
@@ -833,6 +1760,18 @@ def abrir_janela_entrada():
     def confirmar_texto():
         texto = entrada.get("1.0", tk.END).strip()
         base_name = entrada_nome.get().strip()
+        # Offer to resume a session that was interrupted before being fully published
+        if base_name and obter_jornal().sessao_pendente(base_name):
+            retomar = messagebox.askyesno(
+                "Retomar Sessão",
+                f"Existe uma sessão não concluída para '{base_name}'.\n"
+                f"Deseja retomá-la de onde parou?",
+                parent=janela
+            )
+            if retomar:
+                janela.destroy()
+                exibir_frases([frase for _, frase in obter_jornal().frases(base_name)], base_name, retomar=True)
+                return
         if texto and base_name:
             janela.destroy()
             iniciar_processamento(texto, base_name)
@@ -857,8 +1796,13 @@ def abrir_janela_entrada():
 # Run the program
 if __name__ == "__main__":
     # Uncomment the line below to list available voices
-    # obter_vozes_disponiveis()
+    # obter_vozes_disponiveis(imprimir=True)
+
+    from ttkthemes import ThemedTk  # type: ignore
 
     root = ThemedTk(theme="arc")  # Using a modern theme
     root.withdraw()
-    abrir_janela_entrada()
+    try:
+        abrir_janela_entrada()
+    finally:
+        encerrar_pos_processador()
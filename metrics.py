@@ -0,0 +1,189 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from atomic_write import gravar_atomico
+
+# Upper bounds in seconds of the latency histogram buckets (Prometheus style, cumulative on export)
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histograma:
+    """Fixed-bucket latency histogram; quantiles are interpolated inside the buckets."""
+
+    __slots__ = ('limites', 'contagens', 'total', 'soma', 'minimo', 'maximo')
+
+    def __init__(self, limites=LIMITES_PADRAO):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # Last bucket is +Inf
+        self.total = 0
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        i = 0
+        while i < len(self.limites) and valor > self.limites[i]:
+            i += 1
+        self.contagens[i] += 1
+        self.total += 1
+        self.soma += valor
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def quantil(self, q):
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = self.limites[i] if i < len(self.limites) else self.maximo
+                # Clamp to the observed range so small samples do not report a whole bucket
+                inferior = max(inferior, self.minimo)
+                superior = min(superior, self.maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.maximo
+
+    def para_dict(self):
+        return {
+            'contagem': self.total,
+            'soma': round(self.soma, 6),
+            'media': round(self.soma / self.total, 6) if self.total else None,
+            'min': self.minimo,
+            'max': self.maximo,
+            'p50': self.quantil(0.5),
+            'p95': self.quantil(0.95),
+            'p99': self.quantil(0.99),
+        }
+
+
+class Metricas:
+    """
+    Thread-safe registry of the pipeline's timings and counters.
+
+    Each stage ('tts_frase', 'upload_arquivo', 'firestore', ...) has a latency
+    histogram fed by medir()/cronometrar(); counters hold bytes transferred, cache
+    hits, retries and errors. Spans that raise count as '<stage>_erros'.
+    """
+
+    def __init__(self, limites=LIMITES_PADRAO):
+        self.limites = limites
+        self._histogramas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def observar(self, estagio, segundos):
+        with self._lock:
+            histograma = self._histogramas.get(estagio)
+            if histograma is None:
+                histograma = self._histogramas[estagio] = Histograma(self.limites)
+            histograma.observar(segundos)
+
+    def contar(self, nome, quantidade=1):
+        if not quantidade:
+            return
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + quantidade
+
+    @contextmanager
+    def medir(self, estagio):
+        """Times the 'with' block as one span of 'estagio'."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.contar(f"{estagio}_erros")
+            raise
+        finally:
+            self.observar(estagio, time.perf_counter() - inicio)
+
+    def cronometrar(self, estagio):
+        """Decorator version of medir()."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.medir(estagio):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def zerar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self.inicio = time.time()
+
+    def resumo(self):
+        """
+        Returns:
+            dict: 'estagios' (stage -> count, sum, mean, min, max, p50/p95/p99 in seconds)
+            and 'contadores'.
+        """
+        with self._lock:
+            return {
+                'inicio': self.inicio,
+                'estagios': {nome: h.para_dict() for nome, h in sorted(self._histogramas.items())},
+                'contadores': dict(sorted(self._contadores.items())),
+            }
+
+    def para_prometheus(self, prefixo='ttv'):
+        """Renders the metrics in the Prometheus text exposition format."""
+        linhas = [
+            f"# HELP {prefixo}_estagio_segundos Duração de cada estágio do pipeline.",
+            f"# TYPE {prefixo}_estagio_segundos histogram",
+        ]
+        with self._lock:
+            for nome, h in sorted(self._histogramas.items()):
+                acumulado = 0
+                for limite, contagem in zip(list(h.limites) + ['+Inf'], h.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{prefixo}_estagio_segundos_bucket{{estagio="{nome}",le="{limite}"}} {acumulado}')
+                linhas.append(f'{prefixo}_estagio_segundos_sum{{estagio="{nome}"}} {h.soma:.6f}')
+                linhas.append(f'{prefixo}_estagio_segundos_count{{estagio="{nome}"}} {h.total}')
+            for nome, valor in sorted(self._contadores.items()):
+                linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+                linhas.append(f"{prefixo}_{nome}_total {valor}")
+        return '\n'.join(linhas) + '\n'
+
+    def exportar(self, caminho):
+        """Writes the metrics atomically: Prometheus text for '.prom'/'.txt', JSON otherwise."""
+        if caminho.endswith(('.prom', '.txt')):
+            conteudo = self.para_prometheus()
+        else:
+            conteudo = json.dumps(self.resumo(), ensure_ascii=False, indent=2)
+        try:
+            gravar_atomico(caminho, conteudo)
+        except OSError as e:
+            print(f"Erro ao exportar as métricas: {e}")
+
+
+class EstimativaETA:
+    """Estimates the remaining time of a batch from the rate at which its items finish."""
+
+    def __init__(self, total):
+        self.total = total
+        self.concluidos = 0
+        self.inicio = time.monotonic()
+
+    def concluir(self, quantidade=1):
+        self.concluidos += quantidade
+
+    def restante(self):
+        """Seconds left, or None until the first item finishes."""
+        if not self.concluidos:
+            return None
+        decorrido = time.monotonic() - self.inicio
+        return decorrido / self.concluidos * max(self.total - self.concluidos, 0)
+
+    def texto(self):
+        restante = self.restante()
+        if restante is None:
+            return f"{self.concluidos}/{self.total} - calculando o tempo restante..."
+        minutos, segundos = divmod(int(round(restante)), 60)
+        return f"{self.concluidos}/{self.total} - restam ~{minutos}min {segundos:02d}s"
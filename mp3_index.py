@@ -0,0 +1,267 @@
+import base64
+import bisect
+import json
+import os
+from array import array
+
+from atomic_write import escrita_atomica
+
+# Bitrates in kbps, indexed by [version is MPEG-1][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+# Sample rates indexed by the 2-bit version field (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+# Layer field (1..3) -> layer number
+_LAYERS = {3: 1, 2: 2, 1: 3}
+
+INDEX_SUFFIX = '.idx.json'
+
+
+def ler_cabecalho(dados, pos):
+    """
+    Decodes the 4-byte MPEG audio frame header at 'pos'.
+
+    Returns:
+        tuple or None: (frame length in bytes, sample rate, samples per frame, is mono,
+        is MPEG-1), or None if there is no valid header at 'pos'.
+    """
+    if pos + 4 > len(dados) or dados[pos] != 0xFF or (dados[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = dados[pos + 1], dados[pos + 2], dados[pos + 3]
+    versao = (b1 >> 3) & 0x03
+    camada = _LAYERS.get((b1 >> 1) & 0x03)
+    indice_bitrate = b2 >> 4
+    indice_sr = (b2 >> 2) & 0x03
+    if versao == 1 or camada is None or indice_bitrate in (0, 15) or indice_sr == 3:
+        return None
+    mpeg1 = versao == 3
+    bitrate = _BITRATES[mpeg1][camada][indice_bitrate] * 1000
+    sample_rate = _SAMPLE_RATES[versao][indice_sr]
+    padding = (b2 >> 1) & 0x01
+    if camada == 1:
+        samples = 384
+        tamanho = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (camada == 2 or mpeg1) else 576
+        tamanho = samples // 8 * bitrate // sample_rate + padding
+    mono = (b3 >> 6) == 3
+    return tamanho, sample_rate, samples, mono, mpeg1
+
+
+def _tamanho_id3v2(dados):
+    if len(dados) < 10 or dados[:3] != b'ID3':
+        return 0
+    tamanho = (dados[6] << 21) | (dados[7] << 14) | (dados[8] << 7) | dados[9]
+    rodape = 10 if dados[5] & 0x10 else 0
+    return 10 + tamanho + rodape
+
+
+def _eh_frame_de_metadados(dados, pos, mono, mpeg1):
+    # Xing/Info and VBRI headers live in an otherwise silent first frame
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    inicio = pos + 4 + side_info
+    return dados[inicio:inicio + 4] in (b'Xing', b'Info') or dados[pos + 36:pos + 40] == b'VBRI'
+
+
+class IndiceMP3:
+    """
+    Frame-offset index of an MP3 file, built from the frame headers without decoding.
+
+    'offsets' holds the byte offset of each audio frame; frame i spans
+    offsets[i]..offsets[i + 1] (the last one ends at 'fim_dados'). ID3 tags and the
+    Xing/Info frame are left out, so the frames can be copied as-is.
+    """
+
+    __slots__ = ('tamanho', 'mtime_ns', 'sample_rate', 'samples_por_frame', 'offsets', 'fim_dados')
+
+    def __init__(self, tamanho, mtime_ns, sample_rate, samples_por_frame, offsets, fim_dados):
+        self.tamanho = tamanho
+        self.mtime_ns = mtime_ns
+        self.sample_rate = sample_rate
+        self.samples_por_frame = samples_por_frame
+        self.offsets = offsets
+        self.fim_dados = fim_dados
+
+    @property
+    def num_frames(self):
+        return len(self.offsets)
+
+    @property
+    def ms_por_frame(self):
+        return 1000.0 * self.samples_por_frame / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def duracao_ms(self):
+        return self.num_frames * self.ms_por_frame
+
+    def frame_em_ms(self, ms):
+        """Index of the frame being played at 'ms' milliseconds."""
+        if not self.num_frames:
+            return 0
+        return min(max(int(ms / self.ms_por_frame), 0), self.num_frames - 1)
+
+    def offset_em_ms(self, ms):
+        """Byte offset to seek to in order to start playback at 'ms' milliseconds."""
+        return self.offsets[self.frame_em_ms(ms)] if self.num_frames else self.fim_dados
+
+    def ms_no_offset(self, offset):
+        """Start time in milliseconds of the frame containing byte 'offset'."""
+        return max(bisect.bisect_right(self.offsets, offset) - 1, 0) * self.ms_por_frame
+
+    def para_dict(self):
+        return {
+            'tamanho': self.tamanho,
+            'mtime_ns': self.mtime_ns,
+            'sample_rate': self.sample_rate,
+            'samples_por_frame': self.samples_por_frame,
+            'duracao_ms': round(self.duracao_ms, 3),
+            'fim_dados': self.fim_dados,
+            'offsets': base64.b64encode(self.offsets.tobytes()).decode('ascii'),
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        offsets = array('I')
+        offsets.frombytes(base64.b64decode(dados['offsets']))
+        return cls(dados['tamanho'], dados['mtime_ns'], dados['sample_rate'],
+                   dados['samples_por_frame'], offsets, dados['fim_dados'])
+
+
+def indexar_bytes(dados, tamanho=None, mtime_ns=0):
+    """Scans MP3 data and returns its IndiceMP3."""
+    offsets = array('I')
+    sample_rate = samples_por_frame = 0
+    fim_dados = pos = _tamanho_id3v2(dados)
+    n = len(dados)
+    while pos + 4 <= n:
+        cabecalho = ler_cabecalho(dados, pos)
+        if cabecalho is None:
+            if dados[pos:pos + 3] == b'TAG':  # ID3v1 tag at the end of the file
+                break
+            # Lost sync: look for the next candidate frame
+            pos = dados.find(b'\xff', pos + 1)
+            if pos < 0:
+                break
+            continue
+        tamanho_frame, sr, samples, mono, mpeg1 = cabecalho
+        if pos + tamanho_frame > n:
+            break  # Truncated last frame
+        # Require the next frame to line up, to avoid false syncs inside audio data
+        proximo = pos + tamanho_frame
+        if proximo + 4 <= n and ler_cabecalho(dados, proximo) is None and dados[proximo:proximo + 3] != b'TAG':
+            pos = dados.find(b'\xff', pos + 1)
+            if pos < 0:
+                break
+            continue
+        if not offsets and _eh_frame_de_metadados(dados, pos, mono, mpeg1):
+            pos = fim_dados = proximo
+            continue
+        if not offsets:
+            sample_rate, samples_por_frame = sr, samples
+        offsets.append(pos)
+        pos = fim_dados = proximo
+    return IndiceMP3(n if tamanho is None else tamanho, mtime_ns, sample_rate, samples_por_frame, offsets, fim_dados)
+
+
+def indexar_mp3(caminho):
+    """Builds the index of the MP3 file at 'caminho' by scanning its frame headers."""
+    st = os.stat(caminho)
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    return indexar_bytes(dados, st.st_size, st.st_mtime_ns)
+
+
+def caminho_indice(caminho):
+    return f"{caminho}{INDEX_SUFFIX}"
+
+
+def salvar_indice(indice, caminho):
+    """Persists the index next to the clip ('<clip>.mp3.idx.json')."""
+    with escrita_atomica(caminho_indice(caminho)) as f:
+        json.dump(indice.para_dict(), f)
+
+
+def carregar_indice(caminho):
+    """
+    Returns the index of a clip, reusing the persisted one when it matches the file's
+    size and modification time, and rebuilding (and saving) it otherwise.
+    """
+    st = os.stat(caminho)
+    try:
+        with open(caminho_indice(caminho), 'r', encoding='utf-8') as f:
+            indice = IndiceMP3.de_dict(json.load(f))
+        if indice.tamanho == st.st_size and indice.mtime_ns == st.st_mtime_ns:
+            return indice
+    except (OSError, ValueError, KeyError):
+        pass
+    indice = indexar_mp3(caminho)
+    salvar_indice(indice, caminho)
+    return indice
+
+
+def duracao_ms(caminho):
+    """Duration of the clip in milliseconds, from its (cached) frame index."""
+    return carregar_indice(caminho).duracao_ms
+
+
+def escrever_concatenado(caminhos, saida):
+    """
+    Writes the audio frames of several clips back to back into the open binary file
+    'saida', without decoding or re-encoding. Tags and Xing/Info frames are dropped.
+
+    Args:
+        caminhos (list[str]): Clips in playback order; they must share sample rate and frame size.
+        saida (file): Binary file object to write to.
+
+    Returns:
+        list[tuple[int, int]]: (start_ms, end_ms) of each clip in the result.
+
+    Raises:
+        ValueError: If a clip has no frames or its format differs from the first one.
+    """
+    segmentos = []
+    formato = None
+    frames = 0
+    for caminho in caminhos:
+        indice = carregar_indice(caminho)
+        if not indice.num_frames:
+            raise ValueError(f"'{caminho}' não contém frames MP3.")
+        if formato is None:
+            formato = (indice.sample_rate, indice.samples_por_frame)
+        elif (indice.sample_rate, indice.samples_por_frame) != formato:
+            raise ValueError(f"'{caminho}' tem formato diferente dos demais áudios.")
+        with open(caminho, 'rb') as entrada:
+            entrada.seek(indice.offsets[0])
+            saida.write(entrada.read(indice.fim_dados - indice.offsets[0]))
+        inicio_ms = frames * indice.ms_por_frame
+        frames += indice.num_frames
+        segmentos.append((round(inicio_ms), round(frames * indice.ms_por_frame)))
+    return segmentos
+
+
+def concatenar_mp3(caminhos, destino):
+    """
+    Concatenates clips at frame boundaries into 'destino' (written atomically).
+
+    Returns:
+        list[tuple[int, int]]: (start_ms, end_ms) of each clip in the result.
+    """
+    with escrita_atomica(destino, 'wb') as saida:
+        return escrever_concatenado(caminhos, saida)
@@ -0,0 +1,143 @@
+STATUS_PENDENTE, STATUS_SUCESSO, STATUS_FALHA = 'Pendente', 'Sucesso', 'Falha'
+
+
+class Frase:
+    """
+    One phrase of the list. The number shown is its position, so it is not stored;
+    'numero' is the number in the names of its audio and subtitle files, which stays
+    with the phrase when it is moved.
+    """
+
+    __slots__ = ('texto', 'palavras', 'status', 'duracao', 'audio', 'numero')
+
+    def __init__(self, texto, status=STATUS_PENDENTE, duracao='', audio=None, numero=None):
+        self.texto = texto
+        self.palavras = len(texto.split())
+        self.status = status
+        self.duracao = duracao
+        self.audio = audio  # Path of the generated audio, None until it exists
+        self.numero = numero  # File number, None until a synthesis is started for the phrase
+
+    def definir_texto(self, texto):
+        self.texto = texto
+        self.palavras = len(texto.split())
+
+
+class ListaFrases:
+    """
+    In-memory list of phrases behind the phrases window.
+
+    Edits (insert, delete, move, edit) are recorded as commands with their inverse,
+    so they can be undone and redone; status updates from the synthesis are not.
+    Numbering and row colors come from the position, so a move touches two slots and
+    no edit renumbers the list. Observers registered with observar() are called after
+    every change.
+    """
+
+    def __init__(self, textos=(), max_desfazer=500):
+        self._frases = [Frase(texto) for texto in textos]
+        self.max_desfazer = max_desfazer
+        self._desfazer = []
+        self._refazer = []
+        self._observadores = []
+
+    def __len__(self):
+        return len(self._frases)
+
+    def __getitem__(self, pos):
+        return self._frases[pos]
+
+    def __iter__(self):
+        return iter(self._frases)
+
+    def textos(self):
+        return [frase.texto for frase in self._frases]
+
+    def observar(self, funcao):
+        self._observadores.append(funcao)
+
+    def notificar(self):
+        """Tells the observers that the list or a phrase's status changed."""
+        for funcao in self._observadores:
+            funcao()
+
+    # Primitive edits; each returns the command that undoes it
+    def _inserir(self, pos, frase):
+        self._frases.insert(pos, frase)
+        return ('apagar', pos)
+
+    def _apagar(self, pos):
+        return ('inserir', pos, self._frases.pop(pos))
+
+    def _mover(self, de, para):
+        if abs(de - para) == 1:
+            self._frases[de], self._frases[para] = self._frases[para], self._frases[de]
+        else:
+            self._frases.insert(para, self._frases.pop(de))
+        return ('mover', para, de)
+
+    def _editar(self, pos, texto):
+        anterior = self._frases[pos].texto
+        self._frases[pos].definir_texto(texto)
+        return ('editar', pos, anterior)
+
+    def _aplicar(self, comando):
+        operacao, *args = comando
+        return {'inserir': self._inserir, 'apagar': self._apagar, 'mover': self._mover, 'editar': self._editar}[operacao](*args)
+
+    def _executar(self, comando):
+        inverso = self._aplicar(comando)
+        self._desfazer.append(inverso)
+        if len(self._desfazer) > self.max_desfazer:
+            del self._desfazer[0]
+        self._refazer.clear()
+        self.notificar()
+
+    def inserir(self, pos, texto):
+        self._executar(('inserir', pos, Frase(texto)))
+
+    def adicionar(self, texto):
+        self.inserir(len(self._frases), texto)
+
+    def apagar(self, pos):
+        self._executar(('apagar', pos))
+
+    def mover(self, de, para):
+        self._executar(('mover', de, para))
+
+    def editar(self, pos, texto):
+        self._executar(('editar', pos, texto))
+
+    @property
+    def pode_desfazer(self):
+        return bool(self._desfazer)
+
+    @property
+    def pode_refazer(self):
+        return bool(self._refazer)
+
+    @staticmethod
+    def _posicao(comando):
+        """Position affected by a command, to select it after undo/redo."""
+        return comando[1] if comando[0] != 'mover' else comando[2]
+
+    def desfazer(self):
+        """
+        Returns:
+            int or None: Position of the restored phrase, or None if there was nothing to undo.
+        """
+        if not self._desfazer:
+            return None
+        comando = self._desfazer.pop()
+        self._refazer.append(self._aplicar(comando))
+        self.notificar()
+        return self._posicao(comando)
+
+    def refazer(self):
+        """Same as desfazer() for the last undone edit."""
+        if not self._refazer:
+            return None
+        comando = self._refazer.pop()
+        self._desfazer.append(self._aplicar(comando))
+        self.notificar()
+        return self._posicao(comando)
@@ -0,0 +1,162 @@
+import tkinter as tk
+from tkinter import ttk
+
+from phrase_model import STATUS_FALHA, STATUS_SUCESSO
+
+COLUNAS = ('Número', 'Frase', 'Palavras', 'Status', 'Duração')
+_TAGS_STATUS = {STATUS_SUCESSO: 'sucesso', STATUS_FALHA: 'falha'}
+
+
+class VistaFrases(tk.Frame):
+    """
+    Virtualized Treeview over a ListaFrases.
+
+    The Treeview only holds one row per visible line; scrolling and edits rewrite
+    the values of those rows from the model, so the cost of a redraw depends on the
+    window height and not on the number of phrases. The selection is kept as a model
+    position.
+    """
+
+    def __init__(self, parent, modelo, altura_linha=25, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.modelo = modelo
+        self.altura_linha = altura_linha
+        self.topo = 0  # Model position shown in the first row
+        self.selecionada = None  # Selected model position
+        self._linhas = []  # iids of the Treeview rows, top to bottom
+        self._ao_selecionar = []
+        self._sincronizando = False
+
+        self.tree = ttk.Treeview(self, columns=COLUNAS, show='headings', selectmode='browse')
+        self.tree.heading('Número', text='Nº')
+        self.tree.heading('Frase', text='Frase')
+        self.tree.heading('Palavras', text='Palavras')
+        self.tree.heading('Status', text='Status')
+        self.tree.heading('Duração', text='Duração')
+
+        self.tree.column('Número', width=50, anchor='center')
+        self.tree.column('Frase', width=700, anchor='w')
+        self.tree.column('Palavras', width=80, anchor='center')
+        self.tree.column('Status', width=150, anchor='center')
+        self.tree.column('Duração', width=90, anchor='center')
+
+        # Alternate row colors
+        self.tree.tag_configure('oddrow', background='#f0f0f0')
+        self.tree.tag_configure('evenrow', background='#d9d9d9')
+        # Status colors
+        self.tree.tag_configure('sucesso', foreground='green')
+        self.tree.tag_configure('falha', foreground='red')
+
+        self.barra = ttk.Scrollbar(self, orient='vertical', command=self._rolar_barra)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self._ao_redimensionar)
+        self.tree.bind('<<TreeviewSelect>>', self._ao_clicar)
+        self.tree.bind('<MouseWheel>', lambda e: self.rolar(-1 if e.delta > 0 else 1) or 'break')
+        self.tree.bind('<Button-4>', lambda e: self.rolar(-1) or 'break')
+        self.tree.bind('<Button-5>', lambda e: self.rolar(1) or 'break')
+        self.tree.bind('<Up>', lambda e: self._mover_selecao(-1) or 'break')
+        self.tree.bind('<Down>', lambda e: self._mover_selecao(1) or 'break')
+        self.tree.bind('<Prior>', lambda e: self._mover_selecao(-len(self._linhas)) or 'break')
+        self.tree.bind('<Next>', lambda e: self._mover_selecao(len(self._linhas)) or 'break')
+        self.tree.bind('<Home>', lambda e: self.selecionar(0) or 'break')
+        self.tree.bind('<End>', lambda e: self.selecionar(len(self.modelo) - 1) or 'break')
+
+        modelo.observar(self.renderizar)
+        self._ajustar_linhas(30)
+
+    def ao_selecionar(self, funcao):
+        """Registers funcao(posicao) to be called when the user selects a phrase."""
+        self._ao_selecionar.append(funcao)
+
+    def _ajustar_linhas(self, quantidade):
+        quantidade = max(1, quantidade)
+        while len(self._linhas) < quantidade:
+            self._linhas.append(self.tree.insert('', tk.END, values=('',) * len(COLUNAS)))
+        while len(self._linhas) > quantidade:
+            self.tree.delete(self._linhas.pop())
+        self.renderizar()
+
+    def _ao_redimensionar(self, event):
+        # The heading takes about one row
+        visiveis = event.height // self.altura_linha - 1
+        if visiveis != len(self._linhas):
+            self._ajustar_linhas(visiveis)
+
+    def _limitar_topo(self):
+        self.topo = max(0, min(self.topo, len(self.modelo) - len(self._linhas)))
+
+    def renderizar(self):
+        """Rewrites the visible rows from the model."""
+        total = len(self.modelo)
+        if self.selecionada is not None and self.selecionada >= total:
+            self.selecionada = total - 1 if total else None
+        self._limitar_topo()
+        selecionar = ()
+        for i, iid in enumerate(self._linhas):
+            pos = self.topo + i
+            if pos < total:
+                frase = self.modelo[pos]
+                tags = ('oddrow' if (pos + 1) % 2 else 'evenrow',)
+                if frase.status in _TAGS_STATUS:
+                    tags = (_TAGS_STATUS[frase.status],)
+                self.tree.item(iid, values=(pos + 1, frase.texto, frase.palavras, frase.status, frase.duracao), tags=tags)
+                if pos == self.selecionada:
+                    selecionar = (iid,)
+            else:
+                self.tree.item(iid, values=('',) * len(COLUNAS), tags=())
+        # Changing the Treeview selection here must not look like a user click
+        self._sincronizando = True
+        self.tree.selection_set(selecionar)
+        self.after_idle(self._fim_sincronizacao)
+        if total:
+            self.barra.set(self.topo / total, min(1.0, (self.topo + len(self._linhas)) / total))
+        else:
+            self.barra.set(0.0, 1.0)
+
+    def _fim_sincronizacao(self):
+        self._sincronizando = False
+
+    def rolar(self, linhas):
+        self.topo += linhas
+        self.renderizar()
+
+    def _rolar_barra(self, acao, valor, unidade=None):
+        if acao == 'moveto':
+            self.topo = int(float(valor) * len(self.modelo))
+        elif acao == 'scroll':
+            self.topo += int(valor) * (len(self._linhas) if unidade == 'pages' else 1)
+        self.renderizar()
+
+    def ver(self, pos):
+        """Scrolls so that model position 'pos' is visible."""
+        if pos < self.topo:
+            self.topo = pos
+        elif pos >= self.topo + len(self._linhas):
+            self.topo = pos - len(self._linhas) + 1
+
+    def selecionar(self, pos):
+        if not len(self.modelo):
+            return
+        self.selecionada = max(0, min(pos, len(self.modelo) - 1))
+        self.ver(self.selecionada)
+        self.renderizar()
+        self.tree.focus_set()
+        for funcao in self._ao_selecionar:
+            funcao(self.selecionada)
+
+    def _mover_selecao(self, passo):
+        self.selecionar((self.selecionada if self.selecionada is not None else self.topo - passo) + passo)
+
+    def _ao_clicar(self, event=None):
+        if self._sincronizando:
+            return
+        selecao = self.tree.selection()
+        if not selecao or selecao[0] not in self._linhas:
+            return
+        pos = self.topo + self._linhas.index(selecao[0])
+        if pos < len(self.modelo) and pos != self.selecionada:
+            self.selecionada = pos
+            for funcao in self._ao_selecionar:
+                funcao(pos)
@@ -0,0 +1,184 @@
+import re
+
+# Abbreviations whose trailing period does not end a sentence (compared in lower case).
+# Ambiguous ones that are also common words (e.g. 'mar', 'set', 'no') are left out.
+ABREVIACOES = {
+    'sr', 'sra', 'srta', 'dr', 'dra', 'prof', 'profa', 'eng', 'arq', 'exmo', 'exma', 'ilmo', 'ilma',
+    'v.ex', 'v.exa', 'sto', 'sta', 'gen', 'cel', 'cap', 'av', 'rod', 'km', 'apto', 'cep', 'tel',
+    'etc', 'ex', 'p.ex', 'obs', 'pág', 'pag', 'págs', 'pp', 'vol', 'art', 'arts', 'fig', 'figs',
+    'tab', 'nº', 'núm', 'aprox', 'séc', 'coord', 'ltda', 'cia', 'inc', 'corp', 's.a',
+    'jan', 'fev', 'abr', 'jun', 'jul', 'ago', 'nov', 'dez',
+    'mr', 'mrs', 'ms', 'jr', 'vs', 'i.e', 'e.g', 'cf', 'al',
+}
+
+# Sentence terminator, optional closing quotes/brackets, then whitespace
+_FIM_DE_FRASE = re.compile(r'([.!?…]+)(["\'”’»)\]]*)(\s+)')
+# Places where a long sentence can be broken without cutting a clause in half
+_PAUSA = re.compile(r'(?<=[,;:])\s+|\s+(?=[—–-]\s)')
+_PARAGRAFO = re.compile(r'\n\s*\n')
+
+
+def _eh_abreviacao(texto, pos):
+    inicio = texto.rfind(' ', 0, pos) + 1
+    token = texto[inicio:pos].lstrip('("\'“‘«[').lower()
+    if not token:
+        return False
+    # Initials such as "J. Silva"
+    if len(token) == 1 and token.isalpha():
+        return True
+    return token in ABREVIACOES
+
+
+def dividir_sentencas(paragrafo):
+    """Splits one paragraph into sentences, ignoring periods of abbreviations and initials."""
+    sentencas = []
+    inicio = 0
+    for m in _FIM_DE_FRASE.finditer(paragrafo):
+        proximo = m.end()
+        # A lower-case continuation means the punctuation did not end the sentence
+        if proximo < len(paragrafo) and paragrafo[proximo].islower():
+            continue
+        if m.group(1) == '.' and _eh_abreviacao(paragrafo, m.start(1)):
+            continue
+        sentenca = paragrafo[inicio:m.end(2)].strip()
+        if sentenca:
+            sentencas.append(sentenca)
+        inicio = proximo
+    resto = paragrafo[inicio:].strip()
+    if resto:
+        sentencas.append(resto)
+    return sentencas
+
+
+# Greedily packs pieces into lines of at most max_chars characters
+def _empacotar(partes, max_chars):
+    linhas = []
+    atual = ''
+    for parte in partes:
+        if not atual:
+            atual = parte
+        elif len(atual) + 1 + len(parte) <= max_chars:
+            atual += ' ' + parte
+        else:
+            linhas.append(atual)
+            atual = parte
+    if atual:
+        linhas.append(atual)
+    return linhas
+
+
+def quebrar_frase_longa(frase, max_chars):
+    """Breaks a sentence longer than max_chars at clause pauses, then at word boundaries."""
+    if len(frase) <= max_chars:
+        return [frase]
+    linhas = []
+    for linha in _empacotar(_PAUSA.split(frase), max_chars):
+        if len(linha) <= max_chars:
+            linhas.append(linha)
+        else:
+            linhas.extend(_empacotar(linha.split(), max_chars))
+    return linhas
+
+
+def juntar_frases_curtas(frases, min_words, max_chars=None):
+    """
+    Merges phrases with fewer than min_words words into their neighbours.
+
+    A short phrase is appended to the previous one (a short first phrase is
+    prepended to the next one), unless that would exceed max_chars.
+
+    Args:
+        frases (list[str]): Phrases in order.
+        min_words (int): Minimum number of words per phrase.
+        max_chars (int or None): Maximum length of a merged phrase; None for no limit.
+
+    Returns:
+        list[str]: The adjusted phrases.
+    """
+    resultado = []
+    pendente = None  # Short leading phrase waiting to be joined with the next one
+    for frase in frases:
+        if pendente is not None:
+            if max_chars is None or len(pendente) + 1 + len(frase) <= max_chars:
+                frase = f"{pendente} {frase}"
+            else:
+                resultado.append(pendente)
+            pendente = None
+        if len(frase.split()) >= min_words:
+            resultado.append(frase)
+        elif not resultado:
+            pendente = frase
+        elif max_chars is None or len(resultado[-1]) + 1 + len(frase) <= max_chars:
+            resultado[-1] += ' ' + frase
+        else:
+            resultado.append(frase)
+    if pendente is not None:
+        resultado.append(pendente)
+    return resultado
+
+
+def dividir_em_frases_locais(texto, min_words=8, max_chars=120):
+    """
+    Rule-based, deterministic alternative to splitting the text with the LLM.
+
+    Paragraphs and sentence punctuation always end a subtitle; sentences longer
+    than max_chars are broken at pauses or word boundaries, and phrases shorter
+    than min_words are merged with their neighbours. Runs in linear time.
+
+    Args:
+        texto (str): Text to split.
+        min_words (int): Minimum number of words per phrase.
+        max_chars (int): Maximum length of a subtitle line.
+
+    Returns:
+        list[str]: Phrases in order.
+    """
+    frases = []
+    for paragrafo in _PARAGRAFO.split(texto):
+        paragrafo = ' '.join(paragrafo.split())
+        if not paragrafo:
+            continue
+        sentencas = []
+        for sentenca in dividir_sentencas(paragrafo):
+            sentencas.extend(quebrar_frase_longa(sentenca, max_chars))
+        # Merge within the paragraph so subtitles never span two paragraphs
+        frases.extend(juntar_frases_curtas(sentencas, min_words, max_chars))
+    return frases
+
+
+def dividir_em_blocos(texto, max_chars):
+    """
+    Cuts a long text into blocks of at most max_chars characters at paragraph boundaries,
+    so each block can be split independently. A paragraph longer than max_chars is cut
+    at sentence boundaries instead.
+
+    Args:
+        texto (str): Text to cut.
+        max_chars (int): Target maximum size of a block.
+
+    Returns:
+        list[str]: Blocks in order; paragraphs inside a block are separated by a blank line.
+    """
+    partes = []
+    for paragrafo in _PARAGRAFO.split(texto):
+        paragrafo = paragrafo.strip()
+        if not paragrafo:
+            continue
+        if len(paragrafo) <= max_chars:
+            partes.append(paragrafo)
+        else:
+            partes.extend(_empacotar(dividir_sentencas(' '.join(paragrafo.split())), max_chars))
+
+    blocos = []
+    atual = ''
+    for parte in partes:
+        if not atual:
+            atual = parte
+        elif len(atual) + 2 + len(parte) <= max_chars:
+            atual += '\n\n' + parte
+        else:
+            blocos.append(atual)
+            atual = parte
+    if atual:
+        blocos.append(atual)
+    return blocos
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from atomic_write import escrita_atomica
+
+
+class CacheURLsAssinadas:
+    """
+    Persistent cache of signed URLs keyed by blob path and generation.
+
+    A URL is reused until it gets within 'margem' (at most a quarter of the requested
+    validity) of its expiry; a new upload creates a new generation and therefore a new
+    URL. Signing uses the service-account credentials given in 'credenciais' (loaded
+    once), so no signer is rebuilt per blob. salvar() writes only when URLs were signed
+    and merges with the file on disk, so processes sharing it keep each other's URLs.
+    """
+
+    def __init__(self, arquivo, margem=timedelta(days=1), credenciais=None):
+        self.arquivo = arquivo
+        self.margem = margem
+        self.credenciais = credenciais
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._alterado = False  # URLs signed since the last salvar()
+        self._entradas = self._ler()  # 'path#generation' -> {'url': str, 'expira': epoch seconds}
+
+    def _ler(self):
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _chave(blob):
+        return f"{blob.name}#{blob.generation}"
+
+    def obter(self, blob, expiration):
+        """
+        Returns a signed URL for 'blob', signing it only when no cached URL is still valid.
+
+        Args:
+            blob (google.cloud.storage.blob.Blob): Uploaded or listed blob.
+            expiration (timedelta): Validity of newly signed URLs.
+
+        Returns:
+            str: The signed URL.
+        """
+        agora = time.time()
+        # A fixed margin longer than a short validity would never let a URL be reused
+        margem = min(self.margem.total_seconds(), expiration.total_seconds() / 4)
+        # Without a generation the object version is unknown, so the URL is not cached
+        chave = self._chave(blob) if blob.generation else None
+        if chave:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+                if entrada and entrada['expira'] - agora > margem:
+                    self.hits += 1
+                    return entrada['url']
+                self.misses += 1
+        if self.credenciais is not None:
+            url = blob.generate_signed_url(expiration=expiration, credentials=self.credenciais)
+        else:
+            url = blob.generate_signed_url(expiration=expiration)
+        if chave:
+            with self._lock:
+                self._entradas[chave] = {'url': url, 'expira': agora + expiration.total_seconds()}
+                self._alterado = True
+        return url
+
+    def assinar_em_lote(self, blobs, expiration, max_workers=8):
+        """
+        Signs many blobs across a thread pool, reusing cached URLs.
+
+        Returns:
+            dict: Blob name -> signed URL (None when signing failed).
+        """
+        def assinar(blob):
+            try:
+                return self.obter(blob, expiration)
+            except Exception as e:
+                print(f"Erro ao gerar signed URL: {e}")
+                return None
+
+        blobs = list(blobs)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            urls = list(executor.map(assinar, blobs))
+        self.salvar()
+        return {blob.name: url for blob, url in zip(blobs, urls)}
+
+    def salvar(self):
+        """
+        Writes the cache to disk if URLs were signed, merged with the entries another
+        process may have written meanwhile (the later expiry wins) and without expired ones.
+        """
+        agora = time.time()
+        with self._lock:
+            if not self._alterado:
+                return
+            for chave, entrada in self._ler().items():
+                atual = self._entradas.get(chave)
+                if atual is None or entrada['expira'] > atual['expira']:
+                    self._entradas[chave] = entrada
+            self._entradas = {k: v for k, v in self._entradas.items() if v['expira'] > agora}
+            self._alterado = False
+            dados = dict(self._entradas)
+        try:
+            with escrita_atomica(self.arquivo) as f:
+                json.dump(dados, f)
+        except OSError as e:
+            print(f"Erro ao gravar o cache de URLs: {e}")
@@ -0,0 +1,182 @@
+import os
+
+import pytest
+
+from mp3_index import (
+    IndiceMP3,
+    caminho_indice,
+    carregar_indice,
+    concatenar_mp3,
+    indexar_bytes,
+    ler_cabecalho,
+)
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417 bytes and 1152 samples per frame
+CABECALHO = b'\xff\xfb\x90\x00'
+TAMANHO_FRAME = 417
+MS_POR_FRAME = 1000.0 * 1152 / 44100
+
+
+def frame(cabecalho=CABECALHO, tamanho=TAMANHO_FRAME, preenchimento=b'\x00'):
+    return cabecalho + preenchimento * (tamanho - 4)
+
+
+def frame_xing(marca=b'Xing'):
+    # The tag follows the 32 bytes of side information of a stereo MPEG-1 frame
+    dados = bytearray(frame())
+    dados[4 + 32:4 + 36] = marca
+    return bytes(dados)
+
+
+def tag_id3v2(conteudo):
+    n = len(conteudo)
+    tamanho = bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+    return b'ID3\x04\x00\x00' + tamanho + conteudo
+
+
+def gravar(pasta, nome, dados):
+    caminho = os.path.join(pasta, nome)
+    with open(caminho, 'wb') as f:
+        f.write(dados)
+    return caminho
+
+
+def test_cabecalho_mpeg1_layer3():
+    assert ler_cabecalho(CABECALHO, 0) == (TAMANHO_FRAME, 44100, 1152, False, True)
+
+
+def test_cabecalho_com_padding_e_mono():
+    assert ler_cabecalho(b'\xff\xfb\x92\xc0', 0) == (TAMANHO_FRAME + 1, 44100, 1152, True, True)
+
+
+def test_cabecalho_mpeg2_layer3():
+    # 64 kbps at 22.05 kHz: 576 samples per frame
+    assert ler_cabecalho(b'\xff\xf3\x80\x00', 0) == (208, 22050, 576, False, False)
+
+
+@pytest.mark.parametrize('dados', [
+    b'',
+    b'\xff\xfb\x90',            # Shorter than a header
+    b'\x00\xfb\x90\x00',        # No sync
+    b'\xff\xeb\x90\x00',        # Reserved version
+    b'\xff\xf9\x90\x00',        # Reserved layer
+    b'\xff\xfb\x00\x00',        # Free-format bitrate
+    b'\xff\xfb\xf0\x00',        # Invalid bitrate
+    b'\xff\xfb\x9c\x00',        # Reserved sample rate
+])
+def test_cabecalho_invalido(dados):
+    assert ler_cabecalho(dados, 0) is None
+
+
+def test_arquivo_vazio():
+    indice = indexar_bytes(b'')
+    assert indice.num_frames == 0
+    assert indice.duracao_ms == 0
+    assert indice.fim_dados == 0
+    assert indice.frame_em_ms(1000) == 0
+    assert indice.offset_em_ms(1000) == 0
+
+
+def test_frames_cbr():
+    indice = indexar_bytes(frame() * 3)
+    assert list(indice.offsets) == [0, TAMANHO_FRAME, 2 * TAMANHO_FRAME]
+    assert indice.fim_dados == 3 * TAMANHO_FRAME
+    assert indice.sample_rate == 44100
+    assert indice.duracao_ms == pytest.approx(3 * MS_POR_FRAME)
+
+
+def test_frame_xing_de_vbr_fica_de_fora():
+    indice = indexar_bytes(frame_xing() + frame() * 2)
+    assert list(indice.offsets) == [TAMANHO_FRAME, 2 * TAMANHO_FRAME]
+    assert indice.duracao_ms == pytest.approx(2 * MS_POR_FRAME)
+
+
+def test_frame_info_de_cbr_fica_de_fora():
+    assert list(indexar_bytes(frame_xing(b'Info') + frame()).offsets) == [TAMANHO_FRAME]
+
+
+def test_frame_xing_so_no_inicio():
+    # A later frame that happens to carry the marker is audio
+    assert indexar_bytes(frame() + frame_xing()).num_frames == 2
+
+
+def test_tags_id3v2_e_id3v1_ficam_de_fora():
+    # A frame-like sequence inside the tag must not be taken as audio
+    id3v2 = tag_id3v2(CABECALHO + b'\x00' * 16)
+    id3v1 = b'TAG' + b'\x00' * 125
+    indice = indexar_bytes(id3v2 + frame() * 2 + id3v1)
+    assert list(indice.offsets) == [len(id3v2), len(id3v2) + TAMANHO_FRAME]
+    assert indice.fim_dados == len(id3v2) + 2 * TAMANHO_FRAME
+
+
+def test_tag_id3v2_sem_audio():
+    indice = indexar_bytes(tag_id3v2(b'\x00' * 20))
+    assert indice.num_frames == 0
+    assert indice.fim_dados == 30
+
+
+def test_lixo_antes_dos_frames_e_frame_truncado():
+    dados = b'\x00\xff\x12' + frame() * 2 + frame()[:100]
+    indice = indexar_bytes(dados)
+    assert list(indice.offsets) == [3, 3 + TAMANHO_FRAME]
+    assert indice.fim_dados == 3 + 2 * TAMANHO_FRAME
+
+
+def test_busca_por_tempo():
+    indice = indexar_bytes(frame() * 4)
+    assert indice.frame_em_ms(-5) == 0
+    assert indice.frame_em_ms(MS_POR_FRAME * 2.5) == 2
+    assert indice.frame_em_ms(10 ** 6) == 3
+    assert indice.offset_em_ms(MS_POR_FRAME * 1.5) == TAMANHO_FRAME
+    assert indice.ms_no_offset(2 * TAMANHO_FRAME + 10) == pytest.approx(2 * MS_POR_FRAME)
+
+
+def test_indice_serializado():
+    indice = indexar_bytes(frame() * 3, mtime_ns=123)
+    copia = IndiceMP3.de_dict(indice.para_dict())
+    assert list(copia.offsets) == list(indice.offsets)
+    assert (copia.tamanho, copia.mtime_ns, copia.fim_dados) == (indice.tamanho, 123, indice.fim_dados)
+
+
+def test_indice_persistido_e_reconstruido(tmp_path):
+    caminho = gravar(tmp_path, 'a.mp3', frame() * 2)
+    assert carregar_indice(caminho).num_frames == 2
+    assert os.path.exists(caminho_indice(caminho))
+
+    # A file that changed after the index was saved is indexed again
+    with open(caminho, 'ab') as f:
+        f.write(frame())
+    assert carregar_indice(caminho).num_frames == 3
+
+
+def test_indice_de_arquivo_vazio(tmp_path):
+    assert carregar_indice(gravar(tmp_path, 'vazio.mp3', b'')).num_frames == 0
+
+
+def test_concatenacao_sem_intervalos(tmp_path):
+    a = gravar(tmp_path, 'a.mp3', tag_id3v2(b'\x00' * 10) + frame_xing() + frame() * 3)
+    b = gravar(tmp_path, 'b.mp3', frame() * 2 + b'TAG' + b'\x00' * 125)
+    destino = os.path.join(tmp_path, 'saida.mp3')
+
+    segmentos = concatenar_mp3([a, b], destino)
+
+    assert segmentos == [(0, round(3 * MS_POR_FRAME)), (round(3 * MS_POR_FRAME), round(5 * MS_POR_FRAME))]
+    with open(destino, 'rb') as f:
+        assert f.read() == frame() * 5
+    assert carregar_indice(destino).num_frames == 5
+
+
+def test_concatenacao_de_arquivo_vazio_falha(tmp_path):
+    a = gravar(tmp_path, 'a.mp3', frame())
+    vazio = gravar(tmp_path, 'vazio.mp3', b'')
+    destino = os.path.join(tmp_path, 'saida.mp3')
+    with pytest.raises(ValueError):
+        concatenar_mp3([a, vazio], destino)
+    assert not os.path.exists(destino)
+
+
+def test_concatenacao_de_formatos_diferentes_falha(tmp_path):
+    a = gravar(tmp_path, 'a.mp3', frame())
+    b = gravar(tmp_path, 'b.mp3', frame(b'\xff\xf3\x80\x00', 208) * 2)
+    with pytest.raises(ValueError):
+        concatenar_mp3([a, b], os.path.join(tmp_path, 'saida.mp3'))
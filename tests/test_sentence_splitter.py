@@ -0,0 +1,90 @@
+from sentence_splitter import (
+    dividir_em_blocos,
+    dividir_em_frases_locais,
+    dividir_sentencas,
+    juntar_frases_curtas,
+    quebrar_frase_longa,
+)
+
+
+def test_abreviacoes_nao_encerram_a_frase():
+    assert dividir_sentencas('O Dr. Silva chegou. A Sra. Costa saiu.') == [
+        'O Dr. Silva chegou.',
+        'A Sra. Costa saiu.',
+    ]
+
+
+def test_iniciais_nao_encerram_a_frase():
+    assert dividir_sentencas('J. Silva disse oi. Ele saiu.') == ['J. Silva disse oi.', 'Ele saiu.']
+
+
+def test_continuacao_em_minuscula_nao_encerra_a_frase():
+    assert dividir_sentencas('Veja a pág. seguinte. Fim.') == ['Veja a pág. seguinte.', 'Fim.']
+    assert dividir_sentencas('Ele gritou! e saiu.') == ['Ele gritou! e saiu.']
+
+
+def test_aspas_de_fechamento_ficam_com_a_frase():
+    assert dividir_sentencas('Ele disse: "Vamos!" Ela riu.') == ['Ele disse: "Vamos!"', 'Ela riu.']
+
+
+def test_numero_decimal_nao_encerra_a_frase():
+    assert dividir_sentencas('São 3.5 metros. Ok') == ['São 3.5 metros.', 'Ok']
+
+
+def test_texto_sem_pontuacao_final():
+    assert dividir_sentencas('Primeira frase. segunda sem ponto') == ['Primeira frase. segunda sem ponto']
+    assert dividir_em_frases_locais('sem pontuação nenhuma aqui', min_words=1) == ['sem pontuação nenhuma aqui']
+
+
+def test_texto_vazio():
+    assert dividir_sentencas('') == []
+    assert dividir_em_frases_locais('') == []
+    assert dividir_em_frases_locais('  \n\n  \n') == []
+    assert dividir_em_blocos('', 100) == []
+
+
+def test_frase_longa_quebrada_nas_pausas():
+    assert quebrar_frase_longa('um, dois, três, quatro', 10) == ['um, dois,', 'três,', 'quatro']
+
+
+def test_frase_longa_sem_pausas_quebrada_nas_palavras():
+    linhas = quebrar_frase_longa('palavra ' * 5, 16)
+    assert linhas == ['palavra palavra', 'palavra palavra', 'palavra']
+    assert all(len(linha) <= 16 for linha in linhas)
+
+
+def test_frase_curta_nao_e_quebrada():
+    assert quebrar_frase_longa('curta', 10) == ['curta']
+
+
+def test_frases_curtas_juntadas_aos_vizinhos():
+    # A short first phrase goes to the next one, the others to the previous one
+    assert juntar_frases_curtas(['Oi.', 'Tudo bem com você?', 'Sim.'], 3) == ['Oi. Tudo bem com você? Sim.']
+
+
+def test_frases_curtas_respeitam_max_chars():
+    assert juntar_frases_curtas(['Tudo bem com você?', 'Sim.'], 3, max_chars=20) == ['Tudo bem com você?', 'Sim.']
+    assert juntar_frases_curtas(['Oi.', 'Tudo bem com você?'], 3, max_chars=10) == ['Oi.', 'Tudo bem com você?']
+
+
+def test_frase_curta_unica_e_mantida():
+    assert juntar_frases_curtas(['Oi.'], 3) == ['Oi.']
+
+
+def test_frases_nao_atravessam_paragrafos():
+    assert dividir_em_frases_locais('Primeiro parágrafo aqui.\n\nOk.', min_words=3) == ['Primeiro parágrafo aqui.', 'Ok.']
+
+
+def test_legendas_respeitam_max_chars():
+    texto = 'Esta é uma frase bastante longa, com várias pausas; e que precisa ser quebrada em partes menores.'
+    frases = dividir_em_frases_locais(texto, min_words=1, max_chars=30)
+    assert all(len(frase) <= 30 for frase in frases)
+    assert ' '.join(frases) == texto
+
+
+def test_blocos_nas_fronteiras_de_paragrafo():
+    assert dividir_em_blocos('aaa\n\nbbb\n\nccc', 8) == ['aaa\n\nbbb', 'ccc']
+
+
+def test_paragrafo_longo_cortado_nas_frases():
+    assert dividir_em_blocos('Um dois. Três quatro. Cinco seis.', 12) == ['Um dois.', 'Três quatro.', 'Cinco seis.']
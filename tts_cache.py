@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from atomic_write import arquivo_temporario
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache for synthesized audio.
+
+    Each entry is stored as '<hash>.mp3', where the hash covers everything that
+    changes the generated audio (text, voice, model and voice settings). The
+    cache is bounded by size and evicts the least recently used entries; recency
+    is kept in the files' modification time so it survives restarts.
+
+    Several processes may share the directory (job_service workers, concurrent batch
+    runs), so the files are the source of truth: a lookup checks the file itself, and
+    after each store the directory is rescanned and trimmed under a lock file, which
+    keeps the size cap for all of them together.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._carregar_indice()
+
+    # Rebuild the LRU order from the files on disk
+    def _carregar_indice(self):
+        self._entries.clear()
+        self._total_bytes = 0
+        arquivos = []
+        for nome in os.listdir(self.directory):
+            if not nome.endswith('.mp3'):
+                continue
+            caminho = os.path.join(self.directory, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            arquivos.append((st.st_mtime, nome[:-4], st.st_size))
+        for _, chave, tamanho in sorted(arquivos):
+            self._entries[chave] = tamanho
+            self._total_bytes += tamanho
+
+    @staticmethod
+    def chave(texto, voice_id, model_id, voice_settings):
+        """
+        Builds the cache key for a synthesis request.
+
+        Args:
+            texto (str): Text to be synthesized.
+            voice_id (str): Eleven Labs voice ID.
+            model_id (str): Eleven Labs model ID.
+            voice_settings (dict): Voice settings sent to the API.
+
+        Returns:
+            str: Hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {'text': texto, 'voice_id': voice_id, 'model_id': model_id, 'voice_settings': voice_settings},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.directory, f"{chave}.mp3")
+
+    # Exclusive lock shared by every process using the directory
+    @contextmanager
+    def _trava(self):
+        with open(os.path.join(self.directory, '.lock'), 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after about 10 seconds
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def obter(self, chave, destino):
+        """
+        Copies a cached audio to 'destino'. The copy replaces 'destino' only once complete,
+        so an interrupted copy never leaves a truncated clip that would count as ready.
+
+        Returns:
+            bool: True on a cache hit, False otherwise.
+        """
+        caminho = self._caminho(chave)
+        try:
+            with arquivo_temporario(destino) as temporario:
+                shutil.copyfile(caminho, temporario)
+            os.utime(caminho)  # Record the access for LRU ordering
+        except FileNotFoundError:
+            # Never stored, or evicted by another process
+            with self._lock:
+                self.misses += 1
+            return False
+        except OSError as e:
+            print(f"Erro ao ler o cache de áudio: {e}")
+            with self._lock:
+                self._descartar(chave)
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def guardar(self, chave, origem):
+        """Stores the audio file 'origem' under 'chave', evicting old entries if needed."""
+        caminho = self._caminho(chave)
+        try:
+            with arquivo_temporario(caminho) as temporario:
+                shutil.copyfile(origem, temporario)
+        except OSError as e:
+            print(f"Erro ao gravar no cache de áudio: {e}")
+            return
+        # Other processes store and touch entries too, so the directory is read again
+        try:
+            with self._lock, self._trava():
+                self._carregar_indice()
+                self._evict()
+        except OSError as e:
+            print(f"Erro ao limitar o cache de áudio: {e}")
+
+    # Remove least recently used entries until the cache fits its size cap
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            chave = next(iter(self._entries))
+            self._descartar(chave)
+
+    def _descartar(self, chave):
+        tamanho = self._entries.pop(chave, 0)
+        self._total_bytes -= tamanho
+        try:
+            os.remove(self._caminho(chave))
+        except OSError:
+            pass
+
+    def estatisticas(self):
+        """Returns hit/miss counters and the current cache size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
@@ -0,0 +1,168 @@
+import queue
+import threading
+from tkinter import messagebox
+
+_CHAMADA = object()  # Marks queue entries that are plain calls, not coalesced keys
+
+_DIALOGOS = {
+    'info': messagebox.showinfo,
+    'aviso': messagebox.showwarning,
+    'erro': messagebox.showerror,
+}
+
+
+class BarramentoUI:
+    """
+    Delivers widget updates from worker threads to the Tk main loop.
+
+    Tk may only be touched from the thread running mainloop(), so workers post
+    callables here and a timer drains the queue every 'intervalo_ms'. Updates posted
+    with coalescer() under the same key (a row, the progress bar) replace each other
+    until the next tick, so thousands of phrases finishing at once cost one redraw per
+    tick instead of one per phrase. Messages of the same kind are merged into a single
+    dialog, and perguntar() runs a blocking prompt on the main thread and hands the
+    answer back to the worker.
+    """
+
+    def __init__(self, widget, intervalo_ms=50, max_linhas_mensagem=15):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self.max_linhas_mensagem = max_linhas_mensagem
+        self.ticks = 0
+        self.aplicadas = 0
+        self.coalescidas = 0
+        self._fila = queue.SimpleQueue()  # Keys of self._pendentes, or (_CHAMADA, funcao, args, kwargs)
+        self._pendentes = {}  # key -> (funcao, args, kwargs), latest update wins
+        self._lock = threading.Lock()
+        self._esperas = set()  # Events of workers blocked in perguntar()
+        self._ativo = True
+        self._drenando = False
+        self._thread_principal = threading.current_thread()
+        widget.bind('<Destroy>', self._ao_destruir, add='+')
+        self._agendar()
+
+    @property
+    def ativo(self):
+        return self._ativo
+
+    def na_thread_principal(self):
+        return threading.current_thread() is self._thread_principal
+
+    def coalescer(self, chave, funcao, *args, **kwargs):
+        """Schedules funcao(*args, **kwargs), replacing any update still pending under 'chave'."""
+        if not self._ativo:
+            return
+        with self._lock:
+            novo = chave not in self._pendentes
+            self._pendentes[chave] = (funcao, args, kwargs)
+            if not novo:
+                self.coalescidas += 1
+        if novo:
+            self._fila.put(chave)
+
+    def chamar(self, funcao, *args, **kwargs):
+        """Schedules funcao(*args, **kwargs) on the main thread, in posting order."""
+        if self._ativo:
+            self._fila.put((_CHAMADA, funcao, args, kwargs))
+
+    def mensagem(self, tipo, titulo, texto, parent=None):
+        """
+        Shows a dialog ('info', 'aviso' or 'erro') without blocking the caller. Messages with
+        the same kind and title posted before the next tick are shown together.
+        """
+        if not self._ativo:
+            return
+        chave = ('mensagem', tipo, titulo, id(parent))
+        with self._lock:
+            pendente = self._pendentes.get(chave)
+            if pendente is not None:
+                pendente[1][0].append(texto)
+                self.coalescidas += 1
+                return
+            self._pendentes[chave] = (self._mostrar, ([texto], tipo, titulo, parent), {})
+        self._fila.put(chave)
+
+    def perguntar(self, funcao, *args, **kwargs):
+        """
+        Runs a blocking dialog such as messagebox.askyesno on the main thread and waits for it.
+
+        Returns:
+            The dialog's result, or None if the window was closed before it answered.
+        """
+        if self.na_thread_principal():
+            return funcao(*args, **kwargs)
+        pronto = threading.Event()
+        resultado = []
+
+        def executar():
+            try:
+                resultado.append(funcao(*args, **kwargs))
+            finally:
+                pronto.set()
+
+        with self._lock:
+            if not self._ativo:
+                return None
+            self._esperas.add(pronto)
+        self.chamar(executar)
+        pronto.wait()
+        with self._lock:
+            self._esperas.discard(pronto)
+        return resultado[0] if resultado else None
+
+    def _mostrar(self, textos, tipo, titulo, parent):
+        linhas = textos[:self.max_linhas_mensagem]
+        if len(textos) > self.max_linhas_mensagem:
+            linhas.append(f"... e mais {len(textos) - self.max_linhas_mensagem}")
+        _DIALOGOS[tipo](titulo, "\n\n".join(linhas), parent=parent)
+
+    def _agendar(self):
+        try:
+            self.widget.after(self.intervalo_ms, self._drenar)
+        except Exception:  # The widget was destroyed
+            self._encerrar()
+
+    def _drenar(self):
+        if not self._ativo:
+            return
+        # Schedule first: ticks that fire while a dialog below runs its own event loop
+        # return right away, so there is always exactly one pending tick
+        self._agendar()
+        if self._drenando:
+            return
+        self._drenando = True
+        self.ticks += 1
+        try:
+            # Only what is queued now; updates posted meanwhile wait for the next tick
+            for _ in range(self._fila.qsize()):
+                try:
+                    entrada = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(entrada, tuple) and entrada and entrada[0] is _CHAMADA:
+                    _, funcao, args, kwargs = entrada
+                else:
+                    with self._lock:
+                        funcao, args, kwargs = self._pendentes.pop(entrada)
+                if not self._ativo:
+                    break
+                try:
+                    funcao(*args, **kwargs)
+                    self.aplicadas += 1
+                except Exception as e:
+                    print(f"Erro ao atualizar a interface: {e}")
+        finally:
+            self._drenando = False
+
+    def _ao_destruir(self, event):
+        if event.widget is self.widget:
+            self._encerrar()
+
+    def _encerrar(self):
+        with self._lock:
+            self._ativo = False
+            self._pendentes.clear()
+            esperas = list(self._esperas)
+        # Release workers waiting for an answer that will never come
+        for pronto in esperas:
+            pronto.set()
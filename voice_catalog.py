@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+import requests
+
+from atomic_write import escrita_atomica
+
+
+class CatalogoVozes:
+    """
+    Persistent cache of the Eleven Labs voice catalog.
+
+    The list from '/v1/voices' is kept on disk together with its ETag. Within 'ttl'
+    seconds it is served without touching the network; after that it is revalidated
+    with If-None-Match, so an unchanged catalog costs a bodyless 304. When the API
+    cannot be reached the last known list is used. Concurrent callers share a single
+    refresh.
+    """
+
+    def __init__(self, arquivo, cliente, ttl=24 * 3600, intervalo_minimo=60):
+        self.arquivo = arquivo
+        self.cliente = cliente
+        self.ttl = ttl
+        self.intervalo_minimo = intervalo_minimo  # Minimum age before an unknown ID forces a refresh
+        self.hits = 0
+        self.revalidacoes = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+        self._atualizacao_lock = threading.Lock()
+        self._dados = {'etag': None, 'buscado_em': 0, 'vozes': []}
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if isinstance(dados.get('vozes'), list):
+                self._dados = dados
+        except (OSError, ValueError, AttributeError):
+            pass
+        self._por_id = {voz['voice_id']: voz for voz in self._dados['vozes']}
+
+    def _idade(self):
+        return time.time() - self._dados['buscado_em']
+
+    def _fresco(self):
+        return bool(self._dados['vozes']) and self._idade() < self.ttl
+
+    def vozes(self, forcar=False):
+        """
+        Returns the voices, going to the API only when the cached list is stale.
+
+        Args:
+            forcar (bool): Revalidate even if the cached list is still fresh.
+
+        Returns:
+            list[dict]: Voices as returned by the API ('voice_id', 'name', ...).
+
+        Raises:
+            requests.exceptions.RequestException: If the API fails and nothing is cached.
+        """
+        with self._lock:
+            if not forcar and self._fresco():
+                self.hits += 1
+                return list(self._dados['vozes'])
+        return self.atualizar(forcar)
+
+    def em_cache(self):
+        """Returns the last known voices, stale or not, without touching the network."""
+        with self._lock:
+            return list(self._dados['vozes'])
+
+    def atualizar(self, forcar=True):
+        """Fetches or revalidates the catalog; see vozes()."""
+        buscado_antes = self._dados['buscado_em']
+        with self._atualizacao_lock:
+            with self._lock:
+                # Another thread refreshed the list while this one waited
+                if self._dados['buscado_em'] != buscado_antes or (not forcar and self._fresco()):
+                    return list(self._dados['vozes'])
+                etag = self._dados['etag'] if self._dados['vozes'] else None
+
+            headers = {"Accept": "application/json"}
+            if etag:
+                headers["If-None-Match"] = etag
+            try:
+                response = self.cliente.get("/v1/voices", headers=headers, timeout=30)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                    vozes = response.json()['voices']
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                with self._lock:
+                    if not self._dados['vozes']:
+                        raise
+                    print(f"Erro ao atualizar o catálogo de vozes, usando a lista salva: {e}")
+                    return list(self._dados['vozes'])
+
+            with self._lock:
+                if response.status_code == 304:
+                    self.revalidacoes += 1
+                else:
+                    self.downloads += 1
+                    self._dados['vozes'] = vozes
+                    self._dados['etag'] = response.headers.get('ETag')
+                    self._por_id = {voz['voice_id']: voz for voz in vozes}
+                self._dados['buscado_em'] = time.time()
+                dados = dict(self._dados)
+            self._salvar(dados)
+            return list(dados['vozes'])
+
+    def obter(self, voice_id):
+        """
+        Looks up one voice. An unknown ID refreshes the catalog once (the voice may be
+        new), unless the list was fetched less than 'intervalo_minimo' seconds ago.
+
+        Returns:
+            dict or None: The voice, or None if it does not exist.
+        """
+        self.vozes()
+        with self._lock:
+            voz = self._por_id.get(voice_id)
+            recente = self._idade() < self.intervalo_minimo
+        if voz is None and not recente:
+            self.atualizar()
+            with self._lock:
+                voz = self._por_id.get(voice_id)
+        return voz
+
+    def validar(self, voice_id):
+        """True if 'voice_id' is in the catalog."""
+        return self.obter(voice_id) is not None
+
+    @staticmethod
+    def rotulo(voz):
+        """Text shown for a voice in pickers: 'Name (language) - ID'."""
+        idioma = voz.get('language') or (voz.get('labels') or {}).get('language')
+        nome = f"{voz.get('name', voz['voice_id'])} ({idioma})" if idioma else voz.get('name', voz['voice_id'])
+        return f"{nome} - {voz['voice_id']}"
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidacoes': self.revalidacoes,
+                'downloads': self.downloads,
+                'vozes': len(self._dados['vozes']),
+            }
+
+    def _salvar(self, dados):
+        try:
+            with escrita_atomica(self.arquivo) as f:
+                json.dump(dados, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Erro ao gravar o catálogo de vozes: {e}")